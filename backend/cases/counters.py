@@ -0,0 +1,145 @@
+"""
+Per-party case request and message counters.
+
+citizen_counters and lawyer_counters hold one row per profile: its case
+requests by status, the messages it sent and received on them and how many
+of those received are unread. Statement-level triggers on case_requests and
+messages (cases/migrations/0005_profile_counters.py) add each write's
+difference in the same transaction, so the stats endpoints read one row
+instead of counting the party's requests and messages.
+
+The triggers see status changes, message inserts, deletes and read marks;
+moving a request to another citizen or lawyer moves its requests but not
+its messages. find_drift() compares the counters with a recount and
+repair() rewrites the rows that differ (manage.py rebuild_counters).
+"""
+from django.db import connection, transaction
+
+from .models import CitizenCounters, LawyerCounters
+
+REQUEST_FIELDS = ('pending', 'accepted', 'rejected', 'in_progress', 'completed')
+MESSAGE_FIELDS = ('messages_sent', 'messages_received', 'unread_messages')
+FIELDS = REQUEST_FIELDS + MESSAGE_FIELDS
+
+# Party -> (counters model, the case_requests column naming the party, the party's profile table)
+PARTIES = {
+    'citizen': (CitizenCounters, 'requester_id', 'citizen_profiles'),
+    'lawyer': (LawyerCounters, 'lawyer_id', 'lawyer_profiles'),
+}
+
+RECOUNT_SQL = """
+    WITH request_counts AS (
+        SELECT {party} AS profile_id, {status_counts}
+        FROM case_requests
+        GROUP BY {party}
+    ), message_counts AS (
+        SELECT cr.{party} AS profile_id,
+            count(*) FILTER (WHERE m.sender_id = p.user_id) AS messages_sent,
+            count(*) FILTER (WHERE m.sender_id <> p.user_id) AS messages_received,
+            count(*) FILTER (WHERE m.sender_id <> p.user_id AND NOT m.is_read) AS unread_messages
+        FROM messages m
+        JOIN case_requests cr ON cr.id = m.case_request_id
+        JOIN {profiles} p ON p.id = cr.{party}
+        GROUP BY cr.{party}
+    )
+    SELECT profile_id, {fields}
+    FROM request_counts FULL JOIN message_counts USING (profile_id)
+"""
+
+# Counter rows that differ from a recount, with both sets of values; a
+# profile with nothing to count matches a missing row or a row of zeros
+DRIFT_SQL = """
+    SELECT coalesce(actual.profile_id, stored.{key}) AS profile_id, {stored}, {actual_columns}
+    FROM ({recount}) actual
+    FULL JOIN {counters} stored ON stored.{key} = actual.profile_id
+    WHERE ({stored}) IS DISTINCT FROM ({actual})
+    ORDER BY 1
+"""
+
+REPAIR_SQL = """
+    INSERT INTO {counters} ({key}, {fields})
+    SELECT profile_id, {actual}
+    FROM ({drift}) drift
+    ON CONFLICT ({key}) DO UPDATE SET {assignments}
+"""
+
+# Rows of profiles that were deleted while the triggers still wrote to them
+ORPHANS_SQL = """
+    DELETE FROM {counters} WHERE NOT EXISTS (SELECT 1 FROM {profiles} p WHERE p.id = {counters}.{key})
+"""
+
+
+def for_user(user):
+    """
+    The user's counters in one primary key read, an unsaved row of zeros if
+    nothing has been counted for them yet, or None if they are neither a
+    citizen nor a lawyer
+    """
+    user_type = getattr(user, 'user_type', None) if user.is_authenticated else None
+    if user_type == 'citizen':
+        return CitizenCounters.objects.filter(citizen__user_id=user.id).first() or CitizenCounters()
+    if user_type == 'lawyer':
+        return LawyerCounters.objects.filter(lawyer__user_id=user.id).first() or LawyerCounters()
+    return None
+
+
+def recount_sql(party):
+    model, column, profiles = PARTIES[party]
+    return RECOUNT_SQL.format(
+        party=column,
+        profiles=profiles,
+        status_counts=', '.join(f"count(*) FILTER (WHERE status = '{status}') AS {status}" for status in REQUEST_FIELDS),
+        fields=', '.join(f'coalesce({field}, 0) AS {field}' for field in FIELDS),
+    )
+
+
+def drift_sql(party):
+    model = PARTIES[party][0]
+    return DRIFT_SQL.format(
+        key=model._meta.pk.column,
+        counters=model._meta.db_table,
+        recount=recount_sql(party),
+        stored=', '.join(f'coalesce(stored.{field}, 0)' for field in FIELDS),
+        actual=', '.join(f'coalesce(actual.{field}, 0)' for field in FIELDS),
+        actual_columns=', '.join(f'coalesce(actual.{field}, 0) AS {field}' for field in FIELDS),
+    )
+
+
+def find_drift(party):
+    """[(profile id, {field: (stored, actual)} for the fields that differ)] for one party"""
+    with connection.cursor() as cursor:
+        cursor.execute(drift_sql(party))
+        rows = cursor.fetchall()
+
+    drift = []
+    for profile_id, *values in rows:
+        stored, actual = values[:len(FIELDS)], values[len(FIELDS):]
+        drift.append((profile_id, {
+            field: (was, count) for field, was, count in zip(FIELDS, stored, actual) if was != count
+        }))
+    return drift
+
+
+def repair(party):
+    """
+    Rewrite the party's drifted counter rows from a recount and delete the
+    rows of deleted profiles; returns how many rows were rewritten. Writes
+    to case_requests and messages wait until it is done, so none is lost
+    between the recount and the rewrite.
+    """
+    model, column, profiles = PARTIES[party]
+    counters = model._meta.db_table
+    key = model._meta.pk.column
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute('LOCK TABLE case_requests, messages IN SHARE MODE')
+        cursor.execute(REPAIR_SQL.format(
+            counters=counters,
+            key=key,
+            fields=', '.join(FIELDS),
+            actual=', '.join(f'drift.{field}' for field in FIELDS),
+            drift=drift_sql(party),
+            assignments=', '.join(f'{field} = EXCLUDED.{field}' for field in FIELDS),
+        ))
+        repaired = cursor.rowcount
+        cursor.execute(ORPHANS_SQL.format(counters=counters, profiles=profiles, key=key))
+    return repaired
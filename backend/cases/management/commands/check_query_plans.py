@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from cases import plan_check
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed millions of case, message and lawyer rows, call every case, messaging, lawyer and '
+        'admin dashboard endpoint, and fail if any query they run scans a large table sequentially. '
+        'Runs in a scratch test database, never the configured one.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=1000000,
+                            help='Case requests to seed; users, cases and messages scale with it')
+        parser.add_argument('--messages-per-request', type=int, default=3)
+        parser.add_argument('--only', default=None,
+                            help='Run only the checks whose name contains this text')
+        parser.add_argument('--keepdb', action='store_true',
+                            help='Reuse the scratch database from a previous run and keep it afterwards')
+        parser.add_argument('--plans', action='store_true',
+                            help='Show the scans and SQL of every query, not only failing ones')
+
+    def handle(self, *args, **options):
+        checks = [spec for spec in plan_check.CHECKS if not options['only'] or options['only'] in spec.name]
+        if not checks:
+            raise CommandError(f'No check matches "{options["only"]}"')
+
+        results = plan_check.run(
+            requests=options['requests'],
+            messages_per_request=options['messages_per_request'],
+            checks=checks,
+            keep_database=options['keepdb'],
+            log=self.stderr.write,
+        )
+        for result in results:
+            self.stdout.write(plan_check.format_result(result, verbose=options['plans']))
+
+        failed = [result['name'] for result in results if not result['ok']]
+        if failed:
+            raise CommandError(f'{len(failed)} of {len(results)} endpoints failed: {", ".join(failed)}')
+        self.stdout.write(self.style.SUCCESS(f'All {len(results)} endpoints use index scans'))
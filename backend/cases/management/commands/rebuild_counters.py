@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from cases import counters
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the per-citizen and per-lawyer case request and message counters with a recount '
+        'and rewrite the rows that have drifted.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true',
+                            help='Only report drift, and exit with an error if there is any')
+        parser.add_argument('--show', type=int, default=10,
+                            help='Drifted rows to list per party')
+
+    def handle(self, *args, **options):
+        drifted = 0
+        for party in counters.PARTIES:
+            drift = counters.find_drift(party)
+            drifted += len(drift)
+            self.stdout.write(f'{party}: {len(drift)} drifted counter rows')
+            for profile_id, fields in drift[:options['show']]:
+                changes = ', '.join(f'{field} {stored} -> {actual}' for field, (stored, actual) in fields.items())
+                self.stdout.write(f'  profile {profile_id}: {changes}')
+
+            if drift and not options['check']:
+                repaired = counters.repair(party)
+                self.stdout.write(f'{party}: rewrote {repaired} rows')
+
+        if drifted and options['check']:
+            raise CommandError(f'{drifted} counter rows have drifted; run rebuild_counters to repair them')
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS('Counters match a recount'))
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.7 on 2026-10-17 20:16
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Built without locking writes out of the tables
+    atomic = False
+
+    dependencies = [
+        ('cases', '0001_initial'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='case',
+            index=models.Index(fields=['citizen', '-filing_date', '-id'], name='case_citizen_filing_date'),
+        ),
+        AddIndexConcurrently(
+            model_name='case',
+            index=models.Index(fields=['lawyer', '-filing_date', '-id'], name='case_lawyer_filing_date'),
+        ),
+        AddIndexConcurrently(
+            model_name='case',
+            index=models.Index(fields=['-filing_date', '-id'], name='case_filing_date'),
+        ),
+        AddIndexConcurrently(
+            model_name='caserequest',
+            index=models.Index(fields=['requester', '-request_date', '-id'], name='case_request_requester_date'),
+        ),
+        AddIndexConcurrently(
+            model_name='caserequest',
+            index=models.Index(fields=['lawyer', '-request_date', '-id'], name='case_request_lawyer_date'),
+        ),
+        AddIndexConcurrently(
+            model_name='caserequest',
+            index=models.Index(fields=['-request_date', '-id'], name='case_request_date'),
+        ),
+        AddIndexConcurrently(
+            model_name='caseupdate',
+            index=models.Index(fields=['case', '-created_at', '-id'], name='case_update_case_created'),
+        ),
+        AddIndexConcurrently(
+            model_name='hearing',
+            index=models.Index(fields=['case', '-hearing_date', '-id'], name='hearing_case_date'),
+        ),
+    ]
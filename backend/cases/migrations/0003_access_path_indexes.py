@@ -0,0 +1,24 @@
+# Generated by Django 5.2.7 on 2026-10-17 20:18
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Built without locking writes out of the tables
+    atomic = False
+
+    dependencies = [
+        ('cases', '0002_keyset_indexes'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='caserequest',
+            index=models.Index(fields=['lawyer', 'status'], name='case_request_lawyer_status'),
+        ),
+        AddIndexConcurrently(
+            model_name='hearing',
+            index=models.Index(fields=['hearing_date'], name='hearing_date'),
+        ),
+    ]
@@ -0,0 +1,193 @@
+# Generated by Django 5.2.7 on 2026-10-17 20:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# (counters table, its key, the case_requests column naming the party, the party's profile table)
+PARTIES = (
+    ('citizen_counters', 'citizen_id', 'requester_id', 'citizen_profiles'),
+    ('lawyer_counters', 'lawyer_id', 'lawyer_id', 'lawyer_profiles'),
+)
+
+STATUSES = ('pending', 'accepted', 'rejected', 'in_progress', 'completed')
+MESSAGE_COUNTS = ('messages_sent', 'messages_received', 'unread_messages')
+
+# Adds what a set of changed rows (each with sign 1 or -1) contributes to each
+# party's counters; parties whose counts do not move are not written, so
+# updates that leave status alone (mark_viewed) take no counter row lock.
+# Rows are written in key order so concurrent statements lock them alike.
+UPSERT_SQL = """
+    INSERT INTO {counters} ({key}, {columns})
+    SELECT * FROM ({deltas}) delta
+    WHERE ({columns}) <> ({zeros})
+    ORDER BY 1
+    ON CONFLICT ({key}) DO UPDATE SET {increments};
+"""
+
+REQUEST_DELTAS_SQL = """
+    SELECT change.{party}, {sums}
+    FROM ({changes}) change
+    GROUP BY change.{party}
+"""
+
+MESSAGE_DELTAS_SQL = """
+    SELECT cr.{party},
+        coalesce(sum(change.sign) FILTER (WHERE change.sender_id = p.user_id), 0) AS messages_sent,
+        coalesce(sum(change.sign) FILTER (WHERE change.sender_id <> p.user_id), 0) AS messages_received,
+        coalesce(sum(change.sign) FILTER (WHERE change.sender_id <> p.user_id AND NOT change.is_read), 0)
+            AS unread_messages
+    FROM ({changes}) change
+    JOIN case_requests cr ON cr.id = change.case_request_id
+    JOIN {profiles} p ON p.id = cr.{party}
+    GROUP BY cr.{party}
+"""
+
+REQUEST_COLUMNS = 'requester_id, lawyer_id, status'
+MESSAGE_COLUMNS = 'case_request_id, sender_id, is_read'
+
+
+def changes(columns, new=None, old=None):
+    """The rows of transition tables new and old, signed +1 and -1"""
+    parts = []
+    if new:
+        parts.append(f'SELECT {columns}, 1 AS sign FROM {new}')
+    if old:
+        parts.append(f'SELECT {columns}, -1 AS sign FROM {old}')
+    return ' UNION ALL '.join(parts)
+
+
+def upserts(columns, deltas, changed):
+    statements = []
+    for counters, key, party, profiles in PARTIES:
+        statements.append(UPSERT_SQL.format(
+            counters=counters,
+            key=key,
+            columns=', '.join(columns),
+            zeros=', '.join('0' for _ in columns),
+            increments=', '.join(f'{column} = {counters}.{column} + EXCLUDED.{column}' for column in columns),
+            deltas=deltas.format(party=party, profiles=profiles, changes=changed, sums=', '.join(
+                f"coalesce(sum(change.sign) FILTER (WHERE change.status = '{status}'), 0) AS {status}" for status in STATUSES
+            )),
+        ))
+    return ''.join(statements)
+
+
+def request_upserts(changed):
+    return upserts(STATUSES, REQUEST_DELTAS_SQL, changed)
+
+
+def message_upserts(changed):
+    return upserts(MESSAGE_COUNTS, MESSAGE_DELTAS_SQL, changed)
+
+
+# Statement-level, so a bulk insert or update is counted with one upsert per
+# counters table rather than one per row
+TRIGGER_SQL = """
+    CREATE FUNCTION {name}_update() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            {inserted}
+        ELSIF TG_OP = 'UPDATE' THEN
+            {updated}
+        ELSE
+            {deleted}
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql;
+
+    CREATE TRIGGER {name}_insert AFTER INSERT ON {table}
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION {name}_update();
+
+    CREATE TRIGGER {name}_update AFTER UPDATE ON {table}
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION {name}_update();
+
+    CREATE TRIGGER {name}_delete AFTER DELETE ON {table}
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION {name}_update();
+"""
+
+DROP_TRIGGER_SQL = """
+    DROP TRIGGER IF EXISTS {name}_insert ON {table};
+    DROP TRIGGER IF EXISTS {name}_update ON {table};
+    DROP TRIGGER IF EXISTS {name}_delete ON {table};
+    DROP FUNCTION IF EXISTS {name}_update();
+"""
+
+
+def trigger_sql(name, table, columns, build):
+    return TRIGGER_SQL.format(
+        name=name,
+        table=table,
+        inserted=build(changes(columns, new='new_rows')),
+        updated=build(changes(columns, new='new_rows', old='old_rows')),
+        deleted=build(changes(columns, old='old_rows')),
+    )
+
+
+CREATE_TRIGGERS_SQL = (
+    trigger_sql('case_request_counters', 'case_requests', REQUEST_COLUMNS, request_upserts)
+    + trigger_sql('message_counters', 'messages', MESSAGE_COLUMNS, message_upserts)
+)
+
+DROP_TRIGGERS_SQL = (
+    DROP_TRIGGER_SQL.format(name='case_request_counters', table='case_requests')
+    + DROP_TRIGGER_SQL.format(name='message_counters', table='messages')
+)
+
+# Count the rows already there as if they had just been inserted; the
+# triggers' lock on both tables keeps writes out until this commits
+BACKFILL_SQL = (
+    request_upserts(changes(REQUEST_COLUMNS, new='case_requests'))
+    + message_upserts(changes(MESSAGE_COLUMNS, new='messages'))
+)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cases', '0004_case_number_counters'),
+        ('messaging', '0003_access_path_indexes'),
+        ('users', '0003_access_path_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CitizenCounters',
+            fields=[
+                ('pending', models.IntegerField(db_default=0, default=0)),
+                ('accepted', models.IntegerField(db_default=0, default=0)),
+                ('rejected', models.IntegerField(db_default=0, default=0)),
+                ('in_progress', models.IntegerField(db_default=0, default=0)),
+                ('completed', models.IntegerField(db_default=0, default=0)),
+                ('messages_sent', models.IntegerField(db_default=0, default=0)),
+                ('messages_received', models.IntegerField(db_default=0, default=0)),
+                ('unread_messages', models.IntegerField(db_default=0, default=0)),
+                ('citizen', models.OneToOneField(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='counters', serialize=False, to='users.citizenprofile')),
+            ],
+            options={
+                'db_table': 'citizen_counters',
+            },
+        ),
+        migrations.CreateModel(
+            name='LawyerCounters',
+            fields=[
+                ('pending', models.IntegerField(db_default=0, default=0)),
+                ('accepted', models.IntegerField(db_default=0, default=0)),
+                ('rejected', models.IntegerField(db_default=0, default=0)),
+                ('in_progress', models.IntegerField(db_default=0, default=0)),
+                ('completed', models.IntegerField(db_default=0, default=0)),
+                ('messages_sent', models.IntegerField(db_default=0, default=0)),
+                ('messages_received', models.IntegerField(db_default=0, default=0)),
+                ('unread_messages', models.IntegerField(db_default=0, default=0)),
+                ('lawyer', models.OneToOneField(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='counters', serialize=False, to='users.lawyerprofile')),
+            ],
+            options={
+                'db_table': 'lawyer_counters',
+            },
+        ),
+        migrations.RunSQL(CREATE_TRIGGERS_SQL, DROP_TRIGGERS_SQL),
+        migrations.RunSQL(BACKFILL_SQL, migrations.RunSQL.noop),
+    ]
@@ -1,7 +1,95 @@
 from django.db import models
+from django.db.models import Count, Exists, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from users.models import User, CitizenProfile, LawyerProfile
+from users.querysets import RoleScopedQuerySet
+from .numbering import next_case_number
 import datetime
 
+
+class CaseRequestQuerySet(RoleScopedQuerySet):
+    citizen_path = 'requester'
+    lawyer_path = 'lawyer'
+
+    def with_serializer_fields(self, user):
+        """
+        Annotate what CaseRequestSerializer derives per row (unread_messages,
+        case_pk, new_updates) and load its nested profiles, so a page of
+        requests takes two queries however many rows it has
+        """
+        from messaging.models import Message
+
+        unread = Message.objects.filter(
+            case_request=OuterRef('pk'), is_read=False
+        ).exclude(sender_id=user.id).order_by().values('case_request').annotate(count=Count('id')).values('count')
+        queryset = self.annotate(
+            unread_messages=Coalesce(Subquery(unread), 0),
+            case_pk=F('case__id'),
+        )
+
+        # Only citizens are notified of new hearings and updates
+        if getattr(user, 'user_type', None) == 'citizen':
+            hearings = Hearing.objects.filter(case__case_request=OuterRef('pk'))
+            updates = CaseUpdate.objects.filter(case__case_request=OuterRef('pk'))
+            since = OuterRef('last_viewed_at')
+            queryset = queryset.annotate(new_updates=models.Case(
+                models.When(last_viewed_at__isnull=True, then=Exists(hearings) | Exists(updates)),
+                default=Exists(hearings.filter(created_at__gt=since)) | Exists(updates.filter(created_at__gt=since)),
+            ))
+
+        return queryset.select_related('requester__user', 'lawyer__user').prefetch_related('lawyer__specialties')
+
+    def transition(self, pk, action, **values):
+        """
+        Take one of these rows through a workflow action (see
+        CaseRequest.TRANSITIONS) in a single statement: an
+        UPDATE ... WHERE id = %s AND status IN (...) RETURNING * that the
+        rest of this queryset then reads in place of the table, so the
+        returned row comes back with the same annotations. Returns it, or
+        None if the row is not in this queryset or not in a status the
+        action can be taken from. Being one statement, two concurrent
+        actions cannot both pass the status check.
+        """
+        sources, target = self.model.TRANSITIONS[action]
+        if target:
+            values['status'] = target
+
+        columns = ', '.join(f'{self.model._meta.get_field(name).column} = %s' for name in values)
+        scope_sql, scope_params = self.filter(pk=pk).order_by().values('pk').query.sql_with_params()
+        # Nested profiles are not loaded from a raw query; they load on access
+        select_sql, select_params = self.select_related(None).prefetch_related(None).query.sql_with_params()
+        table = self.model._meta.db_table
+        rows = list(self.raw(
+            f"""
+            WITH {table} AS (
+                UPDATE {table} SET {columns}
+                WHERE id = %s AND status = ANY(%s) AND id IN ({scope_sql})
+                RETURNING *
+            )
+            {select_sql}
+            """,
+            [*values.values(), pk, list(sources), *scope_params, *select_params]
+        ))
+        return rows[0] if rows else None
+
+
+class CaseQuerySet(RoleScopedQuerySet):
+    citizen_path = 'citizen'
+    lawyer_path = 'lawyer'
+
+    def for_listing(self):
+        """Everything CaseSerializer reads, in a fixed number of queries per page"""
+        return self.select_related('citizen__user', 'lawyer__user').prefetch_related(
+            'lawyer__specialties', 'hearings', 'updates__created_by'
+        )
+
+
+class CaseChildQuerySet(RoleScopedQuerySet):
+    """Hearings and updates, scoped through their case"""
+    citizen_path = 'case__citizen'
+    lawyer_path = 'case__lawyer'
+
+
 class CaseRequest(models.Model):
     STATUS_CHOICES = (
         ('pending', 'Pending'),
@@ -34,9 +122,29 @@ class CaseRequest(models.Model):
     response_date = models.DateTimeField(null=True, blank=True)
     last_viewed_at = models.DateTimeField(null=True, blank=True)
     
+    # Workflow actions: the statuses each can be taken from and the status
+    # it leads to (None leaves the status as it is)
+    TRANSITIONS = {
+        'accept': (('pending',), 'accepted'),
+        'reject': (('pending',), 'rejected'),
+        'start_progress': (('accepted',), 'in_progress'),
+        'complete': (('in_progress',), 'completed'),
+        'mark_viewed': (tuple(value for value, label in STATUS_CHOICES), None),
+    }
+    
+    objects = CaseRequestQuerySet.as_manager()
+    
     class Meta:
         db_table = 'case_requests'
         ordering = ['-request_date']
+        indexes = [
+            # Keyset pages of each party's requests, and of all of them for admins
+            models.Index(fields=['requester', '-request_date', '-id'], name='case_request_requester_date'),
+            models.Index(fields=['lawyer', '-request_date', '-id'], name='case_request_lawyer_date'),
+            models.Index(fields=['-request_date', '-id'], name='case_request_date'),
+            # A lawyer's requests by status (stats, the dashboard's pending list)
+            models.Index(fields=['lawyer', 'status'], name='case_request_lawyer_status'),
+        ]
         # Prevent duplicate requests
         unique_together = [['requester', 'lawyer', 'case_title']]
     
@@ -61,21 +169,95 @@ class Case(models.Model):
     filing_date = models.DateTimeField(auto_now_add=True)
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='active')
     
+    objects = CaseQuerySet.as_manager()
+    
     class Meta:
         db_table = 'cases'
         ordering = ['-filing_date']
+        indexes = [
+            models.Index(fields=['citizen', '-filing_date', '-id'], name='case_citizen_filing_date'),
+            models.Index(fields=['lawyer', '-filing_date', '-id'], name='case_lawyer_filing_date'),
+            models.Index(fields=['-filing_date', '-id'], name='case_filing_date'),
+        ]
     
     def __str__(self):
         return f"{self.title} - {self.case_number}"
     
     def save(self, *args, **kwargs):
         if not self.case_number:
-            import random
-            temp_id = random.randint(1000, 9999)
-            self.case_number = f"QA-{datetime.datetime.now().year}-{temp_id}"
+            self.case_number = next_case_number(datetime.datetime.now().year)
         super().save(*args, **kwargs)
 
 
+class CaseNumberCounter(models.Model):
+    """Last case number serial reserved in each year (see numbering.py)"""
+    year = models.PositiveSmallIntegerField(primary_key=True)
+    last_value = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = 'case_number_counters'
+
+
+class ProfileCounters(models.Model):
+    """
+    A party's case request totals by status and message totals, kept up to
+    date by triggers on case_requests and messages in the transaction of
+    each write (see counters.py)
+    """
+    pending = models.IntegerField(default=0, db_default=0)
+    accepted = models.IntegerField(default=0, db_default=0)
+    rejected = models.IntegerField(default=0, db_default=0)
+    in_progress = models.IntegerField(default=0, db_default=0)
+    completed = models.IntegerField(default=0, db_default=0)
+    messages_sent = models.IntegerField(default=0, db_default=0)
+    messages_received = models.IntegerField(default=0, db_default=0)
+    unread_messages = models.IntegerField(default=0, db_default=0)
+
+    class Meta:
+        abstract = True
+
+    def request_stats(self):
+        return {
+            'total_requests': self.pending + self.accepted + self.rejected + self.in_progress + self.completed,
+            'pending': self.pending,
+            'accepted': self.accepted,
+            'in_progress': self.in_progress,
+            'completed': self.completed,
+            'rejected': self.rejected,
+        }
+
+    def message_stats(self):
+        return {
+            'total_messages': self.messages_sent + self.messages_received,
+            'unread': self.unread_messages,
+            'sent': self.messages_sent,
+            'received': self.messages_received,
+        }
+
+
+# The triggers may write a profile's row while Django is deleting the
+# profile, so there is no foreign key constraint; rebuild_counters removes
+# rows left behind
+
+
+class CitizenCounters(ProfileCounters):
+    citizen = models.OneToOneField(
+        CitizenProfile, on_delete=models.CASCADE, primary_key=True, db_constraint=False, related_name='counters'
+    )
+
+    class Meta:
+        db_table = 'citizen_counters'
+
+
+class LawyerCounters(ProfileCounters):
+    lawyer = models.OneToOneField(
+        LawyerProfile, on_delete=models.CASCADE, primary_key=True, db_constraint=False, related_name='counters'
+    )
+
+    class Meta:
+        db_table = 'lawyer_counters'
+
+
 class CaseUpdate(models.Model):
     """Track case progress updates"""
     case = models.ForeignKey(Case, on_delete=models.CASCADE, related_name='updates')
@@ -84,9 +266,14 @@ class CaseUpdate(models.Model):
     created_by = models.ForeignKey(User, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
     
+    objects = CaseChildQuerySet.as_manager()
+    
     class Meta:
         db_table = 'case_updates'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['case', '-created_at', '-id'], name='case_update_case_created'),
+        ]
     
     def __str__(self):
         return f"{self.case.title} - {self.title}"
@@ -102,9 +289,16 @@ class Hearing(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = CaseChildQuerySet.as_manager()
+    
     class Meta:
         db_table = 'hearings'
         ordering = ['-hearing_date']
+        indexes = [
+            models.Index(fields=['case', '-hearing_date', '-id'], name='hearing_case_date'),
+            # Upcoming hearings across all cases
+            models.Index(fields=['hearing_date'], name='hearing_date'),
+        ]
     
     def __str__(self):
         return f"Hearing for {self.case.title} on {self.hearing_date}"
\ No newline at end of file
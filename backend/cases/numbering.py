@@ -0,0 +1,89 @@
+"""
+Case numbers: QA-<year>-<serial>, with the serial counted from 1 each year.
+
+Serials come from one counter row per year in case_number_counters.
+Reserving from it locks the row until the reserving transaction commits, so
+a process takes a block of BLOCK_SIZE serials at a time and hands them out
+from memory; processes only meet on the row when they run out at the same
+moment. The transaction that reserved a block keeps drawing on it, and
+whatever it leaves is shared with the process's other transactions only once
+it commits: if it rolls back, the counter goes back with it and the block is
+dropped, so a serial can be skipped but is never issued twice.
+
+Serials are zero-padded to six digits, so none can equal one of the random
+four-digit numbers issued before the counter existed.
+"""
+import threading
+from collections import defaultdict, deque
+
+from django.db import connection, transaction
+
+BLOCK_SIZE = 50
+
+# Creates the year's row on its first case; a concurrent first insert waits
+# for the other to commit and then adds to its value instead of failing
+RESERVE_SQL = """
+    INSERT INTO case_number_counters (year, last_value) VALUES (%s, %s)
+    ON CONFLICT (year) DO UPDATE SET last_value = case_number_counters.last_value + EXCLUDED.last_value
+    RETURNING last_value
+"""
+
+
+class CaseNumberAllocator:
+    def __init__(self, block_size=BLOCK_SIZE):
+        self.block_size = block_size
+        self.lock = threading.Lock()
+        # year -> serials of committed blocks not yet handed out
+        self.free = defaultdict(deque)
+        # Per thread, so per connection: year -> (serials, release callback)
+        # of the block reserved by the connection's open transaction
+        self.local = threading.local()
+
+    def reserve(self, year):
+        """Move the year's counter on by a block and return the block's serials"""
+        with connection.cursor() as cursor:
+            cursor.execute(RESERVE_SQL, [year, self.block_size])
+            last_value = cursor.fetchone()[0]
+        return range(last_value - self.block_size + 1, last_value + 1)
+
+    def release(self, year, serials):
+        with self.lock:
+            self.free[year].extend(serials)
+
+    def pending(self, year):
+        """Serials left in the block the current transaction reserved, or None"""
+        pending = getattr(self.local, 'pending', {})
+        serials, release = pending.get(year, (None, None))
+        # The release callback stays queued until the transaction (or the
+        # savepoint that reserved the block) commits or rolls back
+        if serials and any(entry[1] is release for entry in connection.run_on_commit):
+            return serials
+        pending.pop(year, None)
+        return None
+
+    def next_serial(self, year):
+        serials = self.pending(year)
+        if serials:
+            return serials.popleft()
+        with self.lock:
+            if self.free[year]:
+                return self.free[year].popleft()
+
+        block = self.reserve(year)
+        serials = deque(block[1:])
+
+        def release():
+            self.release(year, serials)
+        transaction.on_commit(release)
+        if connection.in_atomic_block:
+            if not hasattr(self.local, 'pending'):
+                self.local.pending = {}
+            self.local.pending[year] = (serials, release)
+        return block[0]
+
+
+allocator = CaseNumberAllocator()
+
+
+def next_case_number(year):
+    return f'QA-{year}-{allocator.next_serial(year):06d}'
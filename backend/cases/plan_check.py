@@ -0,0 +1,370 @@
+"""
+Query plan check for the case, messaging, lawyer and admin dashboard views.
+
+run() seeds a realistic volume of users, lawyers, case requests, cases,
+hearings, updates and messages (a million case requests by default), calls
+every endpoint in cases/views.py, messaging/views.py, users/views.py and
+users/admin_views.py the way the frontend does, and EXPLAINs each query the
+view ran. A query that reads one of the seeded tables with a sequential scan
+fails the check, with two exceptions: a count over a whole table in an
+endpoint marked whole_table (the admin dashboard totals), which has to read
+every row whatever the indexes, and tables that still fit in a few pages at
+the seeded volume (lawyers and their specialty links), which Postgres rightly
+reads in one pass rather than probe an index for each of fifty ids.
+
+It runs in a scratch database (qanoon_assist/scratch.py), never the
+configured one. Seeding a million requests takes a few minutes.
+"""
+import contextlib
+import io
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIClient
+
+from qanoon_assist.scratch import scratch_database
+from users.models import LawyerProfile, LawyerSpecialty, User
+from .models import Case, CaseRequest
+
+# Tables the seed fills; a sequential scan of any of them that is larger
+# than SMALL_TABLE_PAGES fails the check
+SEEDED_TABLES = {
+    'users', 'citizen_profiles', 'lawyer_profiles', 'lawyer_specialty_link',
+    'case_requests', 'cases', 'hearings', 'case_updates', 'messages',
+    'citizen_counters', 'lawyer_counters',
+}
+
+# 1 MB of 8 kB pages
+SMALL_TABLE_PAGES = 128
+
+# Statements with no scan to check
+UNPLANNED_PREFIXES = ('SAVEPOINT', 'RELEASE', 'ROLLBACK', 'INSERT', 'SET', 'LOCK')
+
+CITIES = ('Karachi', 'Lahore', 'Islamabad', 'Peshawar', 'Quetta', 'Multan', 'Faisalabad', 'Rawalpindi')
+
+SPECIALTIES = 8
+
+# Deterministic, so every run seeds the same rows
+SEED_SQL = [
+    """
+    INSERT INTO users (password, is_superuser, username, first_name, last_name, email, is_staff, is_active,
+                       date_joined, user_type, phone_number, created_at, updated_at)
+    SELECT '!', FALSE, 'plan-' || kind || '-' || g, initcap(kind), g::text, '', FALSE, TRUE,
+           now(), kind, '', now(), now()
+    FROM (VALUES ('citizen', %(citizens)s), ('lawyer', %(lawyers)s), ('admin', 1)) AS kinds(kind, total)
+    CROSS JOIN LATERAL generate_series(1, total) AS g
+    """,
+    """
+    INSERT INTO citizen_profiles (user_id, address, city, cnic)
+    SELECT id, '', 'Lahore', 'P' || id FROM users WHERE starts_with(username, 'plan-citizen-')
+    """,
+    """
+    INSERT INTO lawyer_profiles (user_id, bar_council_number, experience_years, consultation_fee, is_verified,
+                                 bio, city, cnic, address, profile_picture, verification_date, verified_by_id)
+    SELECT id, 'PLAN-' || id, 1 + mod(id, 30), 1000 + mod(id, 50) * 100, mod(id, 10) <> 0,
+           '', (%(cities)s::varchar[])[1 + mod(id, cardinality(%(cities)s::varchar[]))], NULL, NULL, NULL, NULL, NULL
+    FROM users WHERE starts_with(username, 'plan-lawyer-')
+    """,
+    """
+    CREATE TEMP TABLE plan_citizens ON COMMIT DROP AS
+    SELECT row_number() OVER (ORDER BY profile.id) - 1 AS n, profile.id, profile.user_id
+    FROM citizen_profiles profile JOIN users ON users.id = profile.user_id
+    WHERE starts_with(users.username, 'plan-citizen-');
+    ALTER TABLE plan_citizens ADD PRIMARY KEY (n);
+    CREATE INDEX ON plan_citizens (id);
+
+    CREATE TEMP TABLE plan_lawyers ON COMMIT DROP AS
+    SELECT row_number() OVER (ORDER BY profile.id) - 1 AS n, profile.id, profile.user_id
+    FROM lawyer_profiles profile JOIN users ON users.id = profile.user_id
+    WHERE starts_with(users.username, 'plan-lawyer-');
+    ALTER TABLE plan_lawyers ADD PRIMARY KEY (n);
+    CREATE INDEX ON plan_lawyers (id);
+    """,
+    """
+    INSERT INTO lawyer_specialties (name, description, created_at)
+    SELECT 'Plan specialty ' || g, '', now() FROM generate_series(1, %(specialties)s) AS g
+    """,
+    """
+    WITH specialty AS (
+        SELECT id, row_number() OVER (ORDER BY id) - 1 AS n
+        FROM lawyer_specialties WHERE starts_with(name, 'Plan specialty ')
+    )
+    INSERT INTO lawyer_specialty_link (lawyer_id, specialty_id)
+    SELECT lawyer.id, specialty.id
+    FROM plan_lawyers lawyer
+    JOIN specialty ON specialty.n IN (mod(lawyer.n, %(specialties)s), mod(lawyer.n * 3 + 1, %(specialties)s))
+    """,
+    # Mostly settled requests, as on a long-running site; request_date grows with id.
+    # Citizen, lawyer and status come from independent multiplicative hashes of the row number
+    """
+    INSERT INTO case_requests (requester_id, lawyer_id, case_title, case_type, description, urgency, status,
+                               request_date, response_message, response_date, last_viewed_at)
+    SELECT citizen.id, lawyer.id, 'Plan case ' || g, 'Civil', 'Plan case description', 'medium',
+           CASE WHEN mod(status_hash, 20) = 0 THEN 'pending'
+                WHEN mod(status_hash, 20) IN (1, 2) THEN 'accepted'
+                WHEN mod(status_hash, 20) IN (3, 4) THEN 'rejected'
+                WHEN mod(status_hash, 20) IN (5, 6, 7) THEN 'in_progress'
+                ELSE 'completed' END,
+           now() - (%(requests)s - g)::float8 / %(requests)s * interval '3 years', '', NULL, NULL
+    FROM (
+        SELECT g,
+               mod(g::bigint * 2654435761, 4294967296) / 256 AS citizen_hash,
+               mod(g::bigint * 2246822519, 4294967296) / 256 AS lawyer_hash,
+               mod(g::bigint * 3266489917, 4294967296) / 256 AS status_hash
+        FROM generate_series(1, %(requests)s) AS g
+    ) AS row
+    JOIN plan_citizens citizen ON citizen.n = mod(citizen_hash, %(citizens)s)
+    JOIN plan_lawyers lawyer ON lawyer.n = mod(lawyer_hash, %(lawyers)s)
+    """,
+    """
+    CREATE TEMP TABLE plan_requests ON COMMIT DROP AS
+    SELECT id, requester_id, lawyer_id, status, request_date
+    FROM case_requests WHERE starts_with(case_title, 'Plan case ')
+    """,
+    """
+    INSERT INTO cases (citizen_id, lawyer_id, case_request_id, title, description, case_number, filing_date, status)
+    SELECT requester_id, lawyer_id, id, 'Plan case', '', 'PLAN-' || id, request_date + interval '1 day',
+           CASE WHEN status = 'completed' THEN 'closed' ELSE 'active' END
+    FROM plan_requests WHERE status IN ('in_progress', 'completed')
+    """,
+    """
+    INSERT INTO hearings (case_id, title, hearing_date, location, notes, next_date, created_at, updated_at)
+    SELECT id, 'Court Hearing', filing_date + mod(id, 400) * interval '1 day', 'Court', '', NULL, filing_date, filing_date
+    FROM cases WHERE starts_with(case_number, 'PLAN-')
+    """,
+    """
+    INSERT INTO case_updates (case_id, title, description, created_by_id, created_at)
+    SELECT cases.id, 'Filed', '', lawyer.user_id, cases.filing_date
+    FROM cases JOIN plan_lawyers lawyer ON lawyer.id = cases.lawyer_id
+    WHERE starts_with(cases.case_number, 'PLAN-')
+    """,
+    # Parties take turns; the last message of one request in ten is unread
+    """
+    INSERT INTO messages (case_request_id, sender_id, content, attachment, timestamp, is_read)
+    SELECT request.id, CASE WHEN mod(k, 2) = 1 THEN citizen.user_id ELSE lawyer.user_id END,
+           'Plan message', NULL, request.request_date + k * interval '1 hour',
+           NOT (k = %(messages_per_request)s AND mod(request.id, 10) = 0)
+    FROM plan_requests request
+    JOIN plan_citizens citizen ON citizen.id = request.requester_id
+    JOIN plan_lawyers lawyer ON lawyer.id = request.lawyer_id
+    CROSS JOIN generate_series(1, %(messages_per_request)s) AS k
+    """,
+    'ANALYZE users, citizen_profiles, lawyer_profiles, lawyer_specialties, lawyer_specialty_link, '
+    'case_requests, cases, hearings, case_updates, messages',
+]
+
+# One endpoint call: path may hold {placeholders} filled from the actors dict
+Check = namedtuple('Check', 'name method path actor data whole_table pages')
+
+
+def endpoint(name, path, actor=None, method='get', data=None, whole_table=False, pages=1):
+    return Check(name, method, path, actor, data, whole_table, pages)
+
+
+CHECKS = [
+    # cases/views.py
+    endpoint('case requests: citizen list', '/api/case-requests/', 'citizen', pages=2),
+    endpoint('case requests: lawyer list', '/api/case-requests/', 'lawyer', pages=2),
+    endpoint('case requests: admin list', '/api/case-requests/', 'admin', pages=2),
+    endpoint('case requests: retrieve', '/api/case-requests/{pending}/', 'lawyer'),
+    endpoint('case requests: lawyer stats', '/api/case-requests/stats/', 'lawyer'),
+    endpoint('case requests: citizen stats', '/api/case-requests/stats/', 'citizen'),
+    endpoint('case requests: accept', '/api/case-requests/{pending}/accept/', 'lawyer', 'post', {'message': 'OK'}),
+    endpoint('case requests: reject', '/api/case-requests/{other_pending}/reject/', 'lawyer', 'post', {'message': 'No'}),
+    endpoint('case requests: start_progress', '/api/case-requests/{accepted}/start_progress/', 'lawyer', 'post'),
+    endpoint('case requests: complete', '/api/case-requests/{in_progress}/complete/', 'lawyer', 'post'),
+    endpoint('case requests: mark_viewed', '/api/case-requests/{citizen_request}/mark_viewed/', 'citizen', 'post'),
+    endpoint('cases: citizen list', '/api/cases/', 'citizen', pages=2),
+    endpoint('cases: lawyer list', '/api/cases/', 'lawyer', pages=2),
+    endpoint('cases: admin list', '/api/cases/', 'admin', pages=2),
+    endpoint('cases: retrieve', '/api/cases/{case}/', 'citizen'),
+    endpoint('hearings: lawyer list', '/api/hearings/', 'lawyer', pages=2),
+    endpoint('hearings: case filter', '/api/hearings/?case={case}', 'citizen', pages=2),
+    endpoint('case updates: citizen list', '/api/case-updates/', 'citizen', pages=2),
+    endpoint('case updates: case filter', '/api/case-updates/?case={case}', 'citizen', pages=2),
+    # messaging/views.py
+    endpoint('messages: citizen list', '/api/messages/', 'citizen', pages=2),
+    endpoint('messages: lawyer list', '/api/messages/', 'lawyer', pages=2),
+    endpoint('messages: admin list', '/api/messages/', 'admin', pages=2),
+    endpoint('messages: by_case', '/api/messages/by_case/?case_request_id={citizen_request}', 'citizen'),
+    endpoint('messages: send', '/api/messages/', 'citizen', 'post', {'case_request': '{citizen_request}', 'content': 'Hello'}),
+    endpoint('messages: citizen unread_count', '/api/messages/unread_count/', 'citizen'),
+    endpoint('messages: lawyer unread_count', '/api/messages/unread_count/', 'lawyer'),
+    endpoint('messages: citizen stats', '/api/messages/stats/', 'citizen'),
+    endpoint('messages: lawyer stats', '/api/messages/stats/', 'lawyer'),
+    # users/views.py
+    endpoint('lawyers: list', '/api/lawyers/', pages=2),
+    endpoint('lawyers: city filter', '/api/lawyers/?city=lahore', pages=2),
+    endpoint('lawyers: specialty filter', '/api/lawyers/?specialty={specialty}', pages=2),
+    endpoint('lawyers: retrieve', '/api/lawyers/{verified_lawyer}/'),
+    endpoint('lawyers: stats', '/api/lawyers/stats/', whole_table=True),
+    endpoint('lawyers: unverified', '/api/lawyers/unverified/', 'admin'),
+    endpoint('lawyers: verify', '/api/lawyers/{unverified_lawyer}/verify/', 'admin', 'post'),
+    endpoint('lawyers: reject', '/api/lawyers/{rejected_lawyer}/reject/', 'admin', 'post', {'reason': 'Plan check'}),
+    # users/admin_views.py
+    endpoint('admin dashboard: totals', '/api/admin/dashboard/', 'admin', whole_table=True),
+    endpoint('admin dashboard: pending_lawyers', '/api/admin/dashboard/pending_lawyers/', 'admin'),
+    endpoint('admin dashboard: recent_activity', '/api/admin/dashboard/recent_activity/', 'admin'),
+]
+
+
+def seed(requests, messages_per_request=3, log=None):
+    """Insert the synthetic rows; returns the number of case requests written"""
+    params = {
+        'requests': requests,
+        'citizens': max(requests // 20, 10),
+        'lawyers': max(requests // 200, 10),
+        'specialties': SPECIALTIES,
+        'messages_per_request': messages_per_request,
+        'cities': list(CITIES),
+    }
+    with connection.cursor() as cursor:
+        for sql in SEED_SQL:
+            started = time.perf_counter()
+            cursor.execute(sql, params)
+            if log:
+                log(f'{" ".join(sql.split())[:70]}... {time.perf_counter() - started:.1f}s')
+    return requests
+
+
+def actors():
+    """Users to call the endpoints as, and ids to put in their paths"""
+    lawyer = LawyerProfile.objects.filter(user__username='plan-lawyer-1').select_related('user').get()
+    citizen = User.objects.get(username='plan-citizen-1')
+    lawyer_requests = CaseRequest.objects.filter(lawyer=lawyer).order_by('-request_date')
+    pending = list(lawyer_requests.filter(status='pending').values_list('id', flat=True)[:2])
+    plan_lawyers = LawyerProfile.objects.filter(user__username__startswith='plan-lawyer-')
+    unverified = list(plan_lawyers.unverified().order_by('id').values_list('id', flat=True)[:2])
+    return {
+        'users': {
+            'citizen': citizen,
+            'lawyer': lawyer.user,
+            'admin': User.objects.get(username='plan-admin-1'),
+        },
+        'ids': {
+            'pending': pending[0],
+            'other_pending': pending[1],
+            'accepted': lawyer_requests.filter(status='accepted').values_list('id', flat=True)[0],
+            'in_progress': lawyer_requests.filter(status='in_progress').values_list('id', flat=True)[0],
+            'citizen_request': CaseRequest.objects.for_user(citizen).values_list('id', flat=True)[0],
+            'case': Case.objects.for_user(citizen).values_list('id', flat=True)[0],
+            'specialty': LawyerSpecialty.objects.filter(name='Plan specialty 1').values_list('id', flat=True)[0],
+            'verified_lawyer': plan_lawyers.verified().order_by('id').values_list('id', flat=True)[0],
+            'unverified_lawyer': unverified[0],
+            'rejected_lawyer': unverified[1],
+        },
+    }
+
+
+def large_tables():
+    """Seeded tables too big to be read whole on every request"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT relname FROM pg_class WHERE relname = ANY(%s) AND relpages > %s',
+            [sorted(SEEDED_TABLES), SMALL_TABLE_PAGES]
+        )
+        return {name for name, in cursor.fetchall()}
+
+
+def explain(sql):
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN (FORMAT JSON) ' + sql)
+        return cursor.fetchone()[0][0]['Plan']
+
+
+def scans(plan, parent=None):
+    """(node, parent node) for every node of a plan that reads a table"""
+    if 'Relation Name' in plan:
+        yield plan, parent
+    for child in plan.get('Plans', ()):
+        yield from scans(child, plan)
+
+
+def plan_problems(plan, tables, whole_table=False):
+    """Descriptions of the sequential scans of any of tables in a plan"""
+    problems = []
+    for node, parent in scans(plan):
+        if node['Node Type'] != 'Seq Scan' or node['Relation Name'] not in tables:
+            continue
+        if whole_table and parent is not None and parent['Node Type'] == 'Aggregate':
+            continue
+        condition = node.get('Filter')
+        problems.append(f'Seq Scan on {node["Relation Name"]}' + (f' (filter {condition})' if condition else ''))
+    return problems
+
+
+def check_endpoint(client, spec, ids, tables):
+    """Call one endpoint (following its cursor for further pages) and check every query it ran"""
+    path = spec.path.format(**ids)
+    data = {key: value.format(**ids) if isinstance(value, str) else value for key, value in (spec.data or {}).items()}
+    result = {'name': spec.name, 'path': path, 'status': [], 'queries': [], 'seconds': 0.0}
+
+    for _ in range(spec.pages):
+        started = time.perf_counter()
+        # The views print debugging output
+        with CaptureQueriesContext(connection) as captured, contextlib.redirect_stdout(io.StringIO()):
+            response = getattr(client, spec.method)(path, data, format='json') if data else getattr(client, spec.method)(path)
+        result['seconds'] += time.perf_counter() - started
+        result['status'].append(response.status_code)
+
+        for query in captured.captured_queries:
+            sql = query['sql']
+            if sql.lstrip().upper().startswith(UNPLANNED_PREFIXES):
+                continue
+            plan = explain(sql)
+            result['queries'].append({
+                'sql': sql,
+                'scans': [f'{node["Node Type"]} on {node["Relation Name"]}' for node, _ in scans(plan)],
+                'problems': plan_problems(plan, tables, spec.whole_table),
+            })
+
+        body = response.json() if response.get('Content-Type', '').startswith('application/json') else None
+        path = body.get('next') if isinstance(body, dict) else None
+        if not path:
+            break
+
+    result['ok'] = all(status < 500 for status in result['status']) and not any(
+        query['problems'] for query in result['queries']
+    )
+    return result
+
+
+def run(requests=1000000, messages_per_request=3, checks=None, keep_database=False, log=None):
+    """Seed a scratch database and check every endpoint; returns a list of results, one per check"""
+    results = []
+    # APIClient requests come from the host "testserver"; the seed's temporary tables last until commit
+    with scratch_database(keep=keep_database, log=log), transaction.atomic(), \
+            override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+        started = time.perf_counter()
+        seed(requests, messages_per_request, log=log)
+        if log:
+            log(f'Seeded {requests} case requests in {time.perf_counter() - started:.0f}s')
+
+        people = actors()
+        tables = large_tables()
+        if log:
+            log(f'Small enough to scan whole: {", ".join(sorted(SEEDED_TABLES - tables)) or "none"}')
+        for spec in checks or CHECKS:
+            client = APIClient()
+            if spec.actor:
+                client.force_authenticate(people['users'][spec.actor])
+            results.append(check_endpoint(client, spec, people['ids'], tables))
+
+        # Leave a kept scratch database empty for the next run
+        transaction.set_rollback(True)
+    return results
+
+
+def format_result(result, verbose=False):
+    lines = [
+        f'{"ok  " if result["ok"] else "FAIL"} {result["name"]}: {len(result["queries"])} queries, '
+        f'{result["seconds"] * 1000:.0f} ms, HTTP {"/".join(map(str, result["status"]))}'
+    ]
+    for query in result['queries']:
+        if query['problems'] or verbose:
+            lines.append('       ' + (', '.join(query['problems']) or ', '.join(query['scans']) or 'no table scans'))
+            lines.append('       ' + ' '.join(query['sql'].split())[:300])
+    return '\n'.join(lines)
@@ -28,6 +28,10 @@ class CaseRequestSerializer(serializers.ModelSerializer):
         if not request or not request.user:
             return 0
         
+        # Annotated by CaseRequestQuerySet.with_serializer_fields
+        if hasattr(obj, 'unread_messages'):
+            return obj.unread_messages
+        
         from messaging.models import Message
         
         # Count messages NOT sent by current user and not read
@@ -38,54 +42,30 @@ class CaseRequestSerializer(serializers.ModelSerializer):
     
     def get_case_id(self, obj):
         """Get the Case ID if it exists"""
-        try:
-            case = Case.objects.filter(case_request=obj).first()
-            return case.id if case else None
-        except:
-            return None
+        if hasattr(obj, 'case_pk'):
+            return obj.case_pk
+        return Case.objects.filter(case_request=obj).values_list('id', flat=True).first()
         
     def get_has_new_updates(self, obj):
-            """Check if there are new hearings or case updates since last viewed"""
-            request = self.context.get('request')
-            if not request or not request.user:
-                return False
-            
-            # Only show notifications for citizens
-            if request.user.user_type != 'citizen':
-                return False
-            
-            # If never viewed, show notification
-            if not obj.last_viewed_at:
-                # Check if there are any hearings or updates
-                try:
-                    case = Case.objects.filter(case_request=obj).first()
-                    if case:
-                        has_hearings = Hearing.objects.filter(case=case).exists()
-                        has_updates = CaseUpdate.objects.filter(case=case).exists()
-                        return has_hearings or has_updates
-                except:
-                    pass
-                return False
-            
-            # Check for hearings/updates created after last view
-            try:
-                case = Case.objects.filter(case_request=obj).first()
-                if case:
-                    new_hearings = Hearing.objects.filter(
-                        case=case,
-                        created_at__gt=obj.last_viewed_at
-                    ).exists()
-                    
-                    new_updates = CaseUpdate.objects.filter(
-                        case=case,
-                        created_at__gt=obj.last_viewed_at
-                    ).exists()
-                    
-                    return new_hearings or new_updates
-            except:
-                pass
-            
+        """Check if there are new hearings or case updates since last viewed"""
+        request = self.context.get('request')
+        if not request or not request.user:
             return False
+        
+        # Only show notifications for citizens
+        if request.user.user_type != 'citizen':
+            return False
+        
+        if hasattr(obj, 'new_updates'):
+            return obj.new_updates
+        
+        hearings = Hearing.objects.filter(case__case_request=obj)
+        updates = CaseUpdate.objects.filter(case__case_request=obj)
+        # If never viewed, any hearing or update is new
+        if obj.last_viewed_at:
+            hearings = hearings.filter(created_at__gt=obj.last_viewed_at)
+            updates = updates.filter(created_at__gt=obj.last_viewed_at)
+        return hearings.exists() or updates.exists()
     
     def create(self, validated_data):
         # Get the citizen profile from the logged-in user
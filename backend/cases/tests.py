@@ -1,3 +1,425 @@
-from django.test import TestCase
+import threading
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import AnonymousUser
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from users.models import CitizenProfile, LawyerProfile, User
+from . import numbering
+from .models import Case, CaseNumberCounter, CaseRequest, CaseUpdate, Hearing, LawyerCounters
+
+
+def make_citizen(username, cnic):
+    user = User.objects.create_user(username=username, password='x', user_type='citizen')
+    CitizenProfile.objects.create(user=user, cnic=cnic)
+    return user
+
+
+def make_lawyer(username, bar_council_number):
+    user = User.objects.create_user(username=username, password='x', user_type='lawyer')
+    LawyerProfile.objects.create(
+        user=user, bar_council_number=bar_council_number, experience_years=5,
+        consultation_fee=1000, city='Lahore', is_verified=True
+    )
+    return user
+
+
+class ForUserTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.citizen = make_citizen('citizen', '35202-0000001-1')
+        cls.other_citizen = make_citizen('other', '35202-0000002-2')
+        cls.lawyer = make_lawyer('lawyer', 'BC-1')
+        cls.admin = User.objects.create_user(username='admin', password='x', user_type='admin')
+
+        cls.own_request = CaseRequest.objects.create(
+            requester=cls.citizen.citizen_profile, lawyer=cls.lawyer.lawyer_profile,
+            case_title='Own', case_type='Civil', description='...'
+        )
+        cls.other_request = CaseRequest.objects.create(
+            requester=cls.other_citizen.citizen_profile, lawyer=cls.lawyer.lawyer_profile,
+            case_title='Other', case_type='Civil', description='...'
+        )
+        cls.own_case = Case.objects.create(
+            citizen=cls.citizen.citizen_profile, lawyer=cls.lawyer.lawyer_profile,
+            case_request=cls.own_request, title='Own', description='...'
+        )
+        cls.other_case = Case.objects.create(
+            citizen=cls.other_citizen.citizen_profile, lawyer=cls.lawyer.lawyer_profile,
+            case_request=cls.other_request, title='Other', description='...'
+        )
+        cls.own_hearing = Hearing.objects.create(case=cls.own_case, hearing_date='2026-01-01T10:00Z', location='Court')
+        Hearing.objects.create(case=cls.other_case, hearing_date='2026-01-01T10:00Z', location='Court')
+        cls.own_update = CaseUpdate.objects.create(case=cls.own_case, title='Filed', description='...', created_by=cls.lawyer)
+
+    def scoped(self, model, user):
+        # Fresh users, so no profile is cached on them
+        user = User.objects.get(id=user.id)
+        with self.assertNumQueries(1):
+            return set(model.objects.for_user(user).values_list('id', flat=True))
+
+    def test_citizen_sees_own_rows(self):
+        self.assertEqual(self.scoped(CaseRequest, self.citizen), {self.own_request.id})
+        self.assertEqual(self.scoped(Case, self.citizen), {self.own_case.id})
+        self.assertEqual(self.scoped(Hearing, self.citizen), {self.own_hearing.id})
+        self.assertEqual(self.scoped(CaseUpdate, self.citizen), {self.own_update.id})
+
+    def test_lawyer_sees_received_rows(self):
+        self.assertEqual(self.scoped(CaseRequest, self.lawyer), {self.own_request.id, self.other_request.id})
+        self.assertEqual(self.scoped(Case, self.lawyer), {self.own_case.id, self.other_case.id})
+
+    def test_admin_sees_everything(self):
+        self.assertEqual(self.scoped(CaseRequest, self.admin), set(CaseRequest.objects.values_list('id', flat=True)))
+        self.assertEqual(self.scoped(Hearing, self.admin), set(Hearing.objects.values_list('id', flat=True)))
+
+    def test_anonymous_sees_nothing(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(list(CaseRequest.objects.for_user(AnonymousUser())), [])
+
+    def test_citizen_without_profile_sees_nothing(self):
+        user = make_lawyer('lawyer2', 'BC-2')
+        user.user_type = 'citizen'
+        self.assertEqual(self.scoped(CaseRequest, user), set())
+
+    def test_hearings_and_updates_filter_by_case(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.get(id=self.lawyer.id))
+        response = client.get('/api/hearings/', {'case': self.own_case.id})
+        self.assertEqual([row['id'] for row in response.json()['results']], [self.own_hearing.id])
+        response = client.get('/api/case-updates/', {'case': self.other_case.id})
+        self.assertEqual(response.json()['results'], [])
+        self.assertEqual(client.get('/api/hearings/', {'case': 'own'}).status_code, 400)
+
+    def test_viewset_queryset_adds_only_the_specialties_prefetch(self):
+        from types import SimpleNamespace
+        from .views import CaseRequestViewSet
+
+        view = CaseRequestViewSet(request=SimpleNamespace(user=User.objects.get(id=self.citizen.id)))
+        # The scoped rows, then the nested lawyers' specialties
+        with self.assertNumQueries(2):
+            requests = list(view.get_queryset())
+        self.assertEqual([case_request.id for case_request in requests], [self.own_request.id])
+        with self.assertNumQueries(0):
+            self.assertEqual(requests[0].lawyer.user.username, 'lawyer')
+
+
+class CaseRequestListQueryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        from messaging.models import Message
+        from users.models import LawyerSpecialty
+
+        cls.citizen = make_citizen('citizen', '35202-0000001-1')
+        cls.lawyer = make_lawyer('lawyer', 'BC-1')
+        cls.lawyer.lawyer_profile.specialties.set([LawyerSpecialty.objects.create(name='Civil')])
+
+        cls.viewed = CaseRequest.objects.create(
+            requester=cls.citizen.citizen_profile, lawyer=cls.lawyer.lawyer_profile,
+            case_title='Viewed', case_type='Civil', description='...'
+        )
+        case = Case.objects.create(
+            citizen=cls.citizen.citizen_profile, lawyer=cls.lawyer.lawyer_profile,
+            case_request=cls.viewed, title='Viewed', description='...'
+        )
+        Hearing.objects.create(case=case, hearing_date='2026-01-01T10:00Z', location='Court')
+        Message.objects.create(case_request=cls.viewed, sender=cls.lawyer, content='Please call')
+        Message.objects.create(case_request=cls.viewed, sender=cls.citizen, content='Will do')
+        cls.viewed.last_viewed_at = timezone.now()
+        cls.viewed.save()
+        cls.case_id = case.id
+
+    def add_requests(self, count):
+        start = CaseRequest.objects.count()
+        for number in range(start, start + count):
+            case_request = CaseRequest.objects.create(
+                requester=self.citizen.citizen_profile, lawyer=self.lawyer.lawyer_profile,
+                case_title=f'Request {number}', case_type='Civil', description='...'
+            )
+            case = Case.objects.create(
+                citizen=self.citizen.citizen_profile, lawyer=self.lawyer.lawyer_profile,
+                case_request=case_request, title=case_request.case_title, description='...'
+            )
+            CaseUpdate.objects.create(case=case, title='Filed', description='...', created_by=self.lawyer)
+
+    def list_requests(self, user):
+        client = APIClient()
+        client.force_authenticate(User.objects.get(id=user.id))
+        with self.assertNumQueries(2):
+            response = client.get('/api/case-requests/')
+        self.assertEqual(response.status_code, 200)
+        return {row['case_title']: row for row in response.json()['results']}
+
+    def test_query_count_does_not_grow_with_rows(self):
+        for count in (1, 10):
+            self.add_requests(count)
+            self.assertEqual(len(self.list_requests(self.lawyer)), CaseRequest.objects.count())
+            self.assertEqual(len(self.list_requests(self.citizen)), CaseRequest.objects.count())
+
+    def test_derived_fields(self):
+        self.add_requests(1)
+        rows = self.list_requests(self.citizen)
+        self.assertEqual(rows['Viewed']['unread_messages_count'], 1)
+        self.assertEqual(rows['Viewed']['case_id'], self.case_id)
+        self.assertFalse(rows['Viewed']['has_new_updates'])
+        self.assertEqual(rows['Viewed']['lawyer_details']['specialties'][0]['name'], 'Civil')
+        # Never viewed, with an update
+        self.assertTrue(rows['Request 1']['has_new_updates'])
+
+        Hearing.objects.create(case_id=self.case_id, hearing_date='2026-02-01T10:00Z', location='Court')
+        self.assertTrue(self.list_requests(self.citizen)['Viewed']['has_new_updates'])
+
+        rows = self.list_requests(self.lawyer)
+        self.assertEqual(rows['Viewed']['unread_messages_count'], 1)
+        self.assertFalse(rows['Request 1']['has_new_updates'])
+
+    def test_serializer_without_annotations_matches(self):
+        from types import SimpleNamespace
+        from .serializers import CaseRequestSerializer
+
+        self.add_requests(1)
+        context = {'request': SimpleNamespace(user=self.citizen)}
+        plain = CaseRequestSerializer(CaseRequest.objects.order_by('id'), many=True, context=context).data
+        batched = CaseRequestSerializer(
+            CaseRequest.objects.with_serializer_fields(self.citizen).order_by('id'), many=True, context=context
+        ).data
+        fields = ('unread_messages_count', 'case_id', 'has_new_updates')
+        self.assertEqual(
+            [[row[field] for field in fields] for row in plain],
+            [[row[field] for field in fields] for row in batched],
+        )
+
+    def test_pages_are_bounded(self):
+        self.add_requests(5)
+        client = APIClient()
+        client.force_authenticate(User.objects.get(id=self.lawyer.id))
+        first = client.get('/api/case-requests/?page_size=4').json()
+        self.assertEqual(len(first['results']), 4)
+        second = client.get(first['next']).json()
+        titles = [row['case_title'] for row in first['results'] + second['results']]
+        self.assertEqual(len(titles), 6)
+        self.assertEqual(titles, [row.case_title for row in CaseRequest.objects.order_by('-request_date', '-id')])
+        self.assertIsNone(second['next'])
+
+
+class TransitionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.citizen = make_citizen('citizen', '35202-0000001-1')
+        cls.lawyer = make_lawyer('lawyer', 'BC-1')
+        cls.other_lawyer = make_lawyer('other', 'BC-2')
+
+    def setUp(self):
+        self.case_request = CaseRequest.objects.create(
+            requester=self.citizen.citizen_profile, lawyer=self.lawyer.lawyer_profile,
+            case_title='Tenancy', case_type='Civil', description='...'
+        )
+
+    def post(self, user, action, data=None):
+        client = APIClient()
+        client.force_authenticate(User.objects.get(id=user.id))
+        return client.post(f'/api/case-requests/{self.case_request.id}/{action}/', data or {}, format='json')
+
+    def test_transition_is_one_statement(self):
+        with CaptureQueriesContext(connection) as captured:
+            response = self.post(self.lawyer, 'accept', {'message': 'Will do'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['data']['status'], 'accepted')
+        self.assertEqual(response.json()['data']['response_message'], 'Will do')
+        writes = [query['sql'] for query in captured.captured_queries if 'UPDATE' in query['sql']]
+        self.assertEqual(len(writes), 1)
+        self.assertIn('RETURNING', writes[0])
+
+    def test_illegal_transition_changes_nothing(self):
+        response = self.post(self.lawyer, 'complete')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], 'Cannot complete a case request that is pending')
+        self.case_request.refresh_from_db()
+        self.assertEqual(self.case_request.status, 'pending')
+
+    def test_unknown_pk_is_not_found(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.get(id=self.lawyer.id))
+        self.assertEqual(client.post('/api/case-requests/abc/accept/', {}, format='json').status_code, 404)
+        self.assertEqual(client.post('/api/case-requests/0/accept/', {}, format='json').status_code, 404)
+
+    def test_second_accept_is_rejected(self):
+        self.assertEqual(self.post(self.lawyer, 'accept').status_code, 200)
+        self.assertEqual(self.post(self.lawyer, 'reject').status_code, 400)
+        self.case_request.refresh_from_db()
+        self.assertEqual(self.case_request.status, 'accepted')
+
+    def test_other_lawyer_cannot_see_the_request(self):
+        self.assertEqual(self.post(self.other_lawyer, 'accept').status_code, 404)
+
+    def test_start_progress_opens_the_case(self):
+        self.post(self.lawyer, 'accept')
+        response = self.post(self.lawyer, 'start_progress')
+        self.assertEqual(response.status_code, 200)
+        case = Case.objects.get(case_request=self.case_request)
+        self.assertEqual(response.json()['data']['case_id'], case.id)
+        self.assertEqual((case.citizen_id, case.lawyer_id), (self.case_request.requester_id, self.case_request.lawyer_id))
+        self.assertEqual(self.post(self.lawyer, 'complete').json()['data']['status'], 'completed')
+
+    def test_failed_case_creation_rolls_back_the_transition(self):
+        self.post(self.lawyer, 'accept')
+        with mock.patch.object(Case.objects, 'get_or_create', side_effect=ZeroDivisionError):
+            with self.assertRaises(ZeroDivisionError):
+                self.post(self.lawyer, 'start_progress')
+        self.case_request.refresh_from_db()
+        self.assertEqual(self.case_request.status, 'accepted')
+
+    def test_mark_viewed(self):
+        response = self.post(self.citizen, 'mark_viewed')
+        self.assertEqual(response.status_code, 200)
+        self.case_request.refresh_from_db()
+        self.assertIsNotNone(self.case_request.last_viewed_at)
+        self.assertEqual(self.post(self.lawyer, 'mark_viewed').status_code, 403)
+
+
+class CaseNumberTests(TransactionTestCase):
+    # Real commits, so blocks are kept and threads contend on the counter row
+    THREADS = 8
+    CASES_PER_THREAD = 250
+
+    def setUp(self):
+        self.citizen = make_citizen('citizen', '35202-0000001-1').citizen_profile
+        self.lawyer = make_lawyer('lawyer', 'BC-1').lawyer_profile
+
+    def create_case(self, title):
+        return Case.objects.create(citizen=self.citizen, lawyer=self.lawyer, title=title, description='...')
+
+    def test_numbers_count_up_per_year(self):
+        with mock.patch.object(numbering, 'allocator', numbering.CaseNumberAllocator(block_size=3)):
+            numbers = [self.create_case(str(n)).case_number for n in range(4)]
+            self.assertEqual(numbering.next_case_number(1999), 'QA-1999-000001')
+        year = timezone.now().year
+        self.assertEqual(numbers, [f'QA-{year}-{n:06d}' for n in range(1, 5)])
+        self.assertEqual(CaseNumberCounter.objects.get(year=year).last_value, 6)
+
+    def test_rolled_back_block_is_not_reissued(self):
+        with mock.patch.object(numbering, 'allocator', numbering.CaseNumberAllocator(block_size=3)):
+            with self.assertRaises(ZeroDivisionError), transaction.atomic():
+                self.create_case('Rolled back')
+                1 / 0
+            number = self.create_case('Kept').case_number
+        self.assertTrue(number.endswith('-000001'))
+
+    def test_one_transaction_draws_on_its_own_block(self):
+        with mock.patch.object(numbering, 'allocator', numbering.CaseNumberAllocator(block_size=5)):
+            with transaction.atomic():
+                numbers = [self.create_case(str(n)).case_number for n in range(7)]
+            with transaction.atomic():
+                numbers.append(self.create_case('Next').case_number)
+        self.assertEqual([number[-6:] for number in numbers], [f'{n:06d}' for n in range(1, 9)])
+        self.assertEqual(CaseNumberCounter.objects.get(year=timezone.now().year).last_value, 10)
+
+    def test_parallel_creation_needs_no_retries(self):
+        # A small block, so threads often run out and reserve at the same time
+        allocator = numbering.CaseNumberAllocator(block_size=5)
+        errors = []
+        start = threading.Barrier(self.THREADS)
+
+        def work(worker):
+            try:
+                start.wait()
+                for n in range(self.CASES_PER_THREAD):
+                    # Every tenth case is in a transaction that rolls back
+                    try:
+                        with transaction.atomic():
+                            self.create_case(f'{worker}-{n}')
+                            if n % 10 == 9:
+                                raise ZeroDivisionError
+                    except ZeroDivisionError:
+                        pass
+            except IntegrityError as error:
+                errors.append(error)
+            finally:
+                connection.close()
+
+        with mock.patch.object(numbering, 'allocator', allocator):
+            threads = [threading.Thread(target=work, args=(worker,)) for worker in range(self.THREADS)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(errors, [])
+        numbers = list(Case.objects.values_list('case_number', flat=True))
+        self.assertEqual(len(numbers), self.THREADS * self.CASES_PER_THREAD * 9 // 10)
+        self.assertEqual(len(set(numbers)), len(numbers))
+
+
+class CounterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.citizen = make_citizen('citizen', '35202-0000001-1')
+        cls.lawyer = make_lawyer('lawyer', 'BC-1')
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(User.objects.get(id=user.id))
+        return client
+
+    def stats(self, user, path):
+        client = self.client_for(user)
+        with self.assertNumQueries(1):
+            return client.get(path).json()
+
+    def send_request(self, title='Tenancy'):
+        response = self.client_for(self.citizen).post('/api/case-requests/', {
+            'lawyer': self.lawyer.lawyer_profile.id, 'case_title': title, 'case_type': 'Civil', 'description': '...'
+        }, format='json')
+        return response.json()['data']['id']
+
+    def test_stats_follow_each_transition(self):
+        first, second = self.send_request('First'), self.send_request('Second')
+        lawyer = self.client_for(self.lawyer)
+        lawyer.post(f'/api/case-requests/{first}/accept/')
+        lawyer.post(f'/api/case-requests/{first}/start_progress/')
+        lawyer.post(f'/api/case-requests/{second}/reject/')
+        # Neither moves a count: mark_viewed keeps the status and a rejected request can't be completed
+        self.client_for(self.citizen).post(f'/api/case-requests/{first}/mark_viewed/')
+        lawyer.post(f'/api/case-requests/{second}/complete/')
+
+        expected = {'total_requests': 2, 'pending': 0, 'accepted': 0, 'in_progress': 1, 'completed': 0, 'rejected': 1}
+        self.assertEqual(self.stats(self.citizen, '/api/case-requests/stats/'), expected)
+        self.assertEqual(self.stats(self.lawyer, '/api/case-requests/stats/'), expected)
+
+        CaseRequest.objects.filter(id=second).delete()
+        self.assertEqual(self.stats(self.lawyer, '/api/case-requests/stats/')['total_requests'], 1)
+
+    def test_message_counts_and_read_marks(self):
+        case_request = self.send_request()
+        for sender, content in ((self.citizen, 'Hello'), (self.citizen, 'Any news?'), (self.lawyer, 'Soon')):
+            self.client_for(sender).post('/api/messages/', {'case_request': case_request, 'content': content}, format='json')
+
+        self.assertEqual(self.stats(self.lawyer, '/api/messages/unread_count/'), {'unread_count': 2})
+        self.assertEqual(
+            self.stats(self.citizen, '/api/messages/stats/'),
+            {'total_messages': 3, 'unread': 1, 'sent': 2, 'received': 1}
+        )
+
+        self.client_for(self.lawyer).get(f'/api/messages/by_case/?case_request_id={case_request}')
+        self.assertEqual(self.stats(self.lawyer, '/api/messages/unread_count/'), {'unread_count': 0})
+        self.assertEqual(self.stats(self.citizen, '/api/messages/unread_count/'), {'unread_count': 1})
+
+    def test_user_with_nothing_counted_gets_zeros(self):
+        self.assertEqual(self.stats(self.lawyer, '/api/case-requests/stats/')['total_requests'], 0)
+        self.assertEqual(self.stats(self.citizen, '/api/messages/unread_count/'), {'unread_count': 0})
+
+    def test_rebuild_repairs_drift(self):
+        from . import counters
+
+        self.send_request()
+        self.assertEqual(counters.find_drift('lawyer'), [])
+        LawyerCounters.objects.update(pending=5, unread_messages=2)
+        profile_id = self.lawyer.lawyer_profile.id
+        self.assertEqual(counters.find_drift('lawyer'), [(profile_id, {'pending': (5, 1), 'unread_messages': (2, 0)})])
+
+        self.assertEqual(counters.repair('lawyer'), 1)
+        self.assertEqual(counters.find_drift('lawyer'), [])
+        self.assertEqual(counters.find_drift('citizen'), [])
@@ -1,10 +1,15 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.utils import timezone
-from django.db import IntegrityError
+from django.db import IntegrityError, transaction
 
+from qanoon_assist.pagination import (
+    CreatedAtPagination, FilingDatePagination, HearingDatePagination, RequestDatePagination
+)
+from . import counters
 from .models import CaseRequest, Case, CaseUpdate, Hearing
 from .serializers import (
     CaseRequestSerializer, CaseSerializer, 
@@ -15,47 +20,12 @@ from .serializers import (
 class CaseRequestViewSet(viewsets.ModelViewSet):
     serializer_class = CaseRequestSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = RequestDatePagination
     
     def get_queryset(self):
-        """Get case requests using raw SQL for citizens and lawyers"""
+        """Case requests the user is a party to (all of them for admins)"""
         user = self.request.user
-        from django.db import connection
-        
-        # Citizens see their own requests (using raw SQL)
-        if user.user_type == 'citizen':
-            with connection.cursor() as cursor:
-                cursor.execute("""
-                    SELECT * FROM case_requests 
-                    WHERE requester_id = %s
-                    ORDER BY request_date DESC
-                """, [user.citizen_profile.id])
-                
-                columns = [col[0] for col in cursor.description]
-                request_data = [dict(zip(columns, row)) for row in cursor.fetchall()]
-                request_ids = [item['id'] for item in request_data]
-                
-                return CaseRequest.objects.filter(id__in=request_ids).select_related('requester__user', 'lawyer__user')
-        
-        # Lawyers see requests sent to them (using raw SQL)
-        elif user.user_type == 'lawyer':
-            with connection.cursor() as cursor:
-                cursor.execute("""
-                    SELECT * FROM case_requests 
-                    WHERE lawyer_id = %s
-                    ORDER BY request_date DESC
-                """, [user.lawyer_profile.id])
-                
-                columns = [col[0] for col in cursor.description]
-                request_data = [dict(zip(columns, row)) for row in cursor.fetchall()]
-                request_ids = [item['id'] for item in request_data]
-                
-                return CaseRequest.objects.filter(id__in=request_ids).select_related('requester__user', 'lawyer__user')
-        
-        # Admins see all (using ORM)
-        elif user.user_type == 'admin':
-            return CaseRequest.objects.all().select_related('requester__user', 'lawyer__user')
-        
-        return CaseRequest.objects.none()
+        return CaseRequest.objects.for_user(user).with_serializer_fields(user)
     
     def create(self, request, *args, **kwargs):
         """Create a new case request (Citizens only)"""
@@ -83,26 +53,38 @@ class CaseRequestViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
     
+    def transition(self, action, **values):
+        """
+        Apply a workflow action to the request in the URL. Returns the
+        updated request, or an error Response if it can't be taken now.
+        """
+        not_found = Response({'error': 'Case request not found'}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            pk = int(self.kwargs['pk'])
+        except ValueError:
+            return not_found
+
+        queryset = self.get_queryset()
+        case_request = queryset.transition(pk, action, **values)
+        if case_request is not None:
+            return case_request
+
+        current = queryset.filter(pk=pk).values_list('status', flat=True).first()
+        if current is None:
+            return not_found
+        return Response(
+            {'error': f'Cannot {action.replace("_", " ")} a case request that is {current.replace("_", " ")}'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
     @action(detail=True, methods=['post'])
     def accept(self, request, pk=None):
-        """Lawyer accepts a case request (using raw SQL UPDATE)"""
-        case_request = self.get_object()
-        from django.db import connection
-        
-        message = request.data.get('message', 'Request accepted')
-        
-        # Update using raw SQL
-        with connection.cursor() as cursor:
-            cursor.execute("""
-                UPDATE case_requests 
-                SET status = 'accepted',
-                    response_date = %s,
-                    response_message = %s
-                WHERE id = %s
-            """, [timezone.now(), message, pk])
-        
-        # Refresh object for response
-        case_request.refresh_from_db()
+        """Lawyer accepts a pending case request"""
+        case_request = self.transition(
+            'accept', response_date=timezone.now(), response_message=request.data.get('message', 'Request accepted')
+        )
+        if isinstance(case_request, Response):
+            return case_request
         
         return Response({
             'message': 'Case request accepted',
@@ -111,24 +93,12 @@ class CaseRequestViewSet(viewsets.ModelViewSet):
     
     @action(detail=True, methods=['post'])
     def reject(self, request, pk=None):
-        """Lawyer rejects a case request (using raw SQL UPDATE)"""
-        case_request = self.get_object()
-        from django.db import connection
-        
-        message = request.data.get('message', 'Request rejected')
-        
-        # Update using raw SQL
-        with connection.cursor() as cursor:
-            cursor.execute("""
-                UPDATE case_requests 
-                SET status = 'rejected',
-                    response_date = %s,
-                    response_message = %s
-                WHERE id = %s
-            """, [timezone.now(), message, pk])
-        
-        # Refresh object for response
-        case_request.refresh_from_db()
+        """Lawyer rejects a pending case request"""
+        case_request = self.transition(
+            'reject', response_date=timezone.now(), response_message=request.data.get('message', 'Request rejected')
+        )
+        if isinstance(case_request, Response):
+            return case_request
         
         return Response({
             'message': 'Case request rejected',
@@ -137,23 +107,23 @@ class CaseRequestViewSet(viewsets.ModelViewSet):
     
     @action(detail=True, methods=['post'])
     def start_progress(self, request, pk=None):
-        """Lawyer marks case as in progress and creates a Case"""
-        case_request = self.get_object()
-        
-        # Update case request status
-        case_request.status = 'in_progress'
-        case_request.save()
-        
-        # Create a Case if it doesn't exist
-        if not hasattr(case_request, 'case') or case_request.case_request is None:
-            Case.objects.create(
-                citizen=case_request.requester,
-                lawyer=case_request.lawyer,
+        """Lawyer starts work on an accepted case request and opens its Case"""
+        with transaction.atomic():
+            case_request = self.transition('start_progress')
+            if isinstance(case_request, Response):
+                return case_request
+            
+            case, created = Case.objects.get_or_create(
                 case_request=case_request,
-                title=case_request.case_title,
-                description=case_request.description,
-                status='active'
+                defaults={
+                    'citizen_id': case_request.requester_id,
+                    'lawyer_id': case_request.lawyer_id,
+                    'title': case_request.case_title,
+                    'description': case_request.description,
+                    'status': 'active',
+                }
             )
+            case_request.case_pk = case.id
         
         return Response({
             'message': 'Case status updated to in progress',
@@ -162,11 +132,10 @@ class CaseRequestViewSet(viewsets.ModelViewSet):
     
     @action(detail=True, methods=['post'])
     def complete(self, request, pk=None):
-        """Lawyer marks case as completed"""
-        case_request = self.get_object()
-        
-        case_request.status = 'completed'
-        case_request.save()
+        """Lawyer marks a case in progress as completed"""
+        case_request = self.transition('complete')
+        if isinstance(case_request, Response):
+            return case_request
         
         return Response({
             'message': 'Case marked as completed',
@@ -176,8 +145,6 @@ class CaseRequestViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['post'])
     def mark_viewed(self, request, pk=None):
         """Mark case request as viewed by citizen"""
-        case_request = self.get_object()
-        
         # Only citizens can mark as viewed
         if request.user.user_type != 'citizen':
             return Response(
@@ -185,9 +152,9 @@ class CaseRequestViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        # Update last viewed timestamp
-        case_request.last_viewed_at = timezone.now()
-        case_request.save()
+        case_request = self.transition('mark_viewed', last_viewed_at=timezone.now())
+        if isinstance(case_request, Response):
+            return case_request
         
         return Response({
             'message': 'Case marked as viewed',
@@ -196,125 +163,42 @@ class CaseRequestViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['get'])
     def stats(self, request):
-        """Get case request statistics using raw SQL"""
-        from django.db import connection
-        user = request.user
-        
-        # For lawyers - get their stats
-        if user.user_type == 'lawyer':
-            with connection.cursor() as cursor:
-                cursor.execute("""
-                    SELECT 
-                        COUNT(*) as total_requests,
-                        COUNT(CASE WHEN status = 'pending' THEN 1 END) as pending,
-                        COUNT(CASE WHEN status = 'accepted' THEN 1 END) as accepted,
-                        COUNT(CASE WHEN status = 'in_progress' THEN 1 END) as in_progress,
-                        COUNT(CASE WHEN status = 'completed' THEN 1 END) as completed,
-                        COUNT(CASE WHEN status = 'rejected' THEN 1 END) as rejected
-                    FROM case_requests 
-                    WHERE lawyer_id = %s
-                """, [user.lawyer_profile.id])
-                
-                row = cursor.fetchone()
-                stats_data = {
-                    'total_requests': row[0],
-                    'pending': row[1],
-                    'accepted': row[2],
-                    'in_progress': row[3],
-                    'completed': row[4],
-                    'rejected': row[5]
-                }
-        
-        # For citizens - get their stats
-        elif user.user_type == 'citizen':
-            with connection.cursor() as cursor:
-                cursor.execute("""
-                    SELECT 
-                        COUNT(*) as total_requests,
-                        COUNT(CASE WHEN status = 'pending' THEN 1 END) as pending,
-                        COUNT(CASE WHEN status = 'accepted' THEN 1 END) as accepted,
-                        COUNT(CASE WHEN status = 'in_progress' THEN 1 END) as in_progress,
-                        COUNT(CASE WHEN status = 'completed' THEN 1 END) as completed,
-                        COUNT(CASE WHEN status = 'rejected' THEN 1 END) as rejected
-                    FROM case_requests 
-                    WHERE requester_id = %s
-                """, [user.citizen_profile.id])
-                
-                row = cursor.fetchone()
-                stats_data = {
-                    'total_requests': row[0],
-                    'pending': row[1],
-                    'accepted': row[2],
-                    'in_progress': row[3],
-                    'completed': row[4],
-                    'rejected': row[5]
-                }
-        else:
+        """The user's case requests by status, from their counters row"""
+        user_counters = counters.for_user(request.user)
+        if user_counters is None:
             return Response({'error': 'Unauthorized'}, status=status.HTTP_403_FORBIDDEN)
         
-        return Response(stats_data)
+        return Response(user_counters.request_stats())
 
 
 class CaseViewSet(viewsets.ModelViewSet):
     serializer_class = CaseSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = FilingDatePagination
     
     def get_queryset(self):
-        """Get cases using raw SQL for filtering"""
-        user = self.request.user
-        from django.db import connection
-        
-        if user.user_type == 'citizen':
-            with connection.cursor() as cursor:
-                cursor.execute("""
-                    SELECT * FROM cases 
-                    WHERE citizen_id = %s
-                    ORDER BY filing_date DESC
-                """, [user.citizen_profile.id])
-                
-                columns = [col[0] for col in cursor.description]
-                case_data = [dict(zip(columns, row)) for row in cursor.fetchall()]
-                case_ids = [item['id'] for item in case_data]
-                
-                return Case.objects.filter(id__in=case_ids)
-        
-        elif user.user_type == 'lawyer':
-            with connection.cursor() as cursor:
-                cursor.execute("""
-                    SELECT * FROM cases 
-                    WHERE lawyer_id = %s
-                    ORDER BY filing_date DESC
-                """, [user.lawyer_profile.id])
-                
-                columns = [col[0] for col in cursor.description]
-                case_data = [dict(zip(columns, row)) for row in cursor.fetchall()]
-                case_ids = [item['id'] for item in case_data]
-                
-                return Case.objects.filter(id__in=case_ids)
-        
-        elif user.user_type == 'admin':
-            return Case.objects.all()
-        
-        return Case.objects.none()
-    
+        """Cases the user is a party to (all of them for admins)"""
+        return Case.objects.for_user(self.request.user).for_listing()
+
 
+def filter_by_case(queryset, request):
+    """Narrow to the case in the `case` query param, along the (case, sort key, id) index"""
+    case_id = request.query_params.get('case')
+    if not case_id:
+        return queryset
+    if not case_id.isdigit():
+        raise ValidationError({'case': 'Must be a case id'})
+    return queryset.filter(case_id=case_id)
 
 
 class HearingViewSet(viewsets.ModelViewSet):
     serializer_class = HearingSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = HearingDatePagination
     
     def get_queryset(self):
-        user = self.request.user
-        
-        if user.user_type == 'citizen':
-            return Hearing.objects.filter(case__citizen=user.citizen_profile)
-        elif user.user_type == 'lawyer':
-            return Hearing.objects.filter(case__lawyer=user.lawyer_profile)
-        elif user.user_type == 'admin':
-            return Hearing.objects.all()
-        
-        return Hearing.objects.none()
+        """Query params: case, the hearings of one case"""
+        return filter_by_case(Hearing.objects.for_user(self.request.user), self.request)
     
     def perform_create(self, serializer):
         # Only lawyers can create hearings
@@ -326,18 +210,11 @@ class HearingViewSet(viewsets.ModelViewSet):
 class CaseUpdateViewSet(viewsets.ModelViewSet):
     serializer_class = CaseUpdateSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = CreatedAtPagination
     
     def get_queryset(self):
-        user = self.request.user
-        
-        if user.user_type == 'citizen':
-            return CaseUpdate.objects.filter(case__citizen=user.citizen_profile)
-        elif user.user_type == 'lawyer':
-            return CaseUpdate.objects.filter(case__lawyer=user.lawyer_profile)
-        elif user.user_type == 'admin':
-            return CaseUpdate.objects.all()
-        
-        return CaseUpdate.objects.none()
+        """Query params: case, the updates of one case"""
+        return filter_by_case(CaseUpdate.objects.for_user(self.request.user), self.request).select_related('created_by')
     
     def perform_create(self, serializer):
         # Only lawyers can create case updates
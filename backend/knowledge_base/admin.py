@@ -1,5 +1,8 @@
 from django.contrib import admin
-from .models import LegalCategory, LegalArticle
+from django.db.models import Q
+from .models import LegalCategory, LegalArticle, Keyword, StatuteNode
+from .fulltext import search_query
+from .categories import with_article_counts
 
 
 @admin.register(LegalCategory)
@@ -7,18 +10,31 @@ class LegalCategoryAdmin(admin.ModelAdmin):
     list_display = ['name', 'get_article_count']
     search_fields = ['name']
 
+    def get_queryset(self, request):
+        return with_article_counts(super().get_queryset(request))
+
     def get_article_count(self, obj):
-        return obj.articles.count()
+        return obj.article_count
     get_article_count.short_description = 'Number of Articles'
+    get_article_count.admin_order_field = 'article_count'
 
 
 @admin.register(LegalArticle)
 class LegalArticleAdmin(admin.ModelAdmin):
     list_display = ['article_number', 'title', 'category', 'created_at']
     list_filter = ['category', 'created_at']
-    search_fields = ['title', 'article_number', 'keywords', 'content']
+    search_fields = ['=article_number']
     readonly_fields = ['created_at', 'updated_at']
 
+    def get_search_results(self, request, queryset, search_term):
+        """Search the GIN-indexed search_vector instead of icontains over every text column"""
+        if not search_term.strip():
+            return queryset, False
+        return queryset.filter(
+            Q(search_vector=search_query(search_term)) |
+            Q(article_number__iexact=search_term.strip())
+        ), False
+
     fieldsets = (
         ('Basic Info', {
             'fields': ('title', 'article_number', 'category')
@@ -34,4 +50,27 @@ class LegalArticleAdmin(admin.ModelAdmin):
             'fields': ('created_at', 'updated_at'),
             'classes': ('collapse',)
         })
-    )
\ No newline at end of file
+    )
+
+
+@admin.register(Keyword)
+class KeywordAdmin(admin.ModelAdmin):
+    list_display = ['name', 'article_count']
+    search_fields = ['^name']
+    readonly_fields = ['article_count']
+    ordering = ['-article_count', 'name']
+
+
+@admin.register(StatuteNode)
+class StatuteNodeAdmin(admin.ModelAdmin):
+    list_display = ['__str__', 'kind', 'depth', 'article']
+    list_filter = ['kind']
+    search_fields = ['title', '=number']
+    raw_id_fields = ['parent', 'article']
+    readonly_fields = ['path', 'depth']
+
+    def get_readonly_fields(self, request, obj=None):
+        # A node's path is fixed when it is added, so it cannot be moved to another parent
+        if obj is not None:
+            return self.readonly_fields + ['parent']
+        return self.readonly_fields
@@ -0,0 +1,271 @@
+"""
+Text analysis pipeline for knowledge-base indexing and querying.
+
+Users search in English, Urdu script and Roman Urdu, so text goes through the
+same stages at index time and at query time:
+
+1. char filters  - Unicode normalisation, lowercasing, diacritic stripping and
+                   Urdu script normalisation (Arabic letter variants, digits)
+2. tokenizer     - word tokens
+3. token filters - stopwords, Roman-Urdu/Urdu to canonical term synonyms and a
+                   light English stemmer
+
+Token filter output is memoised per distinct token, and analysed queries are
+cached, so neither indexing nor the search hot path repeats string work.
+"""
+import re
+import unicodedata
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+STOPWORDS = frozenset([
+    'a', 'an', 'and', 'any', 'are', 'as', 'at', 'be', 'by', 'for', 'from',
+    'has', 'have', 'in', 'is', 'it', 'of', 'on', 'or', 'shall', 'such',
+    'that', 'the', 'this', 'to', 'under', 'was', 'which', 'who', 'with',
+    # Common Urdu function words, in Urdu script and Roman Urdu
+    'کا', 'کی', 'کے', 'میں', 'سے', 'کو', 'اور', 'ہے', 'ہیں', 'پر', 'یا',
+    'ka', 'ki', 'ke', 'mein', 'se', 'ko', 'aur', 'hai', 'hain', 'par', 'ya',
+])
+
+# Arabic-script letter variants folded onto the forms Urdu text normally uses
+URDU_CHAR_MAP = str.maketrans({
+    'ك': 'ک',  # Arabic kaf -> keheh
+    'ي': 'ی',  # Arabic yeh -> Farsi yeh
+    'ى': 'ی',  # alef maksura -> Farsi yeh
+    'ه': 'ہ',  # Arabic heh -> heh goal
+    'ۀ': 'ہ',  # heh with yeh above -> heh goal
+    'ة': 'ۃ',  # teh marbuta -> Urdu teh marbuta goal
+    'أ': 'ا',  # alef with hamza above -> alef
+    'إ': 'ا',  # alef with hamza below -> alef
+    '\u0640': None,  # tatweel
+    '\u200c': None,  # zero-width non-joiner
+    '\u200d': None,  # zero-width joiner
+    **{chr(0x06f0 + digit): str(digit) for digit in range(10)},  # Urdu digits
+    **{chr(0x0660 + digit): str(digit) for digit in range(10)},  # Arabic-Indic digits
+})
+
+# Roman Urdu spellings and Urdu-script terms mapped to one canonical index term
+SYNONYMS = {
+    'murder': ['qatl', 'qatal', 'katl', 'قتل'],
+    'theft': ['chori', 'chouri', 'چوری'],
+    'robbery': ['daketi', 'dakaiti', 'dakaity', 'ڈکیتی'],
+    'kidnapping': ['aghwa', 'agwa', 'اغوا'],
+    'fraud': ['dhoka', 'dhokha', 'dhokebazi', 'دھوکہ'],
+    'punishment': ['saza', 'sazaa', 'سزا'],
+    'qisas': ['qisaas', 'qasas', 'قصاص'],
+    'diyat': ['diyyat', 'diyaat', 'دیت'],
+    'bail': ['zamanat', 'zamaanat', 'ضمانت'],
+    'witness': ['gawah', 'gawaah', 'گواہ'],
+    'court': ['adalat', 'adaalat', 'عدالت'],
+    'lawyer': ['wakeel', 'wakil', 'vakil', 'وکیل'],
+    'law': ['qanoon', 'qanun', 'qaanoon', 'قانون'],
+    'constitution': ['aain', 'aaeen', 'aeen', 'آئین'],
+    'right': ['haq', 'huqooq', 'haqooq', 'حق', 'حقوق'],
+    'marriage': ['nikah', 'nikkah', 'nikaah', 'نکاح'],
+    'divorce': ['talaq', 'talaaq', 'tallaq', 'طلاق'],
+    'khula': ['khulla', 'khulaa', 'khoola', 'خلع'],
+    'dower': ['mehr', 'mahr', 'meher', 'haqmehr', 'مہر'],
+    'dowry': ['jahez', 'jahaiz', 'jahiz', 'جہیز'],
+    'maintenance': ['nafqa', 'nafaqa', 'kharcha', 'نفقہ'],
+    'custody': ['hizanat', 'hizaanat', 'sarparasti', 'حضانت'],
+    'inheritance': ['wirasat', 'virasat', 'warasat', 'وراثت'],
+    'property': ['jaidad', 'jaedad', 'jaydad', 'جائیداد', 'جائداد'],
+    'land': ['zameen', 'zamin', 'زمین'],
+    'contract': ['muahida', 'muahada', 'معاہدہ'],
+    'salary': ['tankhwah', 'tankhwa', 'tankhah', 'تنخواہ'],
+    'tax': ['taxes', 'ٹیکس'],
+}
+
+# Longest suffixes first; (suffix, replacement)
+STEM_SUFFIXES = (
+    ('ements', 'e'), ('ments', ''), ('ement', 'e'), ('ment', ''),
+    ('ingly', ''), ('edly', ''),
+    ('ies', 'y'), ('ied', 'y'),
+    ('sses', 'ss'), ('shes', 'sh'), ('ches', 'ch'), ('xes', 'x'), ('zes', 'z'),
+    ('ings', ''), ('ing', ''),
+    ('ed', ''), ('ly', ''),
+    ('s', ''),
+)
+MIN_STEM_LENGTH = 3
+
+
+def unicode_normalize(text):
+    return unicodedata.normalize('NFKC', text).lower()
+
+
+def strip_diacritics(text):
+    """Drop combining marks: Latin accents as well as Urdu/Arabic harakat"""
+    decomposed = unicodedata.normalize('NFKD', text)
+    return unicodedata.normalize(
+        'NFC', ''.join(char for char in decomposed if not unicodedata.combining(char))
+    )
+
+
+def normalize_urdu(text):
+    return text.translate(URDU_CHAR_MAP)
+
+
+def fold(text):
+    """All char filters of the default pipeline, for normalising word lists"""
+    return normalize_urdu(strip_diacritics(unicode_normalize(text)))
+
+
+# Word lists folded the same way as analysed text so they match after char filtering
+FOLDED_STOPWORDS = frozenset(fold(word) for word in STOPWORDS)
+CANONICAL_TERMS = {
+    fold(variant): canonical for canonical, variants in SYNONYMS.items() for variant in variants
+}
+
+
+def stopword_filter(token):
+    return None if token in FOLDED_STOPWORDS else token
+
+
+def synonym_filter(token):
+    return CANONICAL_TERMS.get(token, token)
+
+
+def light_stem(token):
+    """Conservative English suffix stripping; non-Latin tokens are left alone"""
+    if len(token) <= 4 or not token.isascii() or not token.isalpha():
+        return token
+    if token.endswith(('ss', 'us', 'is')):
+        return token
+
+    for suffix, replacement in STEM_SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= MIN_STEM_LENGTH:
+            token = token[:-len(suffix)] + replacement
+            break
+
+    # "deceive"/"deceived" and "marriage"/"marriages" should meet on one stem
+    if len(token) > 4 and token.endswith('e'):
+        token = token[:-1]
+    return token
+
+
+class Analyzer:
+    """
+    Char filters (text -> text), a tokenizer regex and token filters
+    (token -> token, or None to drop it), applied in order.
+    """
+
+    # Distinct raw tokens remembered before the memo is reset
+    TOKEN_CACHE_SIZE = 500000
+
+    def __init__(self, char_filters=(), token_filters=(), token_pattern=TOKEN_RE):
+        self.char_filters = tuple(char_filters)
+        self.token_filters = tuple(token_filters)
+        self.token_pattern = token_pattern
+        self._token_cache = {}
+
+    def analyze(self, text):
+        if not text:
+            return []
+
+        text = self._filter_chars(text)
+
+        cache = self._token_cache
+        terms = []
+        for token in self.token_pattern.findall(text):
+            term = cache.get(token, False)
+            if term is False:
+                term = self._filter_token(token)
+                if len(cache) >= self.TOKEN_CACHE_SIZE:
+                    cache = self._token_cache = {}
+                cache[token] = term
+            if term:
+                terms.append(term)
+        return terms
+
+    def analyze_offsets(self, text):
+        """
+        Like analyze, but (term, start) pairs, where start is the token's offset
+        into the raw text, even when char filters dropped (harakat, tatweel) or
+        expanded (ligatures) characters before it
+        """
+        if not text:
+            return []
+
+        text, origins = self._filter_chars_with_origins(text)
+
+        cache = self._token_cache
+        terms = []
+        for match in self.token_pattern.finditer(text):
+            token = match.group()
+            term = cache.get(token, False)
+            if term is False:
+                term = self._filter_token(token)
+                if len(cache) >= self.TOKEN_CACHE_SIZE:
+                    cache = self._token_cache = {}
+                cache[token] = term
+            if term:
+                terms.append((term, origins[match.start()] if origins else match.start()))
+        return terms
+
+    def _filter_chars(self, text):
+        for char_filter in self.char_filters:
+            text = char_filter(text)
+        return text
+
+    def _filter_chars_with_origins(self, text):
+        """
+        The char-filtered text and, for each of its characters, the raw offset
+        it came from (None when the two line up one to one).
+
+        Text is filtered a character plus its combining marks at a time, so
+        every output character traces back to the raw character that started
+        its cluster; clusters repeat, so each distinct one is filtered once.
+        """
+        filtered = self._filter_chars(text)
+        if len(filtered) == len(text) and text.isascii():
+            return filtered, None
+
+        pieces, origins, memo = [], [], {}
+        start = 0
+        for position in range(1, len(text) + 1):
+            if position < len(text) and unicodedata.combining(text[position]):
+                continue
+            cluster = text[start:position]
+            piece = memo.get(cluster)
+            if piece is None:
+                piece = memo[cluster] = self._filter_chars(cluster)
+            pieces.append(piece)
+            origins.extend([start] * len(piece))
+            start = position
+        return ''.join(pieces), origins
+
+    def _filter_token(self, token):
+        for token_filter in self.token_filters:
+            token = token_filter(token)
+            if not token:
+                return None
+        return token
+
+
+default_analyzer = Analyzer(
+    char_filters=[unicode_normalize, strip_diacritics, normalize_urdu],
+    token_filters=[stopword_filter, synonym_filter, light_stem],
+)
+
+
+@lru_cache(maxsize=None)
+def get_analyzer():
+    """Analyzer named by KNOWLEDGE_BASE_ANALYZER (a dotted path), or the default pipeline"""
+    path = getattr(settings, 'KNOWLEDGE_BASE_ANALYZER', None)
+    return import_string(path) if path else default_analyzer
+
+
+def analyze(text):
+    """Index-time analysis of a field value"""
+    return get_analyzer().analyze(text)
+
+
+@lru_cache(maxsize=4096)
+def analyze_query(query):
+    """Query-time analysis, cached per distinct query string"""
+    return tuple(get_analyzer().analyze(query))
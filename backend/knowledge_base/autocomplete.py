@@ -0,0 +1,163 @@
+"""
+Typeahead completions for knowledge-base articles.
+
+Article numbers, titles (from every word onwards) and keywords are normalised
+with the citation rules from fuzzy.py and kept in one sorted array of
+(key, rank, article_id) entries. A prefix lookup is a binary search plus a
+short forward scan, and completions are served from in-memory metadata. The
+only database reads are index_version's check, at most once a second, for
+writes from other processes and the re-read of the articles those changed.
+"""
+import bisect
+import threading
+
+from .analysis import FOLDED_STOPWORDS
+from .fuzzy import normalize_reference
+from .index_version import ProcessIndex, reread_articles
+from .keywords import parse_keywords
+
+DEFAULT_LIMIT = 8
+MAX_LIMIT = 20
+
+# Entries examined per lookup; bounds the cost of one- or two-letter prefixes
+SCAN_LIMIT = 400
+
+# Lower rank sorts first among matches of the same prefix
+RANK_ARTICLE_NUMBER = 0
+RANK_TITLE = 1
+RANK_TITLE_WORD = 2
+RANK_KEYWORD = 3
+
+MIN_WORD_LENGTH = 3
+
+
+def completion_keys(article_number, title, keywords):
+    """(key, rank) pairs under which an article can be completed"""
+    keys = {}
+
+    def add(key, rank):
+        if key and rank < keys.get(key, RANK_KEYWORD + 1):
+            keys[key] = rank
+
+    number = normalize_reference(article_number)
+    add(number, RANK_ARTICLE_NUMBER)
+    # "302 ppc" as well as "section 302 ppc"
+    parts = number.split(' ', 1)
+    if len(parts) == 2:
+        add(parts[1], RANK_ARTICLE_NUMBER)
+
+    words = normalize_reference(title).split()
+    add(' '.join(words), RANK_TITLE)
+    for position in range(1, len(words)):
+        word = words[position]
+        if len(word) >= MIN_WORD_LENGTH and word not in FOLDED_STOPWORDS:
+            add(' '.join(words[position:]), RANK_TITLE_WORD)
+
+    for keyword in parse_keywords(keywords):
+        add(normalize_reference(keyword), RANK_KEYWORD)
+
+    return keys.items()
+
+
+class CompletionIndex:
+    """Sorted (key, rank, article_id) entries with per-article metadata"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.entries = []
+        self.article_entries = {}
+        self.articles = {}
+
+    def __len__(self):
+        return len(self.articles)
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Bulk build from (id, article_number, title, keywords) rows, sorting once"""
+        index = cls()
+        for article_id, article_number, title, keywords in rows:
+            entries = [(key, rank, article_id) for key, rank in completion_keys(article_number, title, keywords)]
+            index.entries.extend(entries)
+            index.article_entries[article_id] = entries
+            index.articles[article_id] = (article_number, title)
+        index.entries.sort()
+        return index
+
+    def add(self, article_id, article_number, title, keywords):
+        entries = [(key, rank, article_id) for key, rank in completion_keys(article_number, title, keywords)]
+        with self._lock:
+            self._remove(article_id)
+            for entry in entries:
+                bisect.insort(self.entries, entry)
+            self.article_entries[article_id] = entries
+            self.articles[article_id] = (article_number, title)
+
+    def remove(self, article_id):
+        with self._lock:
+            self._remove(article_id)
+
+    def _remove(self, article_id):
+        for entry in self.article_entries.pop(article_id, ()):
+            position = bisect.bisect_left(self.entries, entry)
+            if position < len(self.entries) and self.entries[position] == entry:
+                del self.entries[position]
+        self.articles.pop(article_id, None)
+
+    def complete(self, prefix, limit=DEFAULT_LIMIT):
+        """Up to limit completions as [{'id', 'article_number', 'title'}], best first"""
+        prefix = normalize_reference(prefix)
+        if not prefix:
+            return []
+
+        entries = self.entries
+        position = bisect.bisect_left(entries, (prefix,))
+        best = {}
+        for key, rank, article_id in entries[position:position + SCAN_LIMIT]:
+            if not key.startswith(prefix):
+                break
+            if article_id not in best or (rank, len(key)) < best[article_id]:
+                best[article_id] = (rank, len(key))
+
+        ranked = sorted(best.items(), key=lambda item: (item[1], item[0]))[:limit]
+        completions = []
+        for article_id, _ in ranked:
+            article = self.articles.get(article_id)
+            if article is not None:
+                completions.append({'id': article_id, 'article_number': article[0], 'title': article[1]})
+        return completions
+
+
+def build_index():
+    from .models import LegalArticle
+
+    rows = LegalArticle.objects.values_list('id', 'article_number', 'title', 'keywords').iterator(chunk_size=5000)
+    return CompletionIndex.from_rows(rows)
+
+
+def update_index(index, article_ids):
+    """Re-read changed articles into index"""
+    reread_articles(article_ids, ('article_number', 'title', 'keywords'), index.add, index.remove)
+
+
+_index = ProcessIndex(build_index, update_index)
+
+
+def get_index():
+    """Process-wide completion index, built from the database on first use and updated after writes elsewhere"""
+    return _index.get()
+
+
+def index_article(article):
+    index = _index.index
+    if index is not None:
+        index.add(article.id, article.article_number, article.title, article.keywords)
+
+
+def unindex_article(article_id):
+    index = _index.index
+    if index is not None:
+        index.remove(article_id)
+
+
+def complete(prefix, limit=DEFAULT_LIMIT):
+    return get_index().complete(prefix, limit=limit)
@@ -0,0 +1,10 @@
+"""
+Search quality and latency benchmark for the knowledge base.
+
+dataset.json holds labelled articles and queries (English, Urdu script,
+Roman Urdu and citation-style) with the article_numbers a good search should
+return. corpus.py pads the labelled articles with synthetic distractors to a
+chosen size, backends.py wraps each search implementation behind one
+interface, and runner.py measures recall@k, MRR and latency percentiles.
+Run it with the benchmark_search management command.
+"""
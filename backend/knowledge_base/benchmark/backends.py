@@ -0,0 +1,80 @@
+"""
+Search implementations behind one interface for the benchmark: prepare()
+once per corpus (building whatever index the backend needs), then
+search(query, limit) -> ranked article ids.
+"""
+import os
+import tempfile
+
+from django.db.models import Q
+
+from .. import compiled, fulltext, search
+from ..models import LegalArticle
+
+
+class IcontainsBackend:
+    """The original articles/search/: substring match on every field, ordered by article_number"""
+    name = 'icontains'
+
+    def prepare(self):
+        pass
+
+    def search(self, query, limit):
+        return list(
+            LegalArticle.objects.filter(
+                Q(title__icontains=query) |
+                Q(article_number__icontains=query) |
+                Q(keywords__icontains=query) |
+                Q(content__icontains=query)
+            ).order_by('article_number').values_list('id', flat=True)[:limit]
+        )
+
+    def close(self):
+        pass
+
+
+class MemoryBackend:
+    """In-process BM25F inverted index (search.py)"""
+    name = 'memory'
+
+    def prepare(self):
+        self.index = search.build_index()
+
+    def search(self, query, limit):
+        return [article_id for article_id, _ in self.index.search(query, limit=limit).hits]
+
+    def close(self):
+        self.index = None
+
+
+class CompiledBackend(MemoryBackend):
+    """The same index compiled to a file and memory-mapped (compiled.py)"""
+    name = 'compiled'
+
+    def prepare(self):
+        self.directory = tempfile.TemporaryDirectory(prefix='kb-benchmark-')
+        self.index = compiled.compile_index(os.path.join(self.directory.name, 'search.kbindex'))
+
+    def close(self):
+        self.index = None
+        self.directory.cleanup()
+
+
+class PostgresBackend:
+    """ts_rank over the GIN-indexed search_vector (fulltext.py)"""
+    name = 'postgres'
+
+    def prepare(self):
+        pass
+
+    def search(self, query, limit):
+        return [article_id for article_id, _ in fulltext.search_articles(query, limit=limit).hits]
+
+    def close(self):
+        pass
+
+
+BACKENDS = {
+    backend.name: backend
+    for backend in (IcontainsBackend, MemoryBackend, CompiledBackend, PostgresBackend)
+}
@@ -0,0 +1,89 @@
+"""
+Benchmark corpora: the labelled articles of dataset.json plus synthetic
+distractor articles.
+
+Distractors are drawn from a Zipf distribution over the labelled articles'
+own words followed by synthetic filler terms, so they share the common legal
+vocabulary ("punished", "imprisonment", "court") and compete with the
+labelled articles for every query. Their article_numbers reuse real section
+numbers under made-up statute codes, so citation queries have near misses.
+"""
+import json
+import os
+import re
+from itertools import chain
+
+import numpy as np
+
+from ..importer import CategoryResolver, clean_record, upsert_articles
+
+DATASET_PATH = os.path.join(os.path.dirname(__file__), 'dataset.json')
+
+# Statute codes of synthetic article_numbers, e.g. "Section 302 BCH"
+SYNTHETIC_CODES = ('BCH', 'LGO', 'MLR', 'PCRLJ', 'YLR', 'CLC', 'KLR', 'QLR')
+
+# Distinct terms distractors are drawn from, labelled articles' words first
+VOCABULARY_SIZE = 20000
+
+TITLE_WORDS = 5
+CONTENT_WORDS = 120
+KEYWORD_WORDS = 4
+
+WORD_RE = re.compile(r'[^\W\d_]{3,}')
+
+
+def load_dataset(path=DATASET_PATH):
+    with open(path, encoding='utf-8') as handle:
+        return json.load(handle)
+
+
+def synthetic_articles(count, dataset, seed=7, chunk=1000):
+    """Yield count distractor records in the importer's record format"""
+    words = list(dict.fromkeys(
+        word.lower()
+        for article in dataset['articles']
+        for field in ('title', 'content', 'keywords')
+        for word in WORD_RE.findall(article[field])
+    ))
+    vocabulary = np.asarray(words + [f'term{number}' for number in range(VOCABULARY_SIZE - len(words))], dtype=object)
+    probabilities = 1 / np.arange(1, len(vocabulary) + 1)
+    probabilities /= probabilities.sum()
+    categories = sorted({article['category'] for article in dataset['articles']})
+    rng = np.random.default_rng(seed)
+
+    words_per_article = TITLE_WORDS + CONTENT_WORDS + KEYWORD_WORDS
+    for chunk_start in range(0, count, chunk):
+        size = min(chunk, count - chunk_start)
+        term_ids = rng.choice(len(vocabulary), size=(size, words_per_article), p=probabilities)
+        category_ids = rng.integers(len(categories), size=size)
+        for offset, row in enumerate(term_ids):
+            number = chunk_start + offset
+            terms = vocabulary[row].tolist()
+            yield {
+                'article_number': f'Section {number // len(SYNTHETIC_CODES) + 1} '
+                                  f'{SYNTHETIC_CODES[number % len(SYNTHETIC_CODES)]}',
+                'title': ' '.join(terms[:TITLE_WORDS]).capitalize(),
+                'content': ' '.join(terms[TITLE_WORDS:TITLE_WORDS + CONTENT_WORDS]).capitalize() + '.',
+                'keywords': ', '.join(terms[TITLE_WORDS + CONTENT_WORDS:]),
+                'category': categories[category_ids[offset]],
+            }
+
+
+def load_corpus(size, dataset, seed=7, batch_size=2000):
+    """
+    Write the labelled articles and enough distractors to reach size articles
+    through the statute importer; returns the number of articles written
+    """
+    distractors = synthetic_articles(max(size - len(dataset['articles']), 0), dataset, seed)
+    categories = CategoryResolver()
+
+    written = 0
+    batch = []
+    for record in chain(dataset['articles'], distractors):
+        batch.append(clean_record(record))
+        if len(batch) >= batch_size:
+            written += len(upsert_articles(batch, categories))
+            batch = []
+    if batch:
+        written += len(upsert_articles(batch, categories))
+    return written
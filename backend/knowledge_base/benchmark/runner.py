@@ -0,0 +1,156 @@
+"""
+Benchmark runs: load a corpus, prepare each backend, replay the labelled
+queries and score the rankings.
+
+Runs in a scratch database (qanoon_assist/scratch.py), never the
+configured one. Each corpus is written inside a transaction that is rolled
+back afterwards, so every size starts from an empty articles table.
+"""
+import statistics
+import time
+from collections import defaultdict
+
+from django.db import transaction
+from django.utils import timezone
+
+from qanoon_assist.scratch import scratch_database
+from .backends import BACKENDS
+from .corpus import load_corpus
+
+DEFAULT_KS = (1, 5, 10)
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def recall_at(ranked, relevant, k):
+    return len(set(ranked[:k]) & relevant) / len(relevant)
+
+
+def reciprocal_rank(ranked, relevant):
+    for position, article_number in enumerate(ranked, 1):
+        if article_number in relevant:
+            return 1 / position
+    return 0.0
+
+
+def summarize(rows, ks):
+    """Mean recall@k and MRR over per-query rows, plus latency percentiles in ms"""
+    latencies = [latency for row in rows for latency in row['latencies_ms']]
+    return {
+        **{f'recall@{k}': round(statistics.mean(row['recall'][k] for row in rows), 4) for k in ks},
+        'mrr': round(statistics.mean(row['reciprocal_rank'] for row in rows), 4),
+        'latency_ms': {
+            'p50': round(percentile(latencies, 0.50), 3),
+            'p95': round(percentile(latencies, 0.95), 3),
+            'p99': round(percentile(latencies, 0.99), 3),
+            'mean': round(statistics.mean(latencies), 3),
+        },
+        'queries': len(rows),
+    }
+
+
+def run_backend(backend, queries, numbers, ks, repeat):
+    """Score one prepared backend over every query"""
+    limit = max(ks)
+    rows = []
+    for query in queries:
+        relevant = set(query['relevant'])
+        backend.search(query['query'], limit)  # warm caches and connections
+
+        latencies = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            article_ids = backend.search(query['query'], limit)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+        ranked = [numbers.get(article_id) for article_id in article_ids]
+        rows.append({
+            'query': query['query'],
+            'language': query['language'],
+            'recall': {k: recall_at(ranked, relevant, k) for k in ks},
+            'reciprocal_rank': reciprocal_rank(ranked, relevant),
+            'latencies_ms': latencies,
+            'top': ranked[:3],
+        })
+    return rows
+
+
+def run(dataset, sizes, backend_names, ks=DEFAULT_KS, repeat=5, seed=7, keep_database=False, log=None):
+    """Benchmark every backend on a corpus of each size; returns a JSON-serialisable report"""
+    with scratch_database(keep=keep_database, log=log):
+        return _run(dataset, sizes, backend_names, ks, repeat, seed, log)
+
+
+def _run(dataset, sizes, backend_names, ks, repeat, seed, log):
+    report = {
+        'started_at': timezone.now().isoformat(),
+        'seed': seed,
+        'repeat': repeat,
+        'ks': list(ks),
+        'queries': len(dataset['queries']),
+        'runs': [],
+    }
+
+    for size in sizes:
+        with transaction.atomic():
+            started = time.perf_counter()
+            written = load_corpus(size, dataset, seed=seed)
+            load_seconds = time.perf_counter() - started
+            if log:
+                log(f'Loaded {written} articles in {load_seconds:.1f}s')
+
+            from ..models import LegalArticle
+            numbers = dict(LegalArticle.objects.values_list('id', 'article_number'))
+
+            for name in backend_names:
+                backend = BACKENDS[name]()
+                started = time.perf_counter()
+                backend.prepare()
+                prepare_seconds = time.perf_counter() - started
+                try:
+                    rows = run_backend(backend, dataset['queries'], numbers, ks, repeat)
+                finally:
+                    backend.close()
+
+                by_language = defaultdict(list)
+                for row in rows:
+                    by_language[row['language']].append(row)
+                result = {
+                    'size': size,
+                    'backend': name,
+                    'load_seconds': round(load_seconds, 2),
+                    'prepare_seconds': round(prepare_seconds, 2),
+                    'overall': summarize(rows, ks),
+                    'by_language': {language: summarize(group, ks) for language, group in sorted(by_language.items())},
+                    'misses': [
+                        {'query': row['query'], 'language': row['language'], 'top': row['top']}
+                        for row in rows if not row['reciprocal_rank']
+                    ],
+                }
+                report['runs'].append(result)
+                if log:
+                    log(format_result(result, ks))
+
+            transaction.set_rollback(True)
+
+    return report
+
+
+def format_result(result, ks, previous=None):
+    """One line per run, with changes against a previous report's matching run"""
+    overall = result['overall']
+    parts = [f'{result["backend"]:>9} @ {result["size"]:>7}:']
+    for metric in [f'recall@{k}' for k in ks] + ['mrr']:
+        text = f'{metric} {overall[metric]:.3f}'
+        if previous and metric in previous['overall']:
+            text += f' ({overall[metric] - previous["overall"][metric]:+.3f})'
+        parts.append(text)
+    latency = overall['latency_ms']
+    text = f'p50 {latency["p50"]:.2f} ms, p95 {latency["p95"]:.2f} ms, p99 {latency["p99"]:.2f} ms'
+    if previous:
+        text += f' (p95 {latency["p95"] - previous["overall"]["latency_ms"]["p95"]:+.2f})'
+    parts.append(text)
+    return ' '.join(parts[:1]) + ' ' + ', '.join(parts[1:])
@@ -0,0 +1,32 @@
+"""
+Categories with their article counts, counted in one grouped query.
+
+The categories endpoint serves its list from the Django cache; saving an
+article that may have moved category, deleting one, importing a batch or
+editing a category drops the cached list once the transaction commits.
+With a per-process cache (the default LocMemCache) other workers only see
+the change when CACHE_TIMEOUT runs out, so it is kept short.
+"""
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+
+CACHE_KEY = 'knowledge_base:categories'
+CACHE_TIMEOUT = 300
+
+
+def with_article_counts(queryset):
+    return queryset.annotate(article_count=Count('articles'))
+
+
+def cached_list(build):
+    """The cached category list, computed with build() on a miss"""
+    data = cache.get(CACHE_KEY)
+    if data is None:
+        data = build()
+        cache.set(CACHE_KEY, data, CACHE_TIMEOUT)
+    return data
+
+
+def invalidate():
+    transaction.on_commit(lambda: cache.delete(CACHE_KEY))
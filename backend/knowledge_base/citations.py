@@ -0,0 +1,144 @@
+"""
+Cross-references between articles, extracted from LegalArticle.content.
+
+Mentions such as "Section 34 PPC", "sections 34 and 149 of the Pakistan Penal
+Code" or "under Article 10-A" are normalised with the citation rules in
+fuzzy.py and resolved through the in-memory reference map. A mention without
+a statute ("section 34", "of this Act") refers to the citing article's own
+code. Every citation is stored as an ArticleCitation edge; one that does not
+resolve yet keeps target empty and is linked when its article is saved.
+"""
+import re
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import references
+from .fuzzy import normalize_reference
+from .models import ArticleCitation, LegalArticle
+
+_NUMBER = r'\d+(?:-?(?-i:[A-Z]{1,2}))?\b'
+
+CITATION_RE = re.compile(
+    r'(?:\b(?P<unit>sections?|secs?|articles?|arts?)\b\.?|\b(?P<short>u/s|ss?\.))\s*'
+    r'(?P<numbers>' + _NUMBER + r'(?:\s*(?:,|and|&|or|to)\s*' + _NUMBER + r')*)',
+    re.IGNORECASE
+)
+NUMBER_RE = re.compile(_NUMBER, re.IGNORECASE)
+
+# What may follow the numbers to name the statute
+THIS_STATUTE_RE = re.compile(r'\s*,?\s*(?:of\s+)?this\s+(?:act|ordinance|code|order|constitution)\b', re.IGNORECASE)
+STATUTE_RE = re.compile(
+    r'\s*,?\s*(?:of\s+)?(?:the\s+)?((?:[A-Z][\w\'()-]*\s+(?:(?:of|for|and|on)\s+)?){0,7}?'
+    r'(?:Act|Ordinance|Code|Order|Rules|Constitution)\b)'
+)
+ACRONYM_RE = re.compile(r'\s*,?\s*(?:of\s+)?(?:the\s+)?((?:[A-Z][a-z]?\.?){2,6})(?!\w)')
+
+# Characters after the numbers examined for a statute name
+TRAILING_CONTEXT = 80
+MAX_CODE_WORDS = 6
+
+
+def _statute(trailing, codes):
+    """Normalised code named at the start of trailing text, or None if it names none"""
+    if THIS_STATUTE_RE.match(trailing):
+        return None
+
+    words = normalize_reference(trailing).split()
+    while words and words[0] in ('of', 'the'):
+        words = words[1:]
+    for length in range(min(MAX_CODE_WORDS, len(words)), 0, -1):
+        candidate = ' '.join(words[:length])
+        if candidate in codes:
+            return candidate
+
+    # A statute that is not in the corpus (yet): keep its name so the citation can be linked later
+    match = STATUTE_RE.match(trailing) or ACRONYM_RE.match(trailing)
+    if match:
+        return normalize_reference(match.group(1)) or None
+    return None
+
+
+def extract_citations(content, article_number, reference_map, codes=None):
+    """
+    {canonical reference: article id or None} for every citation in content,
+    excluding the article citing itself
+    """
+    if not content:
+        return {}
+    if codes is None:
+        codes = reference_map.codes()
+
+    source = normalize_reference(article_number)
+    source_unit, _, source_code = references.split_reference(source)
+
+    found = {}
+    for match in CITATION_RE.finditer(content):
+        unit = normalize_reference(match.group('unit') or match.group('short').replace('.', ''))
+        code = _statute(content[match.end():match.end() + TRAILING_CONTEXT], codes)
+        if code is None:
+            # Relative to the citing article's code, unless only one code is numbered in this unit
+            code = source_code if unit == source_unit else (reference_map.only_code(unit) or source_code)
+
+        for number in NUMBER_RE.findall(match.group('numbers')):
+            reference = ' '.join(part for part in (unit, normalize_reference(number), code) if part)
+            if reference != source and reference not in found:
+                found[reference] = reference_map.ids.get(reference)
+    return found
+
+
+LINK_SQL = """
+    UPDATE knowledge_base_articlecitation AS citation
+    SET target_id = NULL
+    FROM unnest(%s::bigint[], %s::varchar[]) AS article(id, reference)
+    WHERE citation.target_id = article.id AND citation.reference <> article.reference;
+
+    UPDATE knowledge_base_articlecitation AS citation
+    SET target_id = article.id
+    FROM unnest(%s::bigint[], %s::varchar[]) AS article(id, reference)
+    WHERE citation.reference = article.reference AND citation.target_id IS DISTINCT FROM article.id;
+"""
+
+
+def parse_articles(articles):
+    """
+    Replace the stored outgoing citations of saved articles (which need id,
+    article_number and content) and link waiting citations to them
+    """
+    if not articles:
+        return
+
+    reference_map = references.get_index()
+    codes = reference_map.codes()
+    # The batch itself may not be in the map until its transaction commits
+    batch_references = {normalize_reference(article.article_number): article.id for article in articles}
+    codes.update(references.split_reference(reference)[2] for reference in batch_references)
+    codes.discard('')
+
+    edges = []
+    for article in articles:
+        citations = extract_citations(article.content, article.article_number, reference_map, codes)
+        for reference, target_id in citations.items():
+            edges.append(ArticleCitation(
+                source_id=article.id,
+                target_id=target_id or batch_references.get(reference),
+                reference=reference[:ArticleCitation._meta.get_field('reference').max_length],
+            ))
+
+    article_ids = [article.id for article in articles]
+    with transaction.atomic():
+        # The map is per process, so drop targets deleted elsewhere rather than violate the foreign key
+        target_ids = {edge.target_id for edge in edges if edge.target_id}
+        existing = set(LegalArticle.objects.filter(id__in=target_ids).values_list('id', flat=True))
+        for edge in edges:
+            if edge.target_id not in existing:
+                edge.target_id = None
+
+        ArticleCitation.objects.filter(source_id__in=article_ids).delete()
+        ArticleCitation.objects.bulk_create(edges, batch_size=5000)
+        LegalArticle.objects.filter(id__in=article_ids).update(citations_parsed_at=timezone.now())
+
+        with connection.cursor() as cursor:
+            ids = list(batch_references.values())
+            keys = list(batch_references)
+            cursor.execute(LINK_SQL, [ids, keys, ids, keys])
@@ -0,0 +1,393 @@
+"""
+Compiled, memory-mapped form of the search index.
+
+compile_index() builds the in-process index (search.py) once and writes it to
+a single binary file: the sorted term dictionary, per-term posting lists, the
+per-document BM25F field weights and each article's stored fields. Workers
+mmap the file read-only, so the operating system shares its pages between
+processes and per-worker memory does not grow with the corpus; ranked
+search, snippets and facets are then answered without querying Postgres.
+
+Only the BM25 search index is compiled. The trigram (fuzzy.py), autocomplete
+and reference (references.py) indexes are still built in each worker's
+memory; they hold short fields (numbers, titles, keywords), not content, so
+they are a small fraction of the per-worker footprint this file removes.
+
+A new file is written next to the old one and swapped in with os.replace();
+workers notice the new file within RELOAD_INTERVAL seconds and map it, while
+requests already running keep reading the previous mapping.
+
+File layout: a 24-byte preamble (MAGIC, header offset, header length), the
+sections as raw little-endian arrays aligned to 8 bytes, then a JSON header
+describing the sections, the corpus statistics and the category names.
+"""
+import bisect
+import json
+import logging
+import math
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from array import array
+from datetime import datetime, timezone as dt_timezone
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+
+from .analysis import analyze_query
+from .search import (
+    CONTENT_OFFSET, COMMON_TERM_MIN_DOCS, COMMON_TERM_RATIO, FIELDS, K1, MAX_PREFIX_EXPANSIONS, SearchResult
+)
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'KBINDEX1'
+PREAMBLE = struct.Struct('<8sQQ')
+
+# Stored fields of every document, in the order their text is laid out
+STORED_FIELDS = ('title', 'article_number', 'keywords', 'content')
+
+# Seconds between checks for a newly compiled file
+RELOAD_INTERVAL = 5
+
+# Section name -> dtype; shapes are recorded in the header
+SECTIONS = {
+    'doc_ids': '<i8',
+    'doc_categories': '<i8',
+    'doc_created': '<i8',          # created_at, microseconds since the epoch
+    'doc_norms': '<f8',            # (documents, fields) boost / length normalisation
+    'doc_text_offsets': '<i8',     # documents * stored fields + 1 byte offsets into doc_text
+    'doc_text': 'u1',              # UTF-8
+    'term_offsets': '<i8',         # terms + 1 byte offsets into term_text
+    'term_text': 'u1',             # UTF-8, sorted
+    'term_postings': '<i8',        # terms + 1 offsets into the posting arrays
+    'posting_docs': '<i4',         # document row, ascending within a term
+    'posting_tfs': '<u2',          # (postings, fields) term frequencies
+    'posting_offsets': '<i4',      # first content offset of the term, -1 if absent
+}
+
+
+class _Terms:
+    """Sequence view of the sorted term dictionary as UTF-8 bytes, for bisect"""
+
+    def __init__(self, offsets, text):
+        self.offsets = offsets
+        self.text = text
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, position):
+        return self.text[self.offsets[position]:self.offsets[position + 1]].tobytes()
+
+
+class CompiledIndex:
+    """Read-only search index over a memory-mapped compiled file"""
+
+    def __init__(self, buffer, header, identity=None):
+        self._buffer = buffer
+        self.header = header
+        self.identity = identity
+        self.categories = {int(category_id): name for category_id, name in header['categories'].items()}
+        for name, (offset, shape) in header['sections'].items():
+            count = int(np.prod(shape))
+            setattr(self, name, np.frombuffer(buffer, dtype=SECTIONS[name], count=count, offset=offset).reshape(shape))
+        self.terms = _Terms(self.term_offsets, self.term_text)
+
+    @classmethod
+    def open(cls, path):
+        with open(path, 'rb') as handle:
+            stat = os.fstat(handle.fileno())
+            buffer = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, header_offset, header_length = PREAMBLE.unpack_from(buffer)
+        if magic != MAGIC:
+            raise ValueError(f'{path} is not a compiled knowledge base index')
+        header = json.loads(buffer[header_offset:header_offset + header_length])
+        return cls(buffer, header, identity=(stat.st_dev, stat.st_ino, stat.st_mtime_ns))
+
+    def __len__(self):
+        return len(self.doc_ids)
+
+    def _term_id(self, term):
+        encoded = term.encode('utf-8')
+        position = bisect.bisect_left(self.terms, encoded)
+        if position < len(self.terms) and self.terms[position] == encoded:
+            return position
+        return None
+
+    def _row(self, doc_id):
+        row = int(np.searchsorted(self.doc_ids, doc_id))
+        if row < len(self.doc_ids) and self.doc_ids[row] == doc_id:
+            return row
+        return None
+
+    def expand_prefix(self, prefix):
+        encoded = prefix.encode('utf-8')
+        position = bisect.bisect_left(self.terms, encoded)
+        expansions = []
+        for term_id in range(position, min(position + MAX_PREFIX_EXPANSIONS, len(self.terms))):
+            term = self.terms[term_id]
+            if not term.startswith(encoded):
+                break
+            expansions.append(term.decode('utf-8'))
+        return expansions
+
+    def query_terms(self, query):
+        terms = list(analyze_query(query))
+        if not terms:
+            return []
+
+        last = terms[-1]
+        if self._term_id(last) is None:
+            terms = terms[:-1] + self.expand_prefix(last)
+        return list(dict.fromkeys(terms))
+
+    def content_offsets(self, doc_id, terms):
+        row = self._row(doc_id)
+        if row is None:
+            return []
+        offsets = []
+        for term in terms:
+            term_id = self._term_id(term)
+            if term_id is None:
+                continue
+            start, end = self.term_postings[term_id], self.term_postings[term_id + 1]
+            docs = self.posting_docs[start:end]
+            position = int(np.searchsorted(docs, row))
+            if position < len(docs) and docs[position] == row:
+                offset = int(self.posting_offsets[start + position])
+                if offset >= 0:
+                    offsets.append(offset)
+        return offsets
+
+    def _term_scores(self, term_id):
+        """(document rows, BM25 scores) of the documents containing a term"""
+        start, end = self.term_postings[term_id], self.term_postings[term_id + 1]
+        docs = self.posting_docs[start:end]
+        idf = math.log(1 + (len(self) - len(docs) + 0.5) / (len(docs) + 0.5))
+        tf = (self.posting_tfs[start:end] * self.doc_norms[docs]).sum(axis=1)
+        return docs, idf * tf * (K1 + 1) / (tf + K1)
+
+    def search(self, query, category_id=None, limit=None):
+        """Same ranking and facets as InvertedIndex.search"""
+        term_ids = [term_id for term_id in map(self._term_id, self.query_terms(query)) if term_id is not None]
+        if not term_ids:
+            return SearchResult(0, [], [])
+
+        tables = [self._term_scores(term_id) for term_id in term_ids]
+        cutoff = max(COMMON_TERM_MIN_DOCS, len(self) * COMMON_TERM_RATIO)
+        rare = [table for table in tables if len(table[0]) <= cutoff]
+        common = [table for table in tables if len(table[0]) > cutoff]
+        if not rare:
+            rare, common = common, []
+
+        scores = np.zeros(len(self))
+        matched = np.zeros(len(self), dtype=bool)
+        for docs, term_scores in rare:
+            scores[docs] += term_scores
+            matched[docs] = True
+        for docs, term_scores in common:
+            keep = matched[docs]
+            scores[docs[keep]] += term_scores[keep]
+
+        rows = np.flatnonzero(matched)
+        categories = self.doc_categories[rows]
+        values, counts = np.unique(categories, return_counts=True)
+        order = np.argsort(-counts, kind='stable')
+        facets = [(int(values[position]), int(counts[position])) for position in order]
+
+        if category_id is not None:
+            rows = rows[categories == int(category_id)]
+        total = len(rows)
+
+        row_scores = scores[rows]
+        if limit is not None and limit < len(rows):
+            # Keep everything tied with the limit-th score so ties still break by id
+            threshold = -np.partition(-row_scores, limit - 1)[limit - 1]
+            keep = row_scores >= threshold
+            rows, row_scores = rows[keep], row_scores[keep]
+        doc_ids = self.doc_ids[rows]
+        ranked = np.lexsort((doc_ids, -row_scores))[:limit]
+        return SearchResult(
+            total,
+            [(int(doc_ids[position]), float(row_scores[position])) for position in ranked],
+            facets
+        )
+
+    def stored_fields(self, doc_id):
+        """{field: text} of the document's stored fields, plus category and created_at"""
+        row = self._row(doc_id)
+        if row is None:
+            return None
+        first = row * len(STORED_FIELDS)
+        offsets = self.doc_text_offsets[first:first + len(STORED_FIELDS) + 1]
+        fields = {
+            field: self.doc_text[offsets[position]:offsets[position + 1]].tobytes().decode('utf-8')
+            for position, field in enumerate(STORED_FIELDS)
+        }
+        fields['category'] = int(self.doc_categories[row])
+        fields['created_at'] = datetime.fromtimestamp(int(self.doc_created[row]) / 1e6, tz=dt_timezone.utc)
+        return fields
+
+    def articles(self, windows):
+        """
+        {id: unsaved LegalArticle} for {id: (start, length)} content windows,
+        with the window as the `snippet` attribute, for the summary serializers
+        """
+        from .models import LegalArticle, LegalCategory
+
+        articles = {}
+        for doc_id, (start, length) in windows.items():
+            fields = self.stored_fields(doc_id)
+            if fields is None:
+                continue
+            category_id = fields.pop('category')
+            article = LegalArticle(id=doc_id, category=LegalCategory(id=category_id, name=self.categories.get(category_id, '')))
+            content = fields.pop('content')
+            for field, value in fields.items():
+                setattr(article, field, value)
+            article.snippet = content[start:start + length]
+            articles[doc_id] = article
+        return articles
+
+
+def _write_section(handle, sections, name, data, shape=None):
+    data = np.ascontiguousarray(data, dtype=SECTIONS[name])
+    handle.write(b'\0' * (-handle.tell() % 8))
+    sections[name] = (handle.tell(), list(shape or data.shape))
+    handle.write(data.tobytes())
+
+
+def compile_index(path):
+    """Compile every LegalArticle into an index file at path, replacing any existing one atomically"""
+    from .models import LegalArticle, LegalCategory
+    from .search import build_index
+
+    compiled_at = timezone.now()
+    index = build_index()
+    norms = index._field_norms()
+    doc_ids = sorted(index.doc_lengths)
+    rows = {doc_id: row for row, doc_id in enumerate(doc_ids)}
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    handle = tempfile.NamedTemporaryFile(dir=directory, prefix='.compiling-', delete=False)
+    try:
+        with handle:
+            sections = {}
+            handle.write(PREAMBLE.pack(MAGIC, 0, 0))
+
+            _write_section(handle, sections, 'doc_ids', doc_ids)
+            _write_section(handle, sections, 'doc_categories', [index.doc_category[doc_id] for doc_id in doc_ids])
+            _write_section(handle, sections, 'doc_norms', [norms[doc_id] for doc_id in doc_ids], (len(doc_ids), len(FIELDS)))
+
+            # Stored fields, streamed from the database in id order
+            created = array('q', bytes(8 * len(doc_ids)))
+            text_offsets = array('q', [0])
+            handle.write(b'\0' * (-handle.tell() % 8))
+            text_start = handle.tell()
+            stored = LegalArticle.objects.filter(id__in=doc_ids).order_by('id').values_list(
+                'id', 'created_at', *STORED_FIELDS
+            ).iterator(chunk_size=2000)
+            written = 0
+            for doc_id, created_at, *values in stored:
+                row = rows[doc_id]
+                while len(text_offsets) < row * len(STORED_FIELDS) + 1:
+                    # Deleted since the index was built: no stored text
+                    text_offsets.append(written)
+                created[row] = int(created_at.timestamp() * 1e6)
+                for value in values:
+                    data = (value or '').encode('utf-8')
+                    handle.write(data)
+                    written += len(data)
+                    text_offsets.append(written)
+            while len(text_offsets) < len(doc_ids) * len(STORED_FIELDS) + 1:
+                text_offsets.append(written)
+            sections['doc_text'] = (text_start, [written])
+            _write_section(handle, sections, 'doc_text_offsets', text_offsets)
+            _write_section(handle, sections, 'doc_created', created)
+
+            terms = index.vocabulary
+            term_text = bytearray()
+            term_offsets = array('q', [0])
+            term_postings = array('q', [0])
+            posting_docs = array('i')
+            posting_tfs = array('H')
+            posting_offsets = array('i')
+            for term in terms:
+                term_text += term.encode('utf-8')
+                term_offsets.append(len(term_text))
+                for row, tfs in sorted((rows[doc_id], tfs) for doc_id, tfs in index.postings[term].items()):
+                    posting_docs.append(row)
+                    posting_tfs.extend(min(count, 0xffff) for count in tfs[:CONTENT_OFFSET])
+                    posting_offsets.append(tfs[CONTENT_OFFSET])
+                term_postings.append(len(posting_docs))
+
+            _write_section(handle, sections, 'term_offsets', term_offsets)
+            _write_section(handle, sections, 'term_text', np.frombuffer(bytes(term_text), dtype='u1'))
+            _write_section(handle, sections, 'term_postings', term_postings)
+            _write_section(handle, sections, 'posting_docs', posting_docs)
+            _write_section(handle, sections, 'posting_tfs', posting_tfs, (len(posting_docs), len(FIELDS)))
+            _write_section(handle, sections, 'posting_offsets', posting_offsets)
+
+            header = json.dumps({
+                'compiled_at': compiled_at.isoformat(),
+                'documents': len(doc_ids),
+                'terms': len(terms),
+                'postings': len(posting_docs),
+                'categories': dict(LegalCategory.objects.values_list('id', 'name')),
+                'sections': sections,
+            }).encode('utf-8')
+            header_offset = handle.tell()
+            handle.write(header)
+            handle.seek(0)
+            handle.write(PREAMBLE.pack(MAGIC, header_offset, len(header)))
+            handle.flush()
+            os.fsync(handle.fileno())
+
+        os.chmod(handle.name, 0o644)
+        os.replace(handle.name, path)
+    except BaseException:
+        if os.path.exists(handle.name):
+            os.remove(handle.name)
+        raise
+    return CompiledIndex.open(path)
+
+
+_index = None
+_index_lock = threading.Lock()
+_checked_at = None
+_missing_logged = False
+
+
+def get_index():
+    """
+    Process-wide mapping of KNOWLEDGE_BASE_COMPILED_INDEX, re-opened when a
+    newly compiled file has been swapped in; None while no file exists
+    """
+    global _index, _checked_at, _missing_logged
+    now = time.monotonic()
+    if _checked_at is not None and now - _checked_at < RELOAD_INTERVAL:
+        return _index
+
+    with _index_lock:
+        if _checked_at is not None and now - _checked_at < RELOAD_INTERVAL:
+            return _index
+        path = settings.KNOWLEDGE_BASE_COMPILED_INDEX
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            if not _missing_logged:
+                logger.warning('No compiled knowledge base index at %s; run compile_search_index', path)
+                _missing_logged = True
+        else:
+            if _index is None or _index.identity != (stat.st_dev, stat.st_ino, stat.st_mtime_ns):
+                # The previous mapping is released once the last request using it finishes
+                _index = CompiledIndex.open(path)
+                _missing_logged = False
+        _checked_at = now
+    return _index
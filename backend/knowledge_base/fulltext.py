@@ -0,0 +1,70 @@
+"""
+Postgres full-text search backend for LegalArticle.
+
+Articles carry a stored, weighted tsvector (title A, article_number B,
+keywords C, content D) that a database trigger keeps current, backed by a GIN
+index. Ranked hits and per-category facet counts come back in one query.
+"""
+import json
+
+from django.contrib.postgres.search import SearchQuery
+from django.db import connection
+
+from .search import SearchResult
+
+SEARCH_CONFIG = 'english'
+
+SEARCH_SQL = """
+    WITH query AS (
+        SELECT websearch_to_tsquery(%(config)s::regconfig, %(query)s) AS q
+    ),
+    matches AS (
+        SELECT a.id, a.category_id, ts_rank(a.search_vector, query.q) AS rank
+        FROM knowledge_base_legalarticle a, query
+        WHERE a.search_vector @@ query.q
+    ),
+    facets AS (
+        SELECT
+            COALESCE(json_agg(json_build_array(category_id, n) ORDER BY n DESC, category_id), '[]') AS facets,
+            COALESCE(SUM(n) FILTER (
+                WHERE %(category)s::bigint IS NULL OR category_id = %(category)s::bigint
+            ), 0) AS total
+        FROM (SELECT category_id, COUNT(*) AS n FROM matches GROUP BY category_id) counts
+    )
+    SELECT facets.facets, facets.total, hits.id, hits.rank
+    FROM facets
+    LEFT JOIN LATERAL (
+        SELECT id, rank FROM matches
+        WHERE %(category)s::bigint IS NULL OR category_id = %(category)s::bigint
+        ORDER BY rank DESC, id
+        LIMIT %(limit)s
+    ) hits ON TRUE
+    ORDER BY hits.rank DESC NULLS LAST, hits.id
+"""
+
+
+def search_query(text):
+    """SearchQuery matching the stored vector, for use in ORM filters"""
+    return SearchQuery(text, config=SEARCH_CONFIG, search_type='websearch')
+
+
+def search_articles(query, category_id=None, limit=None):
+    """Ranked SearchResult for query using ts_rank over the GIN-indexed vector"""
+    if not query or not query.strip():
+        return SearchResult(0, [], [])
+
+    with connection.cursor() as cursor:
+        cursor.execute(SEARCH_SQL, {
+            'config': SEARCH_CONFIG,
+            'query': query,
+            'category': int(category_id) if category_id is not None else None,
+            'limit': limit,
+        })
+        rows = cursor.fetchall()
+
+    facets, total = rows[0][0], rows[0][1]
+    if isinstance(facets, str):
+        facets = json.loads(facets)
+
+    hits = [(row[2], row[3]) for row in rows if row[2] is not None]
+    return SearchResult(int(total), hits, [tuple(facet) for facet in facets])
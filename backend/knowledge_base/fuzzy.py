@@ -0,0 +1,234 @@
+"""
+Typo-tolerant lookup over LegalArticle.article_number and title.
+
+Both fields are normalised (section/article abbreviations, statute short
+names, punctuation) and broken into pg_trgm-style character trigrams. A query
+is scored by the share of its trigrams found in an entry, which tolerates
+misspellings such as "Qisaas" and shorthand such as "s.302 ppc".
+
+Candidates come only from the postings of the query's rarest trigrams (prefix
+filtering): an entry reaching the similarity threshold must share at least one
+of them, so lookups never walk the whole corpus.
+"""
+import heapq
+import math
+import re
+import threading
+from collections import defaultdict
+
+from .index_version import ProcessIndex, reread_articles
+
+
+# Shorthand users type for the words used in article_number values
+ABBREVIATIONS = {
+    's': 'section',
+    'sec': 'section',
+    'sect': 'section',
+    'secs': 'section',
+    'ss': 'section',
+    'us': 'section',
+    'section': 'section',
+    'sections': 'section',
+    'art': 'article',
+    'arts': 'article',
+    'article': 'article',
+    'articles': 'article',
+    'cl': 'clause',
+    'o': 'order',
+    'r': 'rule',
+    'pakistan penal code': 'ppc',
+    'penal code': 'ppc',
+    'code of criminal procedure': 'crpc',
+    'criminal procedure code': 'crpc',
+    'cr pc': 'crpc',
+    'code of civil procedure': 'cpc',
+    'muslim family laws ordinance': 'mflo',
+    'const': 'constitution',
+    'constitution of pakistan': 'constitution',
+}
+
+# Multi-word phrases are replaced before single tokens
+_PHRASES = sorted((key for key in ABBREVIATIONS if ' ' in key), key=len, reverse=True)
+
+# "u/s", "s.302", "art.10-a": slashes and dots separate tokens
+_SEPARATOR_RE = re.compile(r'[/.,;:()\[\]]+')
+# "s302", "section302", "302ppc": split letters from digits
+_ALPHA_DIGIT_RE = re.compile(r'(?<=[a-z])(?=\d)|(?<=\d)(?=[a-z]{2,})')
+_NON_WORD_RE = re.compile(r'[^\w\s-]+', re.UNICODE)
+_SPACE_RE = re.compile(r'\s+')
+
+# Minimum share of query trigrams an entry must contain to be returned
+DEFAULT_THRESHOLD = 0.5
+DEFAULT_LIMIT = 10
+
+FIELDS = ('article_number', 'title')
+
+
+def normalize_reference(text):
+    """
+    Canonical lowercase form of a citation or title.
+
+    "Sec. 302 P.P.C", "s.302 ppc" and "u/s 302 PPC" all become "section 302 ppc";
+    "Art 10A" becomes "article 10a".
+    """
+    if not text:
+        return ''
+
+    text = text.lower().replace("'", '').replace('\u2019', '')
+    # Collapse dotted initialisms such as "p.p.c." or "cr.p.c." before splitting on dots
+    text = re.sub(r'\b(?:[a-z]\.){2,}', lambda match: match.group(0).replace('.', ''), text)
+    text = re.sub(r'\bcr\.?\s*pc\b', 'crpc', text)
+    text = text.replace('u/s', ' us ')
+    text = _SEPARATOR_RE.sub(' ', text)
+    text = _NON_WORD_RE.sub(' ', text)
+    # "10-a" and "10 a" are the same article as "10a"; other hyphens split words
+    text = re.sub(r'(\d)\s*-\s*([a-z])\b', r'\1\2', text)
+    text = re.sub(r'(\d) ([a-z])\b', r'\1\2', text)
+    text = text.replace('-', ' ')
+    text = _ALPHA_DIGIT_RE.sub(' ', text)
+    text = _SPACE_RE.sub(' ', text).strip()
+
+    for phrase in _PHRASES:
+        if phrase in text:
+            text = re.sub(r'\b%s\b' % re.escape(phrase), ABBREVIATIONS[phrase], text)
+
+    return ' '.join(ABBREVIATIONS.get(token, token) for token in text.split())
+
+
+def trigrams(text):
+    """pg_trgm-style trigram set: every word padded with two leading and one trailing space"""
+    grams = set()
+    for word in text.split():
+        padded = '  %s ' % word
+        for position in range(len(padded) - 2):
+            grams.add(padded[position:position + 3])
+    return grams
+
+
+class TrigramIndex:
+    """Trigram postings over (article_id, field) entries"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.postings = defaultdict(set)
+        self.entries = {}
+
+    def __len__(self):
+        return len({article_id for article_id, _ in self.entries})
+
+    def add(self, article_id, article_number='', title=''):
+        with self._lock:
+            self._remove(article_id)
+            for field_index, value in enumerate((article_number, title)):
+                grams = frozenset(trigrams(normalize_reference(value)))
+                if not grams:
+                    continue
+                key = (article_id, field_index)
+                self.entries[key] = grams
+                for gram in grams:
+                    self.postings[gram].add(key)
+
+    def remove(self, article_id):
+        with self._lock:
+            self._remove(article_id)
+
+    def _remove(self, article_id):
+        for field_index in range(len(FIELDS)):
+            key = (article_id, field_index)
+            grams = self.entries.pop(key, None)
+            if grams is None:
+                continue
+            for gram in grams:
+                postings = self.postings.get(gram)
+                if postings is None:
+                    continue
+                postings.discard(key)
+                if not postings:
+                    del self.postings[gram]
+
+    def lookup(self, query, limit=DEFAULT_LIMIT, threshold=DEFAULT_THRESHOLD):
+        """
+        Top matches for query as [(article_id, similarity, field), ...] best first.
+
+        similarity is the share of query trigrams present in the entry; ties are
+        broken by overall (Jaccard) similarity so closer strings rank first.
+        """
+        normalized = normalize_reference(query)
+        query_grams = trigrams(normalized)
+        if not query_grams:
+            return []
+
+        # Section and article numbers are not typo-tolerant: "s.302" must not match section 320
+        number_grams = trigrams(' '.join(token for token in normalized.split() if token[0].isdigit()))
+
+        required = max(1, math.ceil(threshold * len(query_grams)))
+        if number_grams:
+            # Every candidate must contain all number trigrams, so the rarest one is enough
+            probes = [min(number_grams, key=lambda gram: len(self.postings.get(gram, ())))]
+        else:
+            # Any entry sharing `required` trigrams must contain one of these
+            probe_count = len(query_grams) - required + 1
+            probes = sorted(query_grams, key=lambda gram: len(self.postings.get(gram, ())))[:probe_count]
+
+        candidates = set()
+        for gram in probes:
+            candidates.update(self.postings.get(gram, ()))
+
+        best = {}
+        for key in candidates:
+            grams = self.entries.get(key)
+            if grams is None:
+                continue
+            if not number_grams <= grams:
+                continue
+            shared = len(query_grams & grams)
+            if shared < required:
+                continue
+            similarity = shared / len(query_grams)
+            jaccard = shared / (len(query_grams) + len(grams) - shared)
+            article_id, field_index = key
+            score = (similarity, jaccard)
+            if article_id not in best or score > best[article_id][0]:
+                best[article_id] = (score, FIELDS[field_index])
+
+        ranked = heapq.nlargest(limit, best.items(), key=lambda item: (item[1][0], -item[0]))
+        return [(article_id, round(score[0], 4), field) for article_id, (score, field) in ranked]
+
+
+def build_index():
+    from .models import LegalArticle
+
+    index = TrigramIndex()
+    rows = LegalArticle.objects.values_list('id', 'article_number', 'title').iterator(chunk_size=5000)
+    for article_id, article_number, title in rows:
+        index.add(article_id, article_number, title)
+    return index
+
+
+def update_index(index, article_ids):
+    """Re-read changed articles into index"""
+    reread_articles(article_ids, ('article_number', 'title'), index.add, index.remove)
+
+
+_index = ProcessIndex(build_index, update_index)
+
+
+def get_index():
+    """Process-wide trigram index, built from the database on first use and updated after writes elsewhere"""
+    return _index.get()
+
+
+def index_article(article):
+    index = _index.index
+    if index is not None:
+        index.add(article.id, article.article_number, article.title)
+
+
+def unindex_article(article_id):
+    index = _index.index
+    if index is not None:
+        index.remove(article_id)
+
+
+def fuzzy_lookup(query, limit=DEFAULT_LIMIT, threshold=DEFAULT_THRESHOLD):
+    return get_index().lookup(query, limit=limit, threshold=threshold)
@@ -0,0 +1,103 @@
+"""
+Highlighted snippets for search hits.
+
+The in-memory index keeps the first content offset of every term (see
+search.py), measured in the raw article text rather than the char-filtered
+text, so the window for a hit is chosen from at most one offset per query
+term. Only that window is read from the database (a bounded SUBSTRING)
+and only that window is tokenised to mark the matches, so the cost per hit
+does not depend on the article's length.
+"""
+import re
+
+from django.conf import settings
+
+from .analysis import analyze, analyze_query
+
+# Characters of content read around the matches of a hit
+SNIPPET_WINDOW = 240
+
+# Characters kept before the first match in the window
+LEADING_CONTEXT = 60
+
+# Words as written, including combining marks, so Urdu with harakat stays one token
+WORD_RE = re.compile(r'[\w\u0300-\u036f\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed]+')
+
+
+class TermMatcher:
+    """Whether an analysed token is one of the query's terms (or completes its last one)"""
+
+    def __init__(self, query):
+        terms = analyze_query(query)
+        self.terms = frozenset(terms)
+        self.prefix = terms[-1] if terms else None
+
+    def __bool__(self):
+        return bool(self.terms)
+
+    def matches(self, term):
+        return term in self.terms or term.startswith(self.prefix)
+
+
+def window_start(offsets):
+    """Start of the SNIPPET_WINDOW that covers the most match offsets"""
+    if not offsets:
+        return 0
+    offsets = sorted(offsets)
+    span = SNIPPET_WINDOW - LEADING_CONTEXT
+    best, best_count, end = offsets[0], 0, 0
+    for position, offset in enumerate(offsets):
+        while end < len(offsets) and offsets[end] < offset + span:
+            end += 1
+        if end - position > best_count:
+            best, best_count = offset, end - position
+    return max(0, best - LEADING_CONTEXT)
+
+
+def snippet_starts(hits, query, index=None):
+    """
+    {article_id: window start} for [(article_id, score)] hits of query.
+
+    Offsets come from the search index that produced the hits (by default the
+    configured one); with the postgres backend there are none and every window
+    starts at the beginning of the article.
+    """
+    if index is None:
+        if getattr(settings, 'KNOWLEDGE_BASE_SEARCH_BACKEND', 'memory') == 'postgres':
+            return {article_id: 0 for article_id, _ in hits}
+
+        from .search import get_backend_index
+        index = get_backend_index()
+
+    terms = index.query_terms(query)
+    return {
+        article_id: window_start(index.content_offsets(article_id, terms))
+        for article_id, _ in hits
+    }
+
+
+def build_snippet(window, start, matcher):
+    """
+    Trim a window read from offset start to whole words and locate the matches.
+
+    Returns (snippet, highlights) where highlights are [start, end] character
+    ranges of matched words within snippet.
+    """
+    if not window:
+        return '', []
+
+    text = window
+    leading = trailing = ''
+    if start > 0 and ' ' in text:
+        text = text[text.find(' ') + 1:]
+        leading = '…'
+    if len(window) >= SNIPPET_WINDOW and ' ' in text:
+        text = text[:text.rfind(' ')].rstrip(' ,;:')
+        trailing = '…'
+
+    highlights = []
+    if matcher:
+        for match in WORD_RE.finditer(text):
+            if any(matcher.matches(term) for term in analyze(match.group())):
+                highlights.append([len(leading) + match.start(), len(leading) + match.end()])
+    return leading + text + trailing, highlights
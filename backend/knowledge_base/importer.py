@@ -0,0 +1,233 @@
+"""
+Streaming readers and batched upserts for loading statute corpora.
+
+Readers yield one dict per article without holding the file in memory.
+upsert_articles() writes a batch with a single
+INSERT ... ON CONFLICT (article_number) DO UPDATE over unnest()ed arrays, then
+does the work the post_save signals would have done for each written row:
+keyword links, citations and the in-process indexes. search_vector is filled
+by its trigger.
+"""
+import csv
+import json
+import re
+
+from django.db import connection, transaction
+
+from . import autocomplete, fuzzy, index_version, references, search
+from .categories import invalidate as invalidate_category_counts
+from .citations import parse_articles as parse_citations
+from .keywords import parse_keywords, sync_keywords_bulk
+from .models import LegalArticle, LegalCategory
+
+FORMATS = ('jsonl', 'csv', 'txt')
+
+TITLE_LENGTH = LegalArticle._meta.get_field('title').max_length
+NUMBER_LENGTH = LegalArticle._meta.get_field('article_number').max_length
+KEYWORDS_LENGTH = LegalArticle._meta.get_field('keywords').max_length
+
+# Section headings in plain-text codes, e.g. "302. Punishment for qatl-i-amd.—Whoever ..."
+# or "Article 10A. Right to fair trial": number, heading, then (after a dash) body text
+HEADING_RE = re.compile(
+    r'^\s*(?:(?:section|article|sec\.|art\.)\s*)?(\d+(?:-?[a-z]{1,2})?)\.\s+([^—–]+?)[.:]?(?:\s*[—–]+\s*(.*))?\s*$',
+    re.IGNORECASE
+)
+
+
+def detect_format(path):
+    extension = path.rsplit('.', 1)[-1].lower()
+    if extension in ('jsonl', 'ndjson'):
+        return 'jsonl'
+    if extension in FORMATS:
+        return extension
+    raise ValueError(f'Cannot tell the format of {path} from its extension')
+
+
+def read_jsonl(handle, **options):
+    """
+    One JSON object per line with article_number, title, content, keywords and
+    category. A malformed line is yielded as a ValueError so the import can
+    count it and carry on.
+    """
+    for line_number, line in enumerate(handle, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as error:
+            yield ValueError(f'line {line_number}: {error}')
+
+
+def read_csv(handle, **options):
+    """CSV with a header row naming the same columns as the JSONL format"""
+    yield from csv.DictReader(handle)
+
+
+def read_text(handle, unit='Section', code='', **options):
+    """
+    A plain-text code where every section starts on a line of its own with
+    "<number>. <heading>". article_number is built as "<unit> <number> <code>",
+    e.g. "Section 302 PPC".
+    """
+    record = None
+    body = []
+
+    for line in handle:
+        match = HEADING_RE.match(line)
+        if match:
+            if record is not None:
+                record['content'] = '\n'.join(body).strip()
+                yield record
+            number, heading, rest = match.groups()
+            record = {
+                'article_number': ' '.join(part for part in (unit, number.upper().replace('-', ''), code) if part),
+                'title': heading.strip(),
+            }
+            body = [rest] if rest else []
+        elif record is not None:
+            body.append(line.rstrip())
+
+    if record is not None:
+        record['content'] = '\n'.join(body).strip()
+        yield record
+
+
+READERS = {
+    'jsonl': read_jsonl,
+    'csv': read_csv,
+    'txt': read_text,
+}
+
+
+def clean_record(record, default_category=None):
+    """Validated LegalArticle field values from a raw record; raises ValueError"""
+    if isinstance(record, Exception):
+        raise record
+
+    article_number = ' '.join(str(record.get('article_number') or '').split())
+    if not article_number:
+        raise ValueError('missing article_number')
+    if len(article_number) > NUMBER_LENGTH:
+        raise ValueError(f'article_number longer than {NUMBER_LENGTH} characters: {article_number[:60]}')
+
+    category = ' '.join(str(record.get('category') or default_category or '').split())
+    if not category:
+        raise ValueError(f'{article_number}: no category and no --category default')
+
+    keywords = record.get('keywords') or ''
+    if isinstance(keywords, (list, tuple)):
+        keywords = ', '.join(str(keyword) for keyword in keywords)
+    # Drop whole keywords rather than cut one in half
+    kept = []
+    for keyword in parse_keywords(keywords):
+        if len(', '.join(kept + [keyword])) > KEYWORDS_LENGTH:
+            break
+        kept.append(keyword)
+
+    return {
+        'article_number': article_number,
+        'title': ' '.join(str(record.get('title') or article_number).split())[:TITLE_LENGTH],
+        'content': str(record.get('content') or '').strip(),
+        'keywords': ', '.join(kept),
+        'category': category,
+    }
+
+
+class CategoryResolver:
+    """Category name -> id, loaded once and extended in bulk as new names appear"""
+
+    def __init__(self, create=True):
+        self.create = create
+        self.ids = {name.lower(): category_id for category_id, name in LegalCategory.objects.values_list('id', 'name')}
+
+    def resolve(self, names):
+        missing = {name for name in names if name.lower() not in self.ids}
+        if missing:
+            if not self.create:
+                raise ValueError(f'Unknown categories: {", ".join(sorted(missing))}')
+            LegalCategory.objects.bulk_create([LegalCategory(name=name) for name in missing], ignore_conflicts=True)
+            self.ids.update(
+                (name.lower(), category_id)
+                for category_id, name in LegalCategory.objects.filter(name__in=missing).values_list('id', 'name')
+            )
+        return {name: self.ids[name.lower()] for name in names}
+
+
+def refresh_indexes(articles, versions):
+    """
+    Patch this process's indexes now; other workers re-read the articles when
+    the versions the batch was written at reach them
+    """
+    for article in articles:
+        search.index_article(article)
+        fuzzy.index_article(article)
+        autocomplete.index_article(article)
+        references.index_article(article)
+    index_version.record_applied(versions, [article.id for article in articles])
+
+
+# Rows whose fields are all unchanged are left alone, so re-running an
+# import does not rewrite them (or recompute their search_vector)
+UPSERT_SQL = """
+    INSERT INTO knowledge_base_legalarticle
+        (article_number, title, content, keywords, category_id, created_at, updated_at)
+    SELECT row.*, now(), now()
+    FROM unnest(%s::varchar[], %s::varchar[], %s::text[], %s::varchar[], %s::bigint[])
+        AS row(article_number, title, content, keywords, category_id)
+    ON CONFLICT (article_number) DO UPDATE SET
+        title = EXCLUDED.title,
+        content = EXCLUDED.content,
+        keywords = EXCLUDED.keywords,
+        category_id = EXCLUDED.category_id,
+        updated_at = EXCLUDED.updated_at
+    WHERE (knowledge_base_legalarticle.title, knowledge_base_legalarticle.content,
+           knowledge_base_legalarticle.keywords, knowledge_base_legalarticle.category_id)
+        IS DISTINCT FROM (EXCLUDED.title, EXCLUDED.content, EXCLUDED.keywords, EXCLUDED.category_id)
+    RETURNING id, article_number
+"""
+
+
+def upsert_articles(records, categories):
+    """
+    Insert or update a batch of cleaned records by article_number in one
+    statement and return the LegalArticle objects that were written (rows
+    identical to what is stored are skipped). A later record wins over an
+    earlier one with the same article_number.
+    """
+    by_number = {record['article_number']: record for record in records}
+    if not by_number:
+        return []
+
+    category_ids = categories.resolve({record['category'] for record in by_number.values()})
+    rows = list(by_number.values())
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(UPSERT_SQL, [
+                [record['article_number'] for record in rows],
+                [record['title'] for record in rows],
+                [record['content'] for record in rows],
+                [record['keywords'] for record in rows],
+                [category_ids[record['category']] for record in rows],
+            ])
+            written = cursor.fetchall()
+        versions = index_version.written_versions()
+
+        articles = []
+        for article_id, article_number in written:
+            record = by_number[article_number]
+            articles.append(LegalArticle(
+                id=article_id,
+                article_number=article_number,
+                title=record['title'],
+                content=record['content'],
+                keywords=record['keywords'],
+                category_id=category_ids[record['category']],
+            ))
+        sync_keywords_bulk(articles)
+        parse_citations(articles)
+        transaction.on_commit(lambda: refresh_indexes(articles, versions))
+        if articles:
+            invalidate_category_counts()
+    return articles
@@ -0,0 +1,212 @@
+"""
+Keeps each worker's in-process indexes in step with articles written elsewhere.
+
+search.py, fuzzy.py, autocomplete.py and references.py each hold a process-wide
+index. Saves and deletes in the same process patch it through signals, but a
+write from another gunicorn worker, import_statutes or a shell never reaches
+it. A trigger on knowledge_base_legalarticle (migration 0013) gives the single
+IndexVersion row a new version for every statement that writes articles and
+logs the ids it wrote as ArticleChange rows.
+
+ProcessIndex remembers the version its index is current to, reads the row at
+most once every CHECK_INTERVAL seconds and, when it has moved on, re-reads
+only the articles logged since. Changes the process patched in itself (see
+record_applied) are skipped, so a worker's own saves cost it nothing more.
+The whole index is built only on first use, after a TRUNCATE, when the log
+has been pruned past the index's version (the trigger keeps a day of it), or
+when another process has rewritten so much of the corpus that a build is
+cheaper than the catch-up.
+
+Inside a transaction that has written articles, the changes it logged may
+still roll back. They are read in, so the transaction sees its own writes, but
+the index stays at the version before them and those articles are read again
+once the transaction is over.
+"""
+import threading
+import time
+
+from django.db import connection
+
+# Seconds between reads of the version row, so a search does not query it on
+# every call; a write in another process is searchable after about this long
+CHECK_INTERVAL = 1
+
+# Articles re-read per query when catching up
+REREAD_BATCH = 5000
+
+# Catching up on more than this fraction of an index's articles rebuilds it instead
+REBUILD_FRACTION = 0.25
+
+STATE_SQL = """
+    SELECT version, pruned_through, current_setting('knowledge_base.pending_versions', true)
+    FROM knowledge_base_indexversion WHERE id = 1
+"""
+
+CHANGES_SQL = """
+    SELECT version, article_id FROM knowledge_base_articlechange
+    WHERE version > %s AND version <= %s
+"""
+
+# The versions this connection's writes were given since the last call, and a fresh list
+WRITTEN_VERSIONS_SQL = """
+    SELECT current_setting('knowledge_base.written_versions', true),
+        set_config('knowledge_base.written_versions', '', false)
+"""
+
+# {version: article ids} the process's signals have already patched into its indexes
+_applied = {}
+_applied_lock = threading.Lock()
+_instances = []
+
+
+def _versions(setting):
+    return [int(version) for version in setting.split(',')] if setting else []
+
+
+def current_state():
+    """(version, pruned_through, versions written by the current transaction)"""
+    with connection.cursor() as cursor:
+        cursor.execute(STATE_SQL)
+        row = cursor.fetchone()
+    if row is None:
+        return 0, 0, []
+    return row[0], row[1], _versions(row[2])
+
+
+def changed_articles(since, until):
+    """[(version, article_id)] logged in (since, until], or None if a TRUNCATE is among them"""
+    with connection.cursor() as cursor:
+        cursor.execute(CHANGES_SQL, [since, until])
+        changes = cursor.fetchall()
+    if any(article_id is None for _, article_id in changes):
+        return None
+    return changes
+
+
+def written_versions():
+    """Versions of the article writes made on this connection since the last call"""
+    with connection.cursor() as cursor:
+        cursor.execute(WRITTEN_VERSIONS_SQL)
+        return _versions(cursor.fetchone()[0])
+
+
+def record_applied(versions, article_ids):
+    """
+    Note that the process's own signals have patched article_ids, written at
+    versions (from written_versions), into its indexes after commit
+    """
+    with _applied_lock:
+        if connection.in_atomic_block:
+            # Run by hand before the commit (captureOnCommitCallbacks), so the patch may still roll back
+            for instance in _instances:
+                instance.dirty.update(article_ids)
+            return
+        built = [instance.version for instance in _instances if instance.index is not None]
+        if not built:
+            return
+        floor = min(built)
+        for version in versions:
+            if version > floor:
+                _applied.setdefault(version, set()).update(article_ids)
+        for instance in _instances:
+            instance.dirty.difference_update(article_ids)
+
+
+def reread_articles(article_ids, fields, add, remove):
+    """Call add(id, *fields) with each article's stored values and remove(id) for those deleted"""
+    from .models import LegalArticle
+
+    article_ids = sorted(article_ids)
+    for start in range(0, len(article_ids), REREAD_BATCH):
+        batch = article_ids[start:start + REREAD_BATCH]
+        found = set()
+        for row in LegalArticle.objects.filter(id__in=batch).values_list('id', *fields):
+            add(*row)
+            found.add(row[0])
+        for article_id in batch:
+            if article_id not in found:
+                remove(article_id)
+
+
+class ProcessIndex:
+    """
+    An index made by build(), kept current with update(index, article_ids),
+    which re-reads those articles into it
+    """
+
+    def __init__(self, build, update):
+        self.build = build
+        self.update = update
+        self.index = None
+        self.version = 0
+        # Articles read in from a transaction that had not committed them
+        self.dirty = set()
+        self.checked_at = 0
+        self.lock = threading.Lock()
+        _instances.append(self)
+
+    def get(self):
+        index = self.index
+        if index is not None and time.monotonic() - self.checked_at < CHECK_INTERVAL:
+            return index
+
+        # While one thread catches up, the others keep answering from the index as it is
+        if not self.lock.acquire(blocking=index is None):
+            return index
+        try:
+            if self.index is None or time.monotonic() - self.checked_at >= CHECK_INTERVAL:
+                self._catch_up()
+                self.checked_at = time.monotonic()
+            return self.index
+        finally:
+            self.lock.release()
+
+    def _catch_up(self):
+        version, pruned_through, pending = current_state()
+        # This transaction holds the version row from its first write on, so
+        # every version below that one is settled and every one above is its own
+        settled = min(pending) - 1 if pending else version
+
+        changes = None
+        if self.index is not None and self.version >= pruned_through:
+            changes = changed_articles(self.version, version)
+
+        stale, uncommitted = set(), set()
+        if changes is not None:
+            with _applied_lock:
+                for change_version, article_id in changes:
+                    if change_version > settled:
+                        uncommitted.add(article_id)
+                    elif article_id not in _applied.get(change_version, ()):
+                        stale.add(article_id)
+                stale |= self.dirty
+            stale |= uncommitted
+            if not pending and len(stale) > max(REREAD_BATCH, REBUILD_FRACTION * len(self.index)):
+                changes = None
+
+        if changes is None:
+            # First use, a TRUNCATE (or a test flush), a pruned log or a large import elsewhere
+            index = self.build()
+            if pending:
+                uncommitted = {article_id for _, article_id in changed_articles(settled, version) or ()}
+        else:
+            index = self.index
+            if stale:
+                self.update(index, stale)
+
+        with _applied_lock:
+            if changes is None or not pending:
+                self.dirty = uncommitted
+            else:
+                self.dirty |= uncommitted
+            self.index = index
+            self.version = settled
+            floor = min(instance.version for instance in _instances if instance.index is not None)
+            for applied_version in [applied_version for applied_version in _applied if applied_version <= floor]:
+                del _applied[applied_version]
+
+    def reset(self):
+        """Drop the index; it is built again on next use"""
+        with self.lock:
+            self.index = None
+            self.dirty = set()
@@ -0,0 +1,103 @@
+"""
+Keeps the normalised Keyword / ArticleKeyword tables in step with the
+comma-separated LegalArticle.keywords string, including each keyword's
+article_count, so keyword lookups and frequency listings never parse or
+GROUP BY the articles table.
+"""
+from collections import Counter
+
+from django.db import connection, transaction
+from django.db.models import F
+
+from .models import ArticleKeyword, Keyword
+
+MAX_KEYWORD_LENGTH = 100
+
+# Only the links this statement actually inserted or deleted are returned, so
+# a concurrent sync of the same article never moves a counter twice
+LINK_SQL = """
+    INSERT INTO knowledge_base_articlekeyword (article_id, keyword_id)
+    SELECT * FROM unnest(%s::bigint[], %s::bigint[])
+    ON CONFLICT DO NOTHING
+    RETURNING keyword_id
+"""
+UNLINK_SQL = """
+    DELETE FROM knowledge_base_articlekeyword WHERE id = ANY(%s::bigint[])
+    RETURNING keyword_id
+"""
+
+# All counter changes of a sync in one UPDATE
+COUNT_SQL = """
+    UPDATE knowledge_base_keyword AS keyword
+    SET article_count = keyword.article_count + change.delta
+    FROM unnest(%s::bigint[], %s::int[]) AS change(id, delta)
+    WHERE keyword.id = change.id
+"""
+
+
+def normalize_keyword(value):
+    """Lowercase with internal whitespace collapsed, truncated to fit Keyword.name"""
+    return ' '.join((value or '').split()).lower()[:MAX_KEYWORD_LENGTH]
+
+
+def parse_keywords(value):
+    """Distinct normalised keywords from a comma-separated string, in order"""
+    if not value:
+        return []
+    names = (normalize_keyword(part) for part in value.split(','))
+    return list(dict.fromkeys(name for name in names if name))
+
+
+def sync_article_keywords(article):
+    """Bring the article's ArticleKeyword links and keyword counters in line with article.keywords"""
+    sync_keywords_bulk([article])
+
+
+def sync_keywords_bulk(articles):
+    """
+    Sync the keyword links and counters of a batch of saved articles in a
+    fixed number of queries; also used by bulk imports, which bypass the
+    post_save signal
+    """
+    wanted = {article.id: parse_keywords(article.keywords) for article in articles}
+    if not wanted:
+        return
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        current = {}
+        links = ArticleKeyword.objects.filter(article_id__in=wanted).values_list(
+            'id', 'article_id', 'keyword__name'
+        )
+        for link_id, article_id, name in links:
+            current.setdefault(article_id, {})[name] = link_id
+
+        added = []
+        stale_link_ids = []
+        for article_id, names in wanted.items():
+            linked = current.get(article_id, {})
+            added.extend((article_id, name) for name in names if name not in linked)
+            stale_link_ids.extend(link_id for name, link_id in linked.items() if name not in names)
+
+        deltas = Counter()
+        if added:
+            names = {name for _, name in added}
+            Keyword.objects.bulk_create([Keyword(name=name) for name in names], ignore_conflicts=True)
+            keyword_ids = dict(Keyword.objects.filter(name__in=names).values_list('name', 'id'))
+            cursor.execute(LINK_SQL, [
+                [article_id for article_id, _ in added], [keyword_ids[name] for _, name in added]
+            ])
+            deltas.update(keyword_id for keyword_id, in cursor.fetchall())
+
+        if stale_link_ids:
+            cursor.execute(UNLINK_SQL, [stale_link_ids])
+            deltas.subtract(keyword_id for keyword_id, in cursor.fetchall())
+
+        deltas = {keyword_id: delta for keyword_id, delta in deltas.items() if delta}
+        if deltas:
+            cursor.execute(COUNT_SQL, [list(deltas), list(deltas.values())])
+
+
+def release_article_keywords(article_id):
+    """Decrement counters for an article about to be deleted (its links cascade away)"""
+    keyword_ids = ArticleKeyword.objects.filter(article_id=article_id).values('keyword_id')
+    Keyword.objects.filter(id__in=keyword_ids).update(article_count=F('article_count') - 1)
@@ -0,0 +1,53 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from knowledge_base.analysis import Analyzer, get_analyzer
+from knowledge_base.models import LegalArticle
+
+
+class Command(BaseCommand):
+    help = 'Measure text analyzer throughput over the whole LegalArticle corpus'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=3,
+                            help='Warm-cache passes to run after the cold pass')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        documents = [
+            ' '.join(fields) for fields in
+            LegalArticle.objects.values_list('title', 'article_number', 'keywords', 'content').iterator(chunk_size=2000)
+        ]
+        load_seconds = time.perf_counter() - started
+
+        if not documents:
+            self.stdout.write(self.style.WARNING('No articles to analyze'))
+            return
+
+        total_bytes = sum(len(document.encode('utf-8')) for document in documents)
+        self.stdout.write(
+            f'Loaded {len(documents)} articles ({total_bytes / 1e6:.2f} MB) in {load_seconds:.2f}s'
+        )
+
+        configured = get_analyzer()
+        # Same pipeline with an empty token memo, so the first pass is measured cold
+        analyzer = Analyzer(configured.char_filters, configured.token_filters, configured.token_pattern)
+
+        for run in range(1 + options['repeat']):
+            started = time.perf_counter()
+            token_count = 0
+            for document in documents:
+                token_count += len(analyzer.analyze(document))
+            seconds = max(time.perf_counter() - started, 1e-9)
+
+            label = 'cold' if run == 0 else f'warm {run}'
+            self.stdout.write(
+                f'{label:>7}: {len(documents) / seconds:,.0f} docs/s, '
+                f'{token_count / seconds:,.0f} terms/s, '
+                f'{total_bytes / 1e6 / seconds:.2f} MB/s ({seconds:.3f}s, {token_count} terms)'
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Distinct tokens memoised: {len(analyzer._token_cache)}'
+        ))
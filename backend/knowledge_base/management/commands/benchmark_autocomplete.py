@@ -0,0 +1,79 @@
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from rest_framework.test import APIRequestFactory
+
+from knowledge_base import autocomplete
+from knowledge_base.models import LegalArticle
+from knowledge_base.views import LegalArticleViewSet
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class Command(BaseCommand):
+    help = 'Compare typeahead latency of articles/autocomplete/ against articles/search/'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000,
+                            help='Keystroke requests to replay per endpoint')
+        parser.add_argument('--concurrency', type=int, default=8,
+                            help='Threads issuing requests at the same time')
+        parser.add_argument('--seed', type=int, default=7)
+
+    def handle(self, *args, **options):
+        titles = list(LegalArticle.objects.values_list('title', flat=True)[:5000])
+        if not titles:
+            self.stdout.write(self.style.WARNING('No articles to benchmark against'))
+            return
+
+        # Every prefix a user produces while typing the first word or two of a title
+        rng = random.Random(options['seed'])
+        keystrokes = []
+        while len(keystrokes) < options['requests']:
+            words = rng.choice(titles).split()[:2]
+            text = ' '.join(words)
+            keystrokes.extend(text[:length] for length in range(1, len(text) + 1))
+        keystrokes = keystrokes[:options['requests']]
+
+        started = time.perf_counter()
+        autocomplete.get_index()
+        self.stdout.write(f'Completion index built in {time.perf_counter() - started:.2f}s')
+
+        factory = APIRequestFactory()
+        endpoints = [
+            ('autocomplete', LegalArticleViewSet.as_view({'get': 'autocomplete'}), 'q'),
+            ('search', LegalArticleViewSet.as_view({'get': 'search'}), 'q'),
+        ]
+
+        for name, view, param in endpoints:
+            def run(text, view=view, param=param):
+                request = factory.get('/', {param: text})
+                started = time.perf_counter()
+                response = view(request)
+                response.render()
+                return time.perf_counter() - started, len(response.content)
+
+            # Warm caches before measuring
+            for text in keystrokes[:50]:
+                run(text)
+
+            wall_started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+                results = list(pool.map(run, keystrokes))
+            wall = time.perf_counter() - wall_started
+
+            latencies = [seconds * 1000 for seconds, _ in results]
+            sizes = [size for _, size in results]
+            self.stdout.write(
+                f'{name:>12}: p50 {percentile(latencies, 0.50):.2f} ms, '
+                f'p95 {percentile(latencies, 0.95):.2f} ms, '
+                f'p99 {percentile(latencies, 0.99):.2f} ms, '
+                f'{len(results) / wall:,.0f} req/s, '
+                f'mean response {statistics.mean(sizes) / 1024:.1f} KiB'
+            )
@@ -0,0 +1,67 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from knowledge_base import related
+from knowledge_base.analysis import analyze
+from knowledge_base.models import LegalArticle
+
+
+class Command(BaseCommand):
+    help = 'Measure related-articles rebuild time on synthetic corpora of increasing size'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 500000],
+                            help='Corpus sizes (articles) to benchmark')
+        parser.add_argument('--terms', type=int, default=150,
+                            help='Analysed terms per synthetic article')
+        parser.add_argument('--sample', type=int, default=5000,
+                            help='Rows whose neighbours are computed per size; the full '
+                                 'similarity pass is extrapolated from them (0 = all rows)')
+        parser.add_argument('--seed', type=int, default=7)
+
+    def handle(self, *args, **options):
+        # Zipf-distributed vocabulary: the real corpus' terms first, padded with synthetic ones
+        vocabulary = list(dict.fromkeys(
+            term
+            for fields in LegalArticle.objects.values_list('title', 'keywords', 'content').iterator()
+            for term in analyze(' '.join(fields))
+        ))
+        vocabulary += [f'term{number}' for number in range(50000 - len(vocabulary))]
+        vocabulary = np.asarray(vocabulary, dtype=object)
+        probabilities = 1 / np.arange(1, len(vocabulary) + 1)
+        probabilities /= probabilities.sum()
+        rng = np.random.default_rng(options['seed'])
+
+        def documents(size, chunk=1000):
+            for chunk_start in range(0, size, chunk):
+                term_ids = rng.choice(
+                    len(vocabulary), size=(min(chunk, size - chunk_start), options['terms']), p=probabilities
+                )
+                for row in term_ids:
+                    yield vocabulary[row].tolist()
+
+        for size in options['sizes']:
+            started = time.perf_counter()
+            matrix = related.tfidf_matrix(documents(size))
+            matrix_seconds = time.perf_counter() - started
+
+            rows = None
+            measured = size
+            if options['sample'] and options['sample'] < size:
+                rows = rng.choice(size, size=options['sample'], replace=False)
+                measured = len(rows)
+
+            started = time.perf_counter()
+            neighbours = sum(len(found) for _, found, _ in related.nearest_neighbours(matrix, rows))
+            neighbour_seconds = time.perf_counter() - started
+            full_seconds = neighbour_seconds * size / measured
+
+            label = 'measured' if measured == size else f'extrapolated from {measured} rows'
+            self.stdout.write(
+                f'{size:>8} articles: matrix {matrix_seconds:.2f}s ({matrix.nnz:,} non-zeros), '
+                f'neighbours {full_seconds:.2f}s {label} '
+                f'({measured / max(neighbour_seconds, 1e-9):,.0f} rows/s, {neighbours / measured:.1f} per row), '
+                f'rebuild ~{matrix_seconds + full_seconds:.2f}s'
+            )
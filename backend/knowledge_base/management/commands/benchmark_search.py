@@ -0,0 +1,70 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from knowledge_base.benchmark import runner
+from knowledge_base.benchmark.backends import BACKENDS
+from knowledge_base.benchmark.corpus import DATASET_PATH, load_dataset
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure recall@k, MRR and latency of the knowledge base search backends on synthetic '
+        'corpora, writing a JSON report. Runs in a scratch test database, never the configured one.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000],
+                            help='Corpus sizes (articles, labelled ones included) to benchmark')
+        parser.add_argument('--backends', nargs='+', choices=sorted(BACKENDS),
+                            default=['icontains', 'postgres', 'memory', 'compiled'])
+        parser.add_argument('--k', type=int, nargs='+', default=list(runner.DEFAULT_KS),
+                            help='Cut-offs for recall@k')
+        parser.add_argument('--repeat', type=int, default=5,
+                            help='Timed runs per query, after one warm-up run')
+        parser.add_argument('--dataset', default=DATASET_PATH,
+                            help='Labelled articles and queries (JSON)')
+        parser.add_argument('--output', default='-',
+                            help='File for the JSON report ("-" for stdout, with the summary on stderr)')
+        parser.add_argument('--compare', default=None,
+                            help='Previous JSON report to show metric changes against')
+        parser.add_argument('--seed', type=int, default=7)
+        parser.add_argument('--keepdb', action='store_true',
+                            help='Reuse the scratch database from a previous run and keep it afterwards')
+
+    def handle(self, *args, **options):
+        dataset = load_dataset(options['dataset'])
+        if min(options['sizes']) < len(dataset['articles']):
+            raise CommandError(f'Corpus sizes must be at least the {len(dataset["articles"])} labelled articles')
+
+        previous = {}
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as handle:
+                previous = {(run['size'], run['backend']): run for run in json.load(handle)['runs']}
+
+        summary = self.stderr if options['output'] == '-' else self.stdout
+        ks = sorted(set(options['k']))
+        report = runner.run(
+            dataset,
+            sizes=options['sizes'],
+            backend_names=options['backends'],
+            ks=ks,
+            repeat=options['repeat'],
+            seed=options['seed'],
+            keep_database=options['keepdb'],
+            log=summary.write,
+        )
+
+        if previous:
+            summary.write('Compared with ' + options['compare'])
+            for run in report['runs']:
+                summary.write(runner.format_result(run, ks, previous.get((run['size'], run['backend']))))
+
+        text = json.dumps(report, indent=2, ensure_ascii=False)
+        if options['output'] == '-':
+            sys.stdout.write(text + '\n')
+        else:
+            with open(options['output'], 'w', encoding='utf-8') as handle:
+                handle.write(text + '\n')
+            summary.write(self.style.SUCCESS(f'Wrote {options["output"]}'))
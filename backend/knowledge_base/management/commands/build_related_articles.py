@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from knowledge_base import related
+
+
+class Command(BaseCommand):
+    help = 'Recompute the precomputed "see also" neighbours of LegalArticle rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true',
+                            help='Recompute every article instead of only changed ones')
+        parser.add_argument('--ids', type=int, nargs='+',
+                            help='Treat exactly these article IDs as changed')
+        parser.add_argument('--top-k', type=int, default=related.TOP_K,
+                            help='Neighbours stored per article')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        updated = related.rebuild(
+            full=options['full'],
+            article_ids=options['ids'],
+            k=options['top_k']
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Updated related articles for {updated} articles in {time.perf_counter() - started:.2f}s'
+        ))
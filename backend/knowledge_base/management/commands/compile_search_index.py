@@ -0,0 +1,31 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from knowledge_base import compiled
+
+
+class Command(BaseCommand):
+    help = (
+        'Compile the knowledge base search index into a memory-mapped file and swap it in for '
+        'running workers (KNOWLEDGE_BASE_SEARCH_BACKEND = "compiled")'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default=None,
+                            help='Index file to write (default: KNOWLEDGE_BASE_COMPILED_INDEX)')
+
+    def handle(self, *args, **options):
+        path = options['output'] or settings.KNOWLEDGE_BASE_COMPILED_INDEX
+        started = time.perf_counter()
+        index = compiled.compile_index(path)
+
+        header = index.header
+        self.stdout.write(
+            f'  {header["documents"]} documents, {header["terms"]} terms, {header["postings"]} postings'
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Wrote {path} ({os.path.getsize(path) / 1e6:,.1f} MB) in {time.perf_counter() - started:.2f}s'
+        ))
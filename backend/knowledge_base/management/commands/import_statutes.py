@@ -0,0 +1,105 @@
+import json
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from knowledge_base import importer
+
+# Invalid records printed in full before only being counted
+MAX_REPORTED_ERRORS = 10
+
+
+class Command(BaseCommand):
+    help = (
+        'Stream JSONL, CSV or plain-text statute files into LegalArticle, upserting by '
+        'article_number in batches. Interrupted imports resume from a checkpoint file.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+', help='Corpus files to import')
+        parser.add_argument('--format', choices=importer.FORMATS,
+                            help='File format (default: from the file extension)')
+        parser.add_argument('--category',
+                            help='Category for records without one (required for plain text)')
+        parser.add_argument('--unit', default='Section',
+                            help='Plain text: article_number prefix, e.g. Section or Article')
+        parser.add_argument('--code', default='',
+                            help='Plain text: article_number suffix, e.g. PPC or CrPC')
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--no-create-categories', action='store_true',
+                            help='Fail on category names that do not exist yet')
+        parser.add_argument('--restart', action='store_true',
+                            help='Ignore any checkpoint and import each file from the start')
+
+    def handle(self, *args, **options):
+        categories = importer.CategoryResolver(create=not options['no_create_categories'])
+        for path in options['paths']:
+            if not os.path.isfile(path):
+                raise CommandError(f'No such file: {path}')
+            try:
+                self.import_file(path, categories, options)
+            except ValueError as error:
+                raise CommandError(f'{path}: {error}')
+
+    def import_file(self, path, categories, options):
+        file_format = options['format'] or importer.detect_format(path)
+        checkpoint_path = f'{path}.checkpoint'
+        source = os.stat(path)
+        fingerprint = {'size': source.st_size, 'mtime': source.st_mtime}
+
+        skip = 0
+        if not options['restart'] and os.path.exists(checkpoint_path):
+            with open(checkpoint_path) as handle:
+                checkpoint = json.load(handle)
+            if {key: checkpoint.get(key) for key in fingerprint} == fingerprint:
+                skip = checkpoint['records']
+                self.stdout.write(f'{path}: resuming after record {skip}')
+            else:
+                self.stdout.write(self.style.WARNING(f'{path}: file changed since the checkpoint, starting over'))
+
+        started = time.perf_counter()
+        position = written = valid = errors = 0
+        batch = []
+
+        def flush():
+            nonlocal written, valid
+            written += len(importer.upsert_articles(batch, categories))
+            valid += len(batch)
+            batch.clear()
+            # Written only after the batch has committed, via rename so it is never half-written
+            with open(f'{checkpoint_path}.tmp', 'w') as handle:
+                json.dump(dict(fingerprint, records=position), handle)
+            os.replace(f'{checkpoint_path}.tmp', checkpoint_path)
+
+            seconds = max(time.perf_counter() - started, 1e-9)
+            self.stdout.write(
+                f'  {position} records read, {written} written, {valid / seconds:,.0f} records/s'
+            )
+
+        reader = importer.READERS[file_format]
+        with open(path, encoding='utf-8-sig', newline='') as handle:
+            for record in reader(handle, unit=options['unit'], code=options['code']):
+                position += 1
+                if position <= skip:
+                    continue
+                try:
+                    batch.append(importer.clean_record(record, options['category']))
+                except ValueError as error:
+                    errors += 1
+                    if errors <= MAX_REPORTED_ERRORS:
+                        self.stdout.write(self.style.WARNING(f'  record {position} skipped: {error}'))
+                    continue
+                if len(batch) >= options['batch_size']:
+                    flush()
+            if batch:
+                flush()
+
+        if os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+        seconds = max(time.perf_counter() - started, 1e-9)
+        self.stdout.write(self.style.SUCCESS(
+            f'{path}: {valid} records imported ({written} inserted or changed, {valid - written} unchanged), '
+            f'{errors} invalid records skipped in {seconds:.2f}s '
+            f'({valid / seconds:,.0f} records/s, {source.st_size / 1e6 / seconds:.2f} MB/s)'
+        ))
@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from knowledge_base import snapshots
+
+
+class Command(BaseCommand):
+    help = 'Publish the knowledge base as a new version of precompressed per-category JSON shards'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keep', type=int, default=None,
+                            help='Delete the shard files of all but this many newest versions')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        snapshot = snapshots.publish(keep=options['keep'])
+
+        shards = snapshot.manifest['shards']
+        for encoding in ('identity', 'gzip', 'br'):
+            size = sum(shard['sizes'].get(encoding, 0) for shard in shards)
+            if size:
+                self.stdout.write(f'  {encoding}: {size / 1024:,.0f} KB')
+        if snapshots.brotli is None:
+            self.stdout.write('  brotli is not installed; only gzip copies were written')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Published v{snapshot.id}: {snapshot.article_count} articles in {len(shards)} shards '
+            f'to {snapshots.version_dir(snapshot.id)} in {time.perf_counter() - started:.2f}s'
+        ))
@@ -0,0 +1,52 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import F, Q
+
+from knowledge_base.citations import parse_articles
+from knowledge_base.models import LegalArticle
+
+
+class Command(BaseCommand):
+    help = 'Extract article-to-article citations from LegalArticle content into ArticleCitation'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true',
+                            help='Re-parse every article, not only those changed since their last parse')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        queryset = LegalArticle.objects.all()
+        if not options['full']:
+            queryset = queryset.filter(
+                Q(citations_parsed_at__isnull=True) | Q(citations_parsed_at__lt=F('updated_at'))
+            )
+
+        total = queryset.count()
+        if not total:
+            self.stdout.write(self.style.SUCCESS('Citations are up to date'))
+            return
+
+        started = time.perf_counter()
+        done = 0
+        last_id = 0
+        while True:
+            # Keyset pagination: parsed rows drop out of the filter, so offsets would skip rows
+            batch = list(
+                queryset.filter(id__gt=last_id).order_by('id')
+                .only('id', 'article_number', 'content')[:options['batch_size']]
+            )
+            if not batch:
+                break
+            parse_articles(batch)
+            last_id = batch[-1].id
+            done += len(batch)
+
+            seconds = max(time.perf_counter() - started, 1e-9)
+            self.stdout.write(
+                f'  {done}/{total} articles ({done * 100 // total}%), {done / seconds:,.0f} articles/s'
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Parsed citations of {done} articles in {time.perf_counter() - started:.2f}s'
+        ))
@@ -0,0 +1,21 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from knowledge_base import popularity
+from knowledge_base.models import PopularArticle
+
+
+class Command(BaseCommand):
+    help = 'Recompute the "most viewed" article lists per category from the buffered view counts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-k', type=int, default=popularity.TOP_K,
+                            help='Articles stored per category')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        popularity.refresh(k=options['top_k'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Stored {PopularArticle.objects.count()} popular articles in {time.perf_counter() - started:.2f}s'
+        ))
@@ -0,0 +1,74 @@
+# Generated by Django 5.2.7 on 2026-10-17 19:05
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+BACKFILL_BATCH_SIZE = 1000
+
+SEARCH_VECTOR_SQL = """
+    setweight(to_tsvector('english', coalesce({row}.title, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce({row}.article_number, '')), 'B') ||
+    setweight(to_tsvector('english', coalesce({row}.keywords, '')), 'C') ||
+    setweight(to_tsvector('english', coalesce({row}.content, '')), 'D')
+"""
+
+CREATE_TRIGGER_SQL = """
+    CREATE FUNCTION legal_article_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector := {vector};
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql;
+
+    CREATE TRIGGER legal_article_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, article_number, keywords, content
+    ON knowledge_base_legalarticle
+    FOR EACH ROW EXECUTE FUNCTION legal_article_search_vector_update();
+""".format(vector=SEARCH_VECTOR_SQL.format(row='NEW'))
+
+DROP_TRIGGER_SQL = """
+    DROP TRIGGER IF EXISTS legal_article_search_vector_trigger ON knowledge_base_legalarticle;
+    DROP FUNCTION IF EXISTS legal_article_search_vector_update();
+"""
+
+
+def backfill_search_vectors(apps, schema_editor):
+    """Populate search_vector for existing rows, one committed id range at a time"""
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT MIN(id), MAX(id) FROM knowledge_base_legalarticle')
+        low, high = cursor.fetchone()
+        if low is None:
+            return
+
+        for start in range(low, high + 1, BACKFILL_BATCH_SIZE):
+            cursor.execute(
+                'UPDATE knowledge_base_legalarticle a SET search_vector = {vector} '
+                'WHERE a.id >= %s AND a.id < %s'.format(vector=SEARCH_VECTOR_SQL.format(row='a')),
+                [start, start + BACKFILL_BATCH_SIZE]
+            )
+
+
+class Migration(migrations.Migration):
+
+    # Let each backfill batch commit on its own instead of one long transaction
+    atomic = False
+
+    dependencies = [
+        ('knowledge_base', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='legalarticle',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunSQL(CREATE_TRIGGER_SQL, DROP_TRIGGER_SQL),
+        migrations.RunPython(backfill_search_vectors, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='legalarticle',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='legal_article_search_gin'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.7 on 2026-10-17 19:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('knowledge_base', '0002_legalarticle_search_vector'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Keyword',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('article_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['name'],
+                'indexes': [models.Index(fields=['-article_count', 'name'], name='keyword_frequency')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArticleKeyword',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('article', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='article_keywords', to='knowledge_base.legalarticle')),
+                ('keyword', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='article_keywords', to='knowledge_base.keyword')),
+            ],
+            options={
+                'unique_together': {('keyword', 'article')},
+            },
+        ),
+        migrations.AddField(
+            model_name='legalarticle',
+            name='keyword_terms',
+            field=models.ManyToManyField(blank=True, related_name='articles', through='knowledge_base.ArticleKeyword', to='knowledge_base.keyword'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+from django.db import migrations
+from django.db.models import Count
+
+BATCH_SIZE = 1000
+MAX_KEYWORD_LENGTH = 100
+
+
+def split_keywords(apps, schema_editor):
+    """Create Keyword rows and links from every article's comma-separated keywords"""
+    LegalArticle = apps.get_model('knowledge_base', 'LegalArticle')
+    Keyword = apps.get_model('knowledge_base', 'Keyword')
+    ArticleKeyword = apps.get_model('knowledge_base', 'ArticleKeyword')
+
+    keyword_ids = {}
+    batch = []
+
+    def flush():
+        names = {name for _, name in batch if name not in keyword_ids}
+        Keyword.objects.bulk_create([Keyword(name=name) for name in names], ignore_conflicts=True)
+        keyword_ids.update(Keyword.objects.filter(name__in=names).values_list('name', 'id'))
+        ArticleKeyword.objects.bulk_create(
+            [ArticleKeyword(article_id=article_id, keyword_id=keyword_ids[name]) for article_id, name in batch],
+            ignore_conflicts=True
+        )
+        batch.clear()
+
+    rows = LegalArticle.objects.values_list('id', 'keywords').order_by('id').iterator(chunk_size=BATCH_SIZE)
+    for article_id, keywords in rows:
+        names = (' '.join(part.split()).lower()[:MAX_KEYWORD_LENGTH] for part in (keywords or '').split(','))
+        for name in dict.fromkeys(name for name in names if name):
+            batch.append((article_id, name))
+        if len(batch) >= BATCH_SIZE:
+            flush()
+    if batch:
+        flush()
+
+    # One-off aggregate to seed the counters; they are maintained incrementally afterwards
+    counts = ArticleKeyword.objects.values('keyword_id').annotate(n=Count('id'))
+    for row in counts.iterator():
+        Keyword.objects.filter(id=row['keyword_id']).update(article_count=row['n'])
+
+
+def clear_keywords(apps, schema_editor):
+    apps.get_model('knowledge_base', 'Keyword').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('knowledge_base', '0003_keyword'),
+    ]
+
+    operations = [
+        migrations.RunPython(split_keywords, clear_keywords),
+    ]
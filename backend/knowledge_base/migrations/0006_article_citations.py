@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-17 19:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('knowledge_base', '0005_relatedarticle'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='legalarticle',
+            name='citations_parsed_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.CreateModel(
+            name='ArticleCitation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('reference', models.CharField(max_length=100)),
+                ('source', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='outgoing_citations', to='knowledge_base.legalarticle')),
+                ('target', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='incoming_citations', to='knowledge_base.legalarticle')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['reference'], name='article_citation_reference')],
+                'unique_together': {('source', 'reference')},
+            },
+        ),
+    ]
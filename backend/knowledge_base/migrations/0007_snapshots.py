@@ -0,0 +1,40 @@
+# Generated by Django 5.2.7 on 2026-10-17 19:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('knowledge_base', '0006_article_citations'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArticleTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('article_id', models.IntegerField()),
+                ('article_number', models.CharField(max_length=50)),
+                ('deleted_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='KnowledgeBaseSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('published_up_to', models.DateTimeField()),
+                ('article_count', models.PositiveIntegerField(default=0)),
+                ('manifest', models.JSONField(default=dict)),
+                ('pruned', models.BooleanField(default=False)),
+            ],
+            options={
+                'ordering': ['-id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='legalarticle',
+            index=models.Index(fields=['updated_at'], name='legal_article_updated_at'),
+        ),
+    ]
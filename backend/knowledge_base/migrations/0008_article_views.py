@@ -0,0 +1,36 @@
+# Generated by Django 5.2.7 on 2026-10-17 20:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('knowledge_base', '0007_snapshots'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArticleViewCount',
+            fields=[
+                ('article', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='view_count', serialize=False, to='knowledge_base.legalarticle')),
+                ('views', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PopularArticle',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('views', models.PositiveBigIntegerField()),
+                ('computed_at', models.DateTimeField()),
+                ('article', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='popular_links', to='knowledge_base.legalarticle')),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='popular_links', to='knowledge_base.legalcategory')),
+            ],
+            options={
+                'ordering': ['category', 'rank'],
+                'unique_together': {('category', 'rank')},
+            },
+        ),
+    ]
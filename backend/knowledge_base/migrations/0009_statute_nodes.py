@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-17 20:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('knowledge_base', '0008_article_views'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatuteNode',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('act', 'Act'), ('part', 'Part'), ('chapter', 'Chapter'), ('section', 'Section'), ('subsection', 'Subsection')], max_length=20)),
+                ('number', models.CharField(blank=True, max_length=50)),
+                ('title', models.CharField(blank=True, max_length=300)),
+                ('path', models.CharField(db_collation='C', editable=False, max_length=255, unique=True)),
+                ('depth', models.PositiveSmallIntegerField(editable=False)),
+                ('article', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='statute_node', to='knowledge_base.legalarticle')),
+                ('parent', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='children', to='knowledge_base.statutenode')),
+            ],
+            options={
+                'ordering': ['path'],
+                'indexes': [models.Index(fields=['parent', 'path'], name='statute_node_children'), models.Index(fields=['kind', 'path'], name='statute_node_kind_path')],
+            },
+        ),
+    ]
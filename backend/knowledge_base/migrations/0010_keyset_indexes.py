@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-17 20:16
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Built without locking writes out of the tables
+    atomic = False
+
+    dependencies = [
+        ('knowledge_base', '0009_statute_nodes'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='legalarticle',
+            index=models.Index(fields=['category', 'article_number'], name='legal_article_category_number'),
+        ),
+    ]
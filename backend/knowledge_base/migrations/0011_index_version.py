@@ -0,0 +1,56 @@
+# Generated by Django 5.2.7 on 2026-10-17 21:08
+
+from django.db import migrations, models
+
+# Values come from a sequence rather than version + 1: a sequence never hands
+# out a number twice, even when the transaction that took it rolls back, so a
+# worker that built its index inside such a transaction still sees a change.
+# Statement-level, so an import of thousands of rows bumps it once per
+# statement. Updating the one row also queues concurrent article writes behind
+# each other until commit, which keeps versions in commit order.
+CREATE_TRIGGER_SQL = """
+    CREATE SEQUENCE knowledge_base_index_version_seq;
+
+    CREATE FUNCTION knowledge_base_index_version_bump() RETURNS trigger AS $$
+    BEGIN
+        INSERT INTO knowledge_base_indexversion (id, version)
+        VALUES (1, nextval('knowledge_base_index_version_seq'))
+        ON CONFLICT (id) DO UPDATE SET version = EXCLUDED.version;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql;
+
+    CREATE TRIGGER legal_article_index_version_trigger
+    AFTER INSERT OR DELETE OR UPDATE OF category_id, title, article_number, keywords, content
+    ON knowledge_base_legalarticle
+    FOR EACH STATEMENT EXECUTE FUNCTION knowledge_base_index_version_bump();
+
+    CREATE TRIGGER legal_article_index_version_truncate
+    AFTER TRUNCATE ON knowledge_base_legalarticle
+    FOR EACH STATEMENT EXECUTE FUNCTION knowledge_base_index_version_bump();
+"""
+
+DROP_TRIGGER_SQL = """
+    DROP TRIGGER IF EXISTS legal_article_index_version_truncate ON knowledge_base_legalarticle;
+    DROP TRIGGER IF EXISTS legal_article_index_version_trigger ON knowledge_base_legalarticle;
+    DROP FUNCTION IF EXISTS knowledge_base_index_version_bump();
+    DROP SEQUENCE IF EXISTS knowledge_base_index_version_seq;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('knowledge_base', '0010_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndexVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunSQL(CREATE_TRIGGER_SQL, DROP_TRIGGER_SQL),
+    ]
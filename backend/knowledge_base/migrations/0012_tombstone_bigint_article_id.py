@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-17 21:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('knowledge_base', '0011_index_version'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='articletombstone',
+            name='article_id',
+            field=models.BigIntegerField(),
+        ),
+    ]
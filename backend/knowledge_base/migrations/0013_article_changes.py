@@ -0,0 +1,145 @@
+# Generated by Django 5.2.7 on 2026-10-17 21:40
+
+import django.db.models.functions.datetime
+from django.db import migrations, models
+
+# Days an ArticleChange row is kept; a worker that has not caught up for
+# longer than this rebuilds its indexes instead of replaying the log
+CHANGE_RETENTION = 1
+
+# Replaces 0011's trigger, which only bumped the version, with one that also
+# logs which articles each statement wrote. Updates that leave the indexed
+# columns alone (citations_parsed_at) log nothing and keep the version.
+#
+# The version row is locked before nextval(), so versions are handed out in
+# the order their transactions commit: once a reader sees version v, every
+# change at or below v is committed or gone.
+#
+# Each version is also appended to two settings read by index_version.py:
+# knowledge_base.pending_versions lasts until the transaction ends (versions
+# whose rows may still roll back), knowledge_base.written_versions for the
+# session (versions whose articles this process will patch itself).
+CREATE_TRIGGER_SQL = """
+    DROP TRIGGER legal_article_index_version_truncate ON knowledge_base_legalarticle;
+    DROP TRIGGER legal_article_index_version_trigger ON knowledge_base_legalarticle;
+    DROP FUNCTION knowledge_base_index_version_bump();
+
+    CREATE FUNCTION knowledge_base_article_changes() RETURNS trigger AS $$
+    DECLARE
+        changed bigint[];
+        next_version bigint;
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            SELECT array_agg(id) INTO changed FROM new_rows;
+        ELSIF TG_OP = 'UPDATE' THEN
+            SELECT array_agg(new_rows.id) INTO changed
+            FROM new_rows JOIN old_rows ON old_rows.id = new_rows.id
+            WHERE (new_rows.category_id, new_rows.title, new_rows.article_number, new_rows.keywords, new_rows.content)
+                IS DISTINCT FROM
+                (old_rows.category_id, old_rows.title, old_rows.article_number, old_rows.keywords, old_rows.content);
+        ELSIF TG_OP = 'DELETE' THEN
+            SELECT array_agg(id) INTO changed FROM old_rows;
+        ELSE
+            -- TRUNCATE: no article id, so readers rebuild
+            changed := ARRAY[NULL]::bigint[];
+        END IF;
+        IF changed IS NULL THEN
+            RETURN NULL;
+        END IF;
+
+        INSERT INTO knowledge_base_indexversion (id, version, pruned_through) VALUES (1, 0, 0)
+        ON CONFLICT (id) DO NOTHING;
+        PERFORM 1 FROM knowledge_base_indexversion WHERE id = 1 FOR UPDATE;
+        next_version := nextval('knowledge_base_index_version_seq');
+
+        WITH pruned AS (
+            DELETE FROM knowledge_base_articlechange
+            WHERE changed_at < now() - interval '%(retention)s days'
+            RETURNING version
+        )
+        UPDATE knowledge_base_indexversion
+        SET version = next_version,
+            pruned_through = greatest(pruned_through, coalesce((SELECT max(version) FROM pruned), 0))
+        WHERE id = 1;
+
+        INSERT INTO knowledge_base_articlechange (version, article_id)
+        SELECT next_version, article_id FROM unnest(changed) AS article_id;
+
+        PERFORM set_config('knowledge_base.pending_versions', concat_ws(',',
+            nullif(current_setting('knowledge_base.pending_versions', true), ''), next_version), true);
+        PERFORM set_config('knowledge_base.written_versions', concat_ws(',',
+            nullif(current_setting('knowledge_base.written_versions', true), ''), next_version), false);
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql;
+
+    CREATE TRIGGER legal_article_changes_insert AFTER INSERT ON knowledge_base_legalarticle
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION knowledge_base_article_changes();
+
+    CREATE TRIGGER legal_article_changes_update AFTER UPDATE ON knowledge_base_legalarticle
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION knowledge_base_article_changes();
+
+    CREATE TRIGGER legal_article_changes_delete AFTER DELETE ON knowledge_base_legalarticle
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION knowledge_base_article_changes();
+
+    CREATE TRIGGER legal_article_changes_truncate AFTER TRUNCATE ON knowledge_base_legalarticle
+    FOR EACH STATEMENT EXECUTE FUNCTION knowledge_base_article_changes();
+""" % {'retention': CHANGE_RETENTION}
+
+# Back to 0011's version-only trigger
+DROP_TRIGGER_SQL = """
+    DROP TRIGGER IF EXISTS legal_article_changes_truncate ON knowledge_base_legalarticle;
+    DROP TRIGGER IF EXISTS legal_article_changes_delete ON knowledge_base_legalarticle;
+    DROP TRIGGER IF EXISTS legal_article_changes_update ON knowledge_base_legalarticle;
+    DROP TRIGGER IF EXISTS legal_article_changes_insert ON knowledge_base_legalarticle;
+    DROP FUNCTION IF EXISTS knowledge_base_article_changes();
+
+    CREATE FUNCTION knowledge_base_index_version_bump() RETURNS trigger AS $$
+    BEGIN
+        INSERT INTO knowledge_base_indexversion (id, version)
+        VALUES (1, nextval('knowledge_base_index_version_seq'))
+        ON CONFLICT (id) DO UPDATE SET version = EXCLUDED.version;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql;
+
+    CREATE TRIGGER legal_article_index_version_trigger
+    AFTER INSERT OR DELETE OR UPDATE OF category_id, title, article_number, keywords, content
+    ON knowledge_base_legalarticle
+    FOR EACH STATEMENT EXECUTE FUNCTION knowledge_base_index_version_bump();
+
+    CREATE TRIGGER legal_article_index_version_truncate
+    AFTER TRUNCATE ON knowledge_base_legalarticle
+    FOR EACH STATEMENT EXECUTE FUNCTION knowledge_base_index_version_bump();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('knowledge_base', '0012_tombstone_bigint_article_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='indexversion',
+            name='pruned_through',
+            field=models.BigIntegerField(db_default=0, default=0),
+        ),
+        migrations.CreateModel(
+            name='ArticleChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.BigIntegerField()),
+                ('article_id', models.BigIntegerField(null=True)),
+                ('changed_at', models.DateTimeField(db_default=django.db.models.functions.datetime.Now())),
+            ],
+            options={
+                'indexes': [models.Index(fields=['version'], name='article_change_version'), models.Index(fields=['changed_at'], name='article_change_changed_at')],
+            },
+        ),
+        migrations.RunSQL(CREATE_TRIGGER_SQL, DROP_TRIGGER_SQL),
+    ]
@@ -1,4 +1,7 @@
-from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.db import connection, models, transaction
+from django.db.models.functions import Now
 
 class LegalCategory(models.Model):
     """Categories like Criminal Law, Family Law, etc."""
@@ -22,9 +25,277 @@ class LegalArticle(models.Model):
     keywords = models.CharField(max_length=500, help_text="Comma-separated keywords for search")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Weighted tsvector over title/article_number/keywords/content, maintained by a DB trigger
+    search_vector = SearchVectorField(null=True, editable=False)
+    # Normalised form of `keywords`, kept in sync on save
+    keyword_terms = models.ManyToManyField(
+        'Keyword', through='ArticleKeyword', related_name='articles', blank=True
+    )
+    # When ArticleCitation rows were last extracted from `content`
+    citations_parsed_at = models.DateTimeField(null=True, blank=True, editable=False)
 
     class Meta:
         ordering = ['article_number']
+        indexes = [
+            GinIndex(fields=['search_vector'], name='legal_article_search_gin'),
+            # Delta sync: articles changed since a snapshot was published
+            models.Index(fields=['updated_at'], name='legal_article_updated_at'),
+            # Keyset pages of one category
+            models.Index(fields=['category', 'article_number'], name='legal_article_category_number'),
+        ]
 
     def __str__(self):
-        return f"{self.article_number} - {self.title}"
\ No newline at end of file
+        return f"{self.article_number} - {self.title}"
+
+
+# Digits per level of StatuteNode.path, so up to 99999 children per node
+PATH_STEP = 5
+
+
+class StatuteNodeQuerySet(models.QuerySet):
+    def roots(self):
+        return self.filter(depth=0)
+
+    def descendants_of(self, node):
+        """Everything below node: one index range scan on the path prefix"""
+        return self.filter(path__startswith=node.path, depth__gt=node.depth)
+
+    def ancestors_of(self, node):
+        """node's ancestors, root first (the breadcrumb): one lookup of its path prefixes"""
+        return self.filter(path__in=node.ancestor_paths()).order_by('depth')
+
+
+class StatuteNode(models.Model):
+    """
+    One level of a statute's structure: Act > Part > Chapter > Section > Subsection.
+
+    `path` is the materialized path: the node's position among its siblings,
+    zero-padded to PATH_STEP digits, appended to its parent's path. Ordering
+    by path is document order and a subtree is a path prefix.
+    """
+    KIND_CHOICES = [
+        ('act', 'Act'),
+        ('part', 'Part'),
+        ('chapter', 'Chapter'),
+        ('section', 'Section'),
+        ('subsection', 'Subsection'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    number = models.CharField(max_length=50, blank=True)  # e.g. "XVI", "302", "(2)"
+    title = models.CharField(max_length=300, blank=True)
+    parent = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, related_name='children')
+    # Byte-wise collation so the btree index serves both prefix matches and ordering
+    path = models.CharField(max_length=255, unique=True, db_collation='C', editable=False)
+    depth = models.PositiveSmallIntegerField(editable=False)
+    # The article holding this node's text, for sections
+    article = models.OneToOneField(
+        LegalArticle, on_delete=models.SET_NULL, null=True, blank=True, related_name='statute_node'
+    )
+
+    objects = StatuteNodeQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['path']
+        indexes = [
+            # Paginated children of a node
+            models.Index(fields=['parent', 'path'], name='statute_node_children'),
+            # Nodes of one kind within a subtree ("all sections under Chapter XVI")
+            models.Index(fields=['kind', 'path'], name='statute_node_kind_path'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.number} {self.title}".strip()
+
+    def ancestor_paths(self):
+        return [self.path[:end] for end in range(PATH_STEP, len(self.path), PATH_STEP)]
+
+    def save(self, *args, **kwargs):
+        """A new node is appended as the last child of its parent (or as the last act)"""
+        if self.path:
+            return super().save(*args, **kwargs)
+
+        with transaction.atomic():
+            if self.parent_id:
+                # Serialise appends under the same parent
+                parent = StatuteNode.objects.select_for_update().only('path', 'depth').get(pk=self.parent_id)
+                prefix, self.depth = parent.path, parent.depth + 1
+            else:
+                # Roots have no parent row to lock
+                with connection.cursor() as cursor:
+                    cursor.execute('LOCK TABLE knowledge_base_statutenode IN SHARE ROW EXCLUSIVE MODE')
+                prefix, self.depth = '', 0
+
+            last = (
+                StatuteNode.objects.filter(parent_id=self.parent_id).order_by('-path')
+                .values_list('path', flat=True).first()
+            )
+            position = int(last[-PATH_STEP:]) + 1 if last else 1
+            if position >= 10 ** PATH_STEP:
+                raise ValueError(f'{self.parent_id} already has the maximum number of children')
+            self.path = prefix + str(position).zfill(PATH_STEP)
+            return super().save(*args, **kwargs)
+
+    def add_child(self, **fields):
+        return StatuteNode.objects.create(parent=self, **fields)
+
+class Keyword(models.Model):
+    """A single normalised (lowercase, trimmed) search keyword"""
+    # Unique, so Postgres also gets a varchar_pattern_ops index for prefix (LIKE 'mur%') lookups
+    name = models.CharField(max_length=100, unique=True)
+    # Number of articles tagged with this keyword, maintained incrementally
+    article_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['name']
+        indexes = [
+            models.Index(fields=['-article_count', 'name'], name='keyword_frequency'),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
+class ArticleKeyword(models.Model):
+    article = models.ForeignKey(LegalArticle, on_delete=models.CASCADE, related_name='article_keywords')
+    keyword = models.ForeignKey(Keyword, on_delete=models.CASCADE, related_name='article_keywords')
+
+    class Meta:
+        unique_together = [['keyword', 'article']]
+
+    def __str__(self):
+        return f"{self.article.article_number} - {self.keyword.name}"
+
+
+class RelatedArticle(models.Model):
+    """Precomputed "see also" neighbour of an article, by TF-IDF cosine similarity"""
+    article = models.ForeignKey(LegalArticle, on_delete=models.CASCADE, related_name='related_links')
+    related = models.ForeignKey(LegalArticle, on_delete=models.CASCADE, related_name='related_to_links')
+    # 0 is the most similar neighbour
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+    # Start of the build_related_articles run that wrote this row
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['article', 'rank']
+        # Also the index behind the articles/{id}/related/ lookup
+        unique_together = [['article', 'rank']]
+
+    def __str__(self):
+        return f"{self.article_id} -> {self.related_id} ({self.score:.3f})"
+
+
+class ArticleViewCount(models.Model):
+    """How often an article's detail page was opened, kept apart so counting never rewrites the article row"""
+    article = models.OneToOneField(
+        LegalArticle, on_delete=models.CASCADE, primary_key=True, related_name='view_count'
+    )
+    views = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.article_id}: {self.views} views"
+
+
+class PopularArticle(models.Model):
+    """Precomputed most viewed article of a category, or of the whole knowledge base when category is empty"""
+    category = models.ForeignKey(
+        LegalCategory, on_delete=models.CASCADE, null=True, blank=True, related_name='popular_links'
+    )
+    article = models.ForeignKey(LegalArticle, on_delete=models.CASCADE, related_name='popular_links')
+    # 0 is the most viewed
+    rank = models.PositiveSmallIntegerField()
+    views = models.PositiveBigIntegerField()
+    # Start of the refresh_popular_articles run that wrote this row
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['category', 'rank']
+        # Also the index behind the articles/popular/ lookup
+        unique_together = [['category', 'rank']]
+
+    def __str__(self):
+        return f"{self.category_id}: #{self.rank} {self.article_id}"
+
+
+class ArticleCitation(models.Model):
+    """A reference such as "Section 34 PPC" found in the content of `source`"""
+    source = models.ForeignKey(LegalArticle, on_delete=models.CASCADE, related_name='outgoing_citations')
+    # Empty until an article with this reference exists
+    target = models.ForeignKey(
+        LegalArticle, on_delete=models.SET_NULL, null=True, blank=True, related_name='incoming_citations'
+    )
+    # Canonical form of the cited article_number, e.g. "section 34 ppc"
+    reference = models.CharField(max_length=100)
+
+    class Meta:
+        unique_together = [['source', 'reference']]
+        indexes = [
+            models.Index(fields=['reference'], name='article_citation_reference'),
+        ]
+
+    def __str__(self):
+        return f"{self.source_id} -> {self.reference}"
+
+
+class KnowledgeBaseSnapshot(models.Model):
+    """A published, immutable set of per-category article shards (see publish_knowledge_base)"""
+    # The version number clients sync from is the primary key
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Articles updated up to this moment are in the shards; later ones are in the next version
+    published_up_to = models.DateTimeField()
+    article_count = models.PositiveIntegerField(default=0)
+    # Categories and shard files: [{category, name, file, etag, size, articles, encodings}]
+    manifest = models.JSONField(default=dict)
+    # Shard files deleted to save space; deltas from this version are no longer served
+    pruned = models.BooleanField(default=False)
+
+    class Meta:
+        ordering = ['-id']
+
+    def __str__(self):
+        return f"v{self.id} ({self.article_count} articles)"
+
+
+class ArticleTombstone(models.Model):
+    """Record of a deleted LegalArticle, so delta sync can tell clients to drop it"""
+    article_id = models.BigIntegerField()
+    article_number = models.CharField(max_length=50)
+    deleted_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.article_number} (deleted {self.deleted_at:%Y-%m-%d})"
+
+
+class IndexVersion(models.Model):
+    """
+    Single row whose version changes whenever articles are written, by any
+    process (see index_version.py). A trigger keeps it current; nothing in
+    Django writes it.
+    """
+    version = models.BigIntegerField(default=0)
+    # ArticleChange rows up to this version have been deleted
+    pruned_through = models.BigIntegerField(default=0, db_default=0)
+
+    def __str__(self):
+        return f"v{self.version}"
+
+
+class ArticleChange(models.Model):
+    """
+    An article whose indexed fields were written at an IndexVersion version,
+    so workers can re-read just that article (see index_version.py). Written
+    by the same trigger; a row without article_id records a TRUNCATE.
+    """
+    version = models.BigIntegerField()
+    article_id = models.BigIntegerField(null=True)
+    changed_at = models.DateTimeField(db_default=Now())
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['version'], name='article_change_version'),
+            models.Index(fields=['changed_at'], name='article_change_changed_at'),
+        ]
+
+    def __str__(self):
+        return f"v{self.version}: {self.article_id}"
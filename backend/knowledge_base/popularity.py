@@ -0,0 +1,106 @@
+"""
+Article view counts and the precomputed "most viewed" lists.
+
+Opening an article only increments a counter in this process's memory.
+Every FLUSH_INTERVAL seconds the next view writes all pending increments
+in one INSERT ... ON CONFLICT over unnest()ed arrays, so the public detail
+route costs one small batched write per worker per interval instead of one
+UPDATE per page view. Counts still pending when a worker dies are lost,
+which is acceptable for a popularity signal.
+
+refresh() ranks the counts into PopularArticle (top-k per category and
+overall), which the articles/popular/ route reads with one indexed query.
+"""
+import atexit
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Seconds between batched writes of a worker's pending view counts
+FLUSH_INTERVAL = 10
+
+TOP_K = 10
+
+FLUSH_SQL = """
+    INSERT INTO knowledge_base_articleviewcount (article_id, views)
+    SELECT view.article_id, view.views
+    FROM unnest(%s::bigint[], %s::bigint[]) AS view(article_id, views)
+    JOIN knowledge_base_legalarticle AS article ON article.id = view.article_id
+    ORDER BY view.article_id
+    ON CONFLICT (article_id) DO UPDATE
+    SET views = knowledge_base_articleviewcount.views + EXCLUDED.views
+"""
+
+REFRESH_SQL = """
+    DELETE FROM knowledge_base_populararticle;
+
+    INSERT INTO knowledge_base_populararticle (category_id, article_id, rank, views, computed_at)
+    SELECT category_id, article_id, rank - 1, views, %(computed_at)s
+    FROM (
+        SELECT article.category_id, view.article_id, view.views,
+               row_number() OVER (PARTITION BY article.category_id ORDER BY view.views DESC, view.article_id) AS rank
+        FROM knowledge_base_articleviewcount AS view
+        JOIN knowledge_base_legalarticle AS article ON article.id = view.article_id
+        WHERE view.views > 0
+    ) AS ranked
+    WHERE rank <= %(k)s;
+
+    INSERT INTO knowledge_base_populararticle (category_id, article_id, rank, views, computed_at)
+    SELECT NULL, article_id, row_number() OVER (ORDER BY views DESC, article_id) - 1, views, %(computed_at)s
+    FROM (
+        SELECT article_id, views FROM knowledge_base_articleviewcount
+        WHERE views > 0
+        ORDER BY views DESC, article_id
+        LIMIT %(k)s
+    ) AS top;
+"""
+
+_pending = Counter()
+_pending_lock = threading.Lock()
+_flushed_at = time.monotonic()
+
+
+def record_view(article_id):
+    """Count one view, writing the buffered counts if FLUSH_INTERVAL has passed"""
+    with _pending_lock:
+        _pending[article_id] += 1
+        due = time.monotonic() - _flushed_at >= FLUSH_INTERVAL
+    if due:
+        flush()
+
+
+def flush():
+    """Write this process's pending view counts in one statement; returns the number of articles"""
+    global _pending, _flushed_at
+    with _pending_lock:
+        pending, _pending = _pending, Counter()
+        _flushed_at = time.monotonic()
+    if not pending:
+        return 0
+
+    article_ids = sorted(pending)
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(FLUSH_SQL, [article_ids, [pending[article_id] for article_id in article_ids]])
+    except Exception:
+        logger.exception('Could not write %d article view counts; keeping them for the next flush', len(pending))
+        with _pending_lock:
+            _pending.update(pending)
+        return 0
+    return len(article_ids)
+
+
+atexit.register(flush)
+
+
+def refresh(k=TOP_K):
+    """Recompute the stored most viewed lists from the view counts"""
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(REFRESH_SQL, {'computed_at': timezone.now(), 'k': k})
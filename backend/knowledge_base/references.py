@@ -0,0 +1,177 @@
+"""
+In-memory map from canonical article_number (see fuzzy.normalize_reference)
+to article id, for resolving citations without querying the articles table.
+
+"Section 302 PPC", "s.302 P.P.C." and "u/s 302 Pakistan Penal Code" all
+normalise to "section 302 ppc". Canonical numbers are also split into
+(unit, number, code), e.g. ("section", "302", "ppc"), so a citation without
+a code can be resolved relative to the citing article's code.
+"""
+import threading
+from collections import Counter, defaultdict
+
+from .fuzzy import normalize_reference
+from .index_version import ProcessIndex, reread_articles
+
+# Leading words of article_number values that are followed by a number
+UNITS = ('section', 'article', 'rule', 'order', 'clause')
+
+
+def split_reference(canonical):
+    """(unit, number, code) of a canonical reference, or (None, None, canonical)"""
+    parts = canonical.split(' ', 2)
+    if len(parts) >= 2 and parts[0] in UNITS and parts[1][:1].isdigit():
+        return parts[0], parts[1], parts[2] if len(parts) == 3 else ''
+    return None, None, canonical
+
+
+class ReferenceMap:
+    """Canonical article_number -> article id, plus the statute codes in use"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.ids = {}
+        self.references = {}
+        # (unit, number) -> ids, for citations that leave out the code
+        self.numbered = defaultdict(set)
+        # unit -> Counter of codes, e.g. {'article': {'constitution': 40}}
+        self.unit_codes = defaultdict(Counter)
+
+    def __len__(self):
+        return len(self.references)
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Bulk build from (id, article_number) rows"""
+        references = cls()
+        for article_id, article_number in rows:
+            references._add(article_id, article_number)
+        return references
+
+    def add(self, article_id, article_number):
+        with self._lock:
+            self._remove(article_id)
+            self._add(article_id, article_number)
+
+    def remove(self, article_id):
+        with self._lock:
+            self._remove(article_id)
+
+    def _add(self, article_id, article_number):
+        canonical = normalize_reference(article_number)
+        if not canonical:
+            return
+        self.ids[canonical] = article_id
+        self.references[article_id] = canonical
+        unit, number, code = split_reference(canonical)
+        if unit:
+            self.unit_codes[unit][code] += 1
+            self.numbered[unit, number].add(article_id)
+
+    def _remove(self, article_id):
+        canonical = self.references.pop(article_id, None)
+        if canonical is None:
+            return
+        if self.ids.get(canonical) == article_id:
+            del self.ids[canonical]
+        unit, number, code = split_reference(canonical)
+        if unit:
+            codes = self.unit_codes[unit]
+            codes[code] -= 1
+            if codes[code] <= 0:
+                del codes[code]
+            ids = self.numbered.get((unit, number))
+            if ids is not None:
+                ids.discard(article_id)
+                if not ids:
+                    del self.numbered[unit, number]
+
+    def codes(self):
+        """Every statute code that appears in some article_number"""
+        return {code for codes in self.unit_codes.values() for code in codes if code}
+
+    def only_code(self, unit):
+        """The single code numbered in this unit ("article" -> "constitution"), if there is just one"""
+        codes = self.unit_codes.get(unit)
+        if codes and len(codes) == 1:
+            return next(iter(codes))
+        return None
+
+    def resolve(self, reference):
+        """Article id for a citation in any spelling, or None"""
+        return self.ids.get(normalize_reference(reference))
+
+    def resolve_citation(self, citation, default_code=None):
+        """
+        (canonical reference, article id or None) for a free-form citation.
+
+        Beyond exact matches this accepts the code first ("PPC section 302"),
+        no unit ("302 PPC") and no code ("Art. 10-A", "section 302"), which
+        resolve when default_code, the only code numbered in that unit, or the
+        only article with that number makes the answer unambiguous.
+        """
+        canonical = normalize_reference(citation)
+        if canonical in self.ids:
+            return canonical, self.ids[canonical]
+
+        tokens = canonical.split()
+        position = next((index for index, token in enumerate(tokens) if token[:1].isdigit()), None)
+        if position is None:
+            return canonical, None
+
+        unit = tokens[position - 1] if position and tokens[position - 1] in UNITS else None
+        number = tokens[position]
+        code_tokens = tokens[:position - 1 if unit else position] + tokens[position + 1:]
+        code = ' '.join(token for token in code_tokens if token not in ('of', 'the'))
+        if not code and default_code:
+            code = normalize_reference(default_code)
+
+        for candidate_unit in ([unit] if unit else UNITS):
+            if code:
+                reference = f'{candidate_unit} {number} {code}'
+                if reference in self.ids:
+                    return reference, self.ids[reference]
+                continue
+
+            only_code = self.only_code(candidate_unit)
+            if only_code is not None:
+                reference = f'{candidate_unit} {number} {only_code}'.strip()
+                if reference in self.ids:
+                    return reference, self.ids[reference]
+            ids = self.numbered.get((candidate_unit, number))
+            if ids and len(ids) == 1:
+                article_id = next(iter(ids))
+                return self.references[article_id], article_id
+
+        return canonical, None
+
+
+def build_index():
+    from .models import LegalArticle
+
+    return ReferenceMap.from_rows(LegalArticle.objects.values_list('id', 'article_number').iterator(chunk_size=10000))
+
+
+def update_index(index, article_ids):
+    """Re-read changed articles into index"""
+    reread_articles(article_ids, ('article_number',), index.add, index.remove)
+
+
+_index = ProcessIndex(build_index, update_index)
+
+
+def get_index():
+    """Process-wide reference map, built from the database on first use and updated after writes elsewhere"""
+    return _index.get()
+
+
+def index_article(article):
+    index = _index.index
+    if index is not None:
+        index.add(article.id, article.article_number)
+
+
+def unindex_article(article_id):
+    index = _index.index
+    if index is not None:
+        index.remove(article_id)
@@ -0,0 +1,234 @@
+"""
+"See also" neighbours for LegalArticle, computed offline.
+
+Articles are analysed (see analysis.py) into an L2-normalised sublinear TF-IDF
+sparse matrix; cosine similarity is then a sparse matrix product, taken a block
+of rows at a time so memory stays bounded, with the top-k per row picked by
+argpartition. The result is stored in RelatedArticle, so serving an article's
+neighbours is one indexed lookup.
+"""
+from collections import Counter
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Count, Max, Min
+from django.utils import timezone
+from scipy import sparse
+
+from .analysis import analyze
+
+TOP_K = 10
+
+# Title terms are counted this many times, so titles weigh more than body text
+TITLE_WEIGHT = 2
+
+# Terms in more than this share of articles ("court", "shall", "government")
+# say little about topic but make the similarity product nearly dense, so
+# they are dropped; small corpora keep every term up to MIN_PRUNED_DF articles
+MAX_DF_RATIO = 0.05
+MIN_PRUNED_DF = 50
+
+# Dense float32 similarity cells computed per block (about 80 MB)
+BLOCK_CELLS = 20000000
+
+STORE_BATCH_SIZE = 5000
+
+
+def document_terms(title, keywords, content):
+    return analyze(title) * TITLE_WEIGHT + analyze(keywords) + analyze(content)
+
+
+def tfidf_matrix(documents):
+    """
+    CSR matrix with one L2-normalised row per document, from an iterable of
+    term lists. Term counts are consumed as they arrive, so the documents
+    themselves are never held in memory.
+    """
+    vocabulary = {}
+    indptr = [0]
+    indices = []
+    counts = []
+    for terms in documents:
+        for term, count in Counter(terms).items():
+            indices.append(vocabulary.setdefault(term, len(vocabulary)))
+            counts.append(count)
+        indptr.append(len(indices))
+
+    matrix = sparse.csr_matrix(
+        (np.asarray(counts, dtype=np.float32), np.asarray(indices, dtype=np.int32), np.asarray(indptr, dtype=np.int64)),
+        shape=(len(indptr) - 1, max(len(vocabulary), 1))
+    )
+
+    document_count = matrix.shape[0]
+    document_frequency = np.bincount(matrix.indices, minlength=matrix.shape[1])
+    idf = np.log((1 + document_count) / (1 + document_frequency)) + 1
+    idf[document_frequency > max(MAX_DF_RATIO * document_count, MIN_PRUNED_DF)] = 0
+
+    matrix.data = ((1 + np.log(matrix.data)) * idf[matrix.indices]).astype(np.float32)
+    matrix.eliminate_zeros()
+
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return sparse.diags((1 / norms).astype(np.float32)) @ matrix
+
+
+def nearest_neighbours(matrix, rows=None, k=TOP_K):
+    """
+    Yield (row, neighbour_rows, scores) for each requested row (default: all),
+    most similar first, excluding the row itself and neighbours with no shared terms.
+    """
+    document_count = matrix.shape[0]
+    k = min(k, document_count - 1)
+    if k <= 0:
+        return
+
+    rows = np.arange(document_count) if rows is None else np.asarray(rows, dtype=np.int64)
+    transposed = matrix.T.tocsr()
+    block_size = max(1, BLOCK_CELLS // document_count)
+
+    for block_start in range(0, len(rows), block_size):
+        block_rows = rows[block_start:block_start + block_size]
+        similarity = (matrix[block_rows] @ transposed).toarray()
+        similarity[np.arange(len(block_rows)), block_rows] = -1
+
+        candidates = np.argpartition(-similarity, k - 1, axis=1)[:, :k]
+        scores = np.take_along_axis(similarity, candidates, axis=1)
+        order = np.argsort(-scores, axis=1, kind='stable')
+        candidates = np.take_along_axis(candidates, order, axis=1)
+        scores = np.take_along_axis(scores, order, axis=1)
+
+        for position, row in enumerate(block_rows):
+            keep = scores[position] > 0
+            yield int(row), candidates[position][keep], scores[position][keep]
+
+
+def load_corpus():
+    """(article_ids, matrix) for every LegalArticle, rows in id order"""
+    from .models import LegalArticle
+
+    article_ids = []
+
+    def documents():
+        rows = LegalArticle.objects.order_by('id').values_list(
+            'id', 'title', 'keywords', 'content'
+        ).iterator(chunk_size=2000)
+        for article_id, title, keywords, content in rows:
+            article_ids.append(article_id)
+            yield document_terms(title, keywords, content)
+
+    matrix = tfidf_matrix(documents())
+    return np.asarray(article_ids, dtype=np.int64), matrix
+
+
+def changed_article_ids(k=TOP_K):
+    """Articles edited since the last build, plus those with an incomplete neighbour list"""
+    from .models import LegalArticle, RelatedArticle
+
+    last_build = RelatedArticle.objects.aggregate(last=Max('computed_at'))['last']
+    if last_build is None:
+        return None
+
+    changed = set(
+        LegalArticle.objects.filter(updated_at__gt=last_build).values_list('id', flat=True)
+    )
+    complete = RelatedArticle.objects.values('article_id').annotate(n=Count('id')).filter(n__gte=k)
+    changed.update(
+        LegalArticle.objects.exclude(id__in=complete.values('article_id')).values_list('id', flat=True)
+    )
+    return changed
+
+
+def affected_rows(matrix, article_ids, changed_rows, k=TOP_K):
+    """
+    Rows whose neighbour lists may differ because changed_rows changed: the
+    changed rows themselves, rows that listed one of them, and rows for which
+    a changed row now scores above their current k-th neighbour.
+    """
+    from .models import RelatedArticle
+
+    changed_ids = article_ids[changed_rows].tolist()
+    affected_ids = set(changed_ids)
+    affected_ids.update(
+        RelatedArticle.objects.filter(related_id__in=changed_ids).values_list('article_id', flat=True)
+    )
+
+    thresholds = np.zeros(len(article_ids), dtype=np.float32)
+    lowest = RelatedArticle.objects.values('article_id').annotate(n=Count('id'), low=Min('score')).filter(n__gte=k)
+    positions = {article_id: row for row, article_id in enumerate(article_ids.tolist())}
+    for entry in lowest.iterator():
+        row = positions.get(entry['article_id'])
+        if row is not None:
+            thresholds[row] = entry['low']
+
+    transposed = matrix.T.tocsr()
+    block_size = max(1, BLOCK_CELLS // matrix.shape[0])
+    for block_start in range(0, len(changed_rows), block_size):
+        similarity = (matrix[changed_rows[block_start:block_start + block_size]] @ transposed).toarray()
+        rows = np.nonzero((similarity > thresholds).any(axis=0))[0]
+        affected_ids.update(article_ids[rows].tolist())
+
+    return np.asarray(sorted(positions[article_id] for article_id in affected_ids if article_id in positions))
+
+
+def store_neighbours(article_ids, neighbours, computed_at, replace_all=False):
+    """Write the neighbour lists yielded by nearest_neighbours, replacing any stored ones"""
+    from .models import RelatedArticle
+
+    stored = 0
+    with transaction.atomic():
+        if replace_all:
+            RelatedArticle.objects.all().delete()
+
+        pending_ids = []
+        batch = []
+
+        def flush():
+            if not replace_all:
+                RelatedArticle.objects.filter(article_id__in=pending_ids).delete()
+            RelatedArticle.objects.bulk_create(batch)
+            pending_ids.clear()
+            batch.clear()
+
+        for row, neighbour_rows, scores in neighbours:
+            article_id = int(article_ids[row])
+            pending_ids.append(article_id)
+            stored += 1
+            for rank, (neighbour_row, score) in enumerate(zip(neighbour_rows, scores)):
+                batch.append(RelatedArticle(
+                    article_id=article_id,
+                    related_id=int(article_ids[neighbour_row]),
+                    rank=rank,
+                    score=float(score),
+                    computed_at=computed_at
+                ))
+            if len(batch) >= STORE_BATCH_SIZE:
+                flush()
+        if pending_ids:
+            flush()
+    return stored
+
+
+def rebuild(full=False, article_ids=None, k=TOP_K):
+    """
+    Recompute stored neighbours and return the number of articles updated.
+
+    By default only articles changed since the last build (and the articles
+    whose lists they affect) are recomputed; the first build is always full.
+    """
+    computed_at = timezone.now()
+    corpus_ids, matrix = load_corpus()
+    if not len(corpus_ids):
+        return 0
+
+    if article_ids is None and not full:
+        article_ids = changed_article_ids(k)
+        full = article_ids is None
+
+    if full:
+        return store_neighbours(corpus_ids, nearest_neighbours(matrix, k=k), computed_at, replace_all=True)
+
+    changed_rows = np.nonzero(np.isin(corpus_ids, list(article_ids)))[0]
+    if not len(changed_rows):
+        return 0
+    rows = affected_rows(matrix, corpus_ids, changed_rows, k)
+    return store_neighbours(corpus_ids, nearest_neighbours(matrix, rows, k=k), computed_at)
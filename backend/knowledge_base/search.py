@@ -0,0 +1,336 @@
+"""
+In-process inverted index for LegalArticle search.
+
+Every article is analysed once (see analysis.py) into per-field posting
+lists. A query only walks the postings of its own terms and ranks the hits
+with BM25, weighting matches by field (title > article_number > keywords >
+content), so search never scans the articles table.
+"""
+import bisect
+import heapq
+import math
+import threading
+from collections import Counter, defaultdict, namedtuple
+
+from django.conf import settings
+
+from .analysis import analyze, analyze_query, get_analyzer
+from .index_version import ProcessIndex, reread_articles
+
+
+# Indexed fields in posting order, with their BM25F boosts
+FIELDS = ('title', 'article_number', 'keywords', 'content')
+FIELD_BOOSTS = (4.0, 3.0, 2.0, 1.0)
+
+# Position in a posting tuple of the term's first offset in content (-1 if absent)
+CONTENT_OFFSET = len(FIELDS)
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+# Maximum number of vocabulary terms a trailing prefix may expand to
+MAX_PREFIX_EXPANSIONS = 50
+
+# Terms found in more than this share of documents (and at least
+# COMMON_TERM_MIN_DOCS of them) only re-score hits of the rarer query terms
+# instead of scoring their whole posting list
+COMMON_TERM_RATIO = 0.1
+COMMON_TERM_MIN_DOCS = 1000
+
+# Number of per-term score tables kept between index changes
+SCORE_CACHE_SIZE = 2048
+
+
+# Ranked hits plus per-category match counts computed before category filtering
+SearchResult = namedtuple('SearchResult', ['total', 'hits', 'facets'])
+
+
+class InvertedIndex:
+    """
+    Posting lists keyed by term:
+    {term: {doc_id: (tf_title, tf_number, tf_keywords, tf_content, content_offset)}}
+
+    content_offset is where the term first occurs in the article text, so a
+    snippet window around the matches can be cut without re-reading the article.
+
+    Field length normalisation depends on corpus averages, so the per-document
+    weights are recomputed lazily after the index changes rather than on every
+    add/remove.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.postings = defaultdict(dict)
+        self.doc_terms = {}
+        self.doc_lengths = {}
+        self.doc_category = {}
+        self.field_totals = [0] * len(FIELDS)
+        self._vocabulary = None
+        self._norms = None
+        self._score_cache = {}
+
+    def __len__(self):
+        return len(self.doc_lengths)
+
+    def add(self, doc_id, category_id, title='', article_number='', keywords='', content=''):
+        """Index (or re-index) a single article"""
+        content_terms = get_analyzer().analyze_offsets(content)
+        field_tokens = [
+            analyze(title), analyze(article_number), analyze(keywords),
+            [term for term, _ in content_terms]
+        ]
+
+        frequencies = defaultdict(lambda: [0] * len(FIELDS) + [-1])
+        for field_index, tokens in enumerate(field_tokens):
+            for token in tokens:
+                frequencies[token][field_index] += 1
+        for term, offset in content_terms:
+            tfs = frequencies[term]
+            if tfs[CONTENT_OFFSET] < 0:
+                tfs[CONTENT_OFFSET] = offset
+
+        with self._lock:
+            self._remove(doc_id)
+
+            lengths = tuple(len(tokens) for tokens in field_tokens)
+            self.doc_lengths[doc_id] = lengths
+            self.doc_category[doc_id] = category_id
+            self.doc_terms[doc_id] = tuple(frequencies)
+            for field_index, length in enumerate(lengths):
+                self.field_totals[field_index] += length
+
+            for term, tfs in frequencies.items():
+                postings = self.postings[term]
+                if not postings:
+                    self._vocabulary = None
+                postings[doc_id] = tuple(tfs)
+
+            self._invalidate()
+
+    def remove(self, doc_id):
+        with self._lock:
+            self._remove(doc_id)
+            self._invalidate()
+
+    def _invalidate(self):
+        self._norms = None
+        self._score_cache = {}
+
+    def _remove(self, doc_id):
+        terms = self.doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+
+        for field_index, length in enumerate(self.doc_lengths.pop(doc_id)):
+            self.field_totals[field_index] -= length
+        self.doc_category.pop(doc_id, None)
+
+        for term in terms:
+            postings = self.postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(doc_id, None)
+            if not postings:
+                del self.postings[term]
+                self._vocabulary = None
+
+    def _field_norms(self):
+        """Per-document boost / length-normalisation factors for every field"""
+        norms = self._norms
+        if norms is not None:
+            return norms
+
+        with self._lock:
+            count = len(self.doc_lengths) or 1
+            averages = [(total / count) or 1.0 for total in self.field_totals]
+            norms = {
+                doc_id: tuple(
+                    boost / (1 - B + B * length / average)
+                    for boost, length, average in zip(FIELD_BOOSTS, lengths, averages)
+                )
+                for doc_id, lengths in self.doc_lengths.items()
+            }
+            self._norms = norms
+        return norms
+
+    @property
+    def vocabulary(self):
+        """Sorted term list, rebuilt lazily after terms are added or dropped"""
+        vocabulary = self._vocabulary
+        if vocabulary is None:
+            with self._lock:
+                vocabulary = self._vocabulary = sorted(self.postings)
+        return vocabulary
+
+    def expand_prefix(self, prefix):
+        """Vocabulary terms starting with prefix, used for the term being typed"""
+        vocabulary = self.vocabulary
+        position = bisect.bisect_left(vocabulary, prefix)
+        expansions = []
+        for term in vocabulary[position:position + MAX_PREFIX_EXPANSIONS]:
+            if not term.startswith(prefix):
+                break
+            expansions.append(term)
+        return expansions
+
+    def content_offsets(self, doc_id, terms):
+        """First content offsets of those terms that occur in the document's text"""
+        offsets = []
+        for term in terms:
+            tfs = self.postings.get(term, {}).get(doc_id)
+            if tfs is not None and tfs[CONTENT_OFFSET] >= 0:
+                offsets.append(tfs[CONTENT_OFFSET])
+        return offsets
+
+    def _term_scores(self, term):
+        """BM25 contribution of term to every document containing it"""
+        scores = self._score_cache.get(term)
+        if scores is not None:
+            return scores
+
+        norms = self._field_norms()
+        postings = self.postings.get(term, {})
+        doc_count = len(self.doc_lengths)
+        idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+
+        scores = {}
+        for doc_id, tfs in list(postings.items()):
+            weights = norms.get(doc_id)
+            if weights is None:
+                continue
+            tf = sum(count * weight for count, weight in zip(tfs[:CONTENT_OFFSET], weights))
+            scores[doc_id] = idf * tf * (K1 + 1) / (tf + K1)
+
+        if len(self._score_cache) >= SCORE_CACHE_SIZE:
+            self._score_cache = {}
+        self._score_cache[term] = scores
+        return scores
+
+    def query_terms(self, query):
+        terms = list(analyze_query(query))
+        if not terms:
+            return []
+
+        # Expand the last term as a prefix so partially typed queries still match
+        last = terms[-1]
+        if last not in self.postings:
+            terms = terms[:-1] + self.expand_prefix(last)
+        return list(dict.fromkeys(terms))
+
+    def search(self, query, category_id=None, limit=None):
+        """
+        Rank documents for query with BM25F.
+
+        Returns a SearchResult whose hits are [(doc_id, score), ...] best first,
+        truncated to limit when one is given, and whose facets are
+        [(category_id, count), ...] over all matches regardless of category_id.
+        """
+        terms = self.query_terms(query)
+        if not terms:
+            return SearchResult(0, [], [])
+
+        tables = [self._term_scores(term) for term in terms if term in self.postings]
+        cutoff = max(COMMON_TERM_MIN_DOCS, len(self.doc_lengths) * COMMON_TERM_RATIO)
+        rare = [table for table in tables if len(table) <= cutoff]
+        common = [table for table in tables if len(table) > cutoff]
+        if not rare:
+            rare, common = common, []
+
+        scores = defaultdict(float)
+        for table in rare:
+            for doc_id, score in table.items():
+                scores[doc_id] += score
+        for table in common:
+            for doc_id in scores:
+                scores[doc_id] += table.get(doc_id, 0.0)
+
+        facets = Counter(self.doc_category.get(doc_id) for doc_id in scores).most_common()
+
+        if category_id is not None:
+            category_id = int(category_id)
+            scores = {
+                doc_id: score for doc_id, score in scores.items()
+                if self.doc_category.get(doc_id) == category_id
+            }
+
+        if limit is None:
+            ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        else:
+            ranked = heapq.nsmallest(limit, scores.items(), key=lambda item: (-item[1], item[0]))
+        return SearchResult(len(scores), ranked, facets)
+
+
+def build_index():
+    """Build a fresh index from every LegalArticle in the database"""
+    from .models import LegalArticle
+
+    index = InvertedIndex()
+    rows = LegalArticle.objects.values_list(
+        'id', 'category_id', 'title', 'article_number', 'keywords', 'content'
+    ).iterator(chunk_size=2000)
+    for doc_id, category_id, title, article_number, keywords, content in rows:
+        index.add(doc_id, category_id, title, article_number, keywords, content)
+    return index
+
+
+def update_index(index, article_ids):
+    """Re-read changed articles into index"""
+    reread_articles(
+        article_ids, ('category_id', 'title', 'article_number', 'keywords', 'content'), index.add, index.remove
+    )
+
+
+_index = ProcessIndex(build_index, update_index)
+
+
+def get_index():
+    """Process-wide index, built from the database on first use and updated after writes elsewhere"""
+    return _index.get()
+
+
+def index_article(article):
+    """Keep an already built index in sync with a saved article"""
+    index = _index.index
+    if index is not None:
+        index.add(
+            article.id, article.category_id, article.title,
+            article.article_number, article.keywords, article.content
+        )
+
+
+def unindex_article(article_id):
+    index = _index.index
+    if index is not None:
+        index.remove(article_id)
+
+
+def reset_index():
+    """Drop the process-wide index; it is rebuilt on the next search"""
+    _index.reset()
+
+
+def get_backend_index():
+    """
+    The index ranked searches run against: the memory-mapped compiled file
+    when the backend is 'compiled' and one has been written, else this module's
+    """
+    if getattr(settings, 'KNOWLEDGE_BASE_SEARCH_BACKEND', 'memory') == 'compiled':
+        from .compiled import get_index as get_compiled_index
+        index = get_compiled_index()
+        if index is not None:
+            return index
+    return get_index()
+
+
+def search_articles(query, category_id=None, limit=None):
+    """
+    Ranked SearchResult for query from the configured backend.
+
+    KNOWLEDGE_BASE_SEARCH_BACKEND selects 'memory' (this module), 'compiled'
+    (compiled.py) or 'postgres' (the GIN-indexed tsvector in fulltext.py).
+    """
+    if getattr(settings, 'KNOWLEDGE_BASE_SEARCH_BACKEND', 'memory') == 'postgres':
+        from .fulltext import search_articles as fulltext_search
+        return fulltext_search(query, category_id=category_id, limit=limit)
+    return get_backend_index().search(query, category_id=category_id, limit=limit)
@@ -1,17 +1,19 @@
 from rest_framework import serializers
-from .models import LegalCategory, LegalArticle
+from .models import LegalCategory, LegalArticle, Keyword, StatuteNode
+
+# Characters of content shown in list/search snippets; one more is read to
+# tell whether anything was left out
+SNIPPET_LENGTH = 200
 
 
 class LegalCategorySerializer(serializers.ModelSerializer):
-    article_count = serializers.SerializerMethodField()
+    # From the Count annotation in categories.with_article_counts
+    article_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = LegalCategory
         fields = ['id', 'name', 'description', 'article_count']
 
-    def get_article_count(self, obj):
-        return obj.articles.count()
-
 
 class LegalArticleSerializer(serializers.ModelSerializer):
     category_name = serializers.CharField(source='category.name', read_only=True)
@@ -27,4 +29,93 @@ class LegalArticleSerializer(serializers.ModelSerializer):
             'content',
             'keywords',
             'created_at'
-        ]
\ No newline at end of file
+        ]
+
+
+class LegalArticleSummarySerializer(serializers.ModelSerializer):
+    """List/search projection: a bounded snippet instead of the full content"""
+    category_name = serializers.CharField(source='category.name', read_only=True)
+    snippet = serializers.SerializerMethodField()
+
+    class Meta:
+        model = LegalArticle
+        fields = [
+            'id',
+            'title',
+            'article_number',
+            'category',
+            'category_name',
+            'snippet',
+            'keywords',
+            'created_at'
+        ]
+
+    def get_snippet(self, obj):
+        """Leading text from the `snippet` annotation, cut back to a word boundary"""
+        snippet = getattr(obj, 'snippet', None)
+        if snippet is None:
+            return ''
+        if len(snippet) <= SNIPPET_LENGTH:
+            return snippet
+        # The annotation reads one character more, so a space there still counts as a boundary
+        cut = snippet.rfind(' ', 0, SNIPPET_LENGTH + 1)
+        return (snippet[:cut].rstrip(' ,;:') if cut > 0 else snippet[:SNIPPET_LENGTH]) + '…'
+
+
+class LegalArticleSearchHitSerializer(LegalArticleSummarySerializer):
+    """Summary projection whose snippet is cut around the query's matches"""
+    highlights = serializers.SerializerMethodField()
+
+    class Meta(LegalArticleSummarySerializer.Meta):
+        fields = LegalArticleSummarySerializer.Meta.fields + ['highlights']
+
+    def get_snippet(self, obj):
+        if hasattr(obj, 'highlighted_snippet'):
+            return obj.highlighted_snippet
+        return super().get_snippet(obj)
+
+    def get_highlights(self, obj):
+        """[start, end] character ranges of matched words within snippet"""
+        return getattr(obj, 'highlights', [])
+
+
+class RelatedArticleSerializer(LegalArticleSummarySerializer):
+    score = serializers.FloatField(read_only=True)
+
+    class Meta(LegalArticleSummarySerializer.Meta):
+        fields = LegalArticleSummarySerializer.Meta.fields + ['score']
+
+
+class PopularArticleSerializer(LegalArticleSummarySerializer):
+    views = serializers.IntegerField(read_only=True)
+
+    class Meta(LegalArticleSummarySerializer.Meta):
+        fields = LegalArticleSummarySerializer.Meta.fields + ['views']
+
+
+class StatuteNodeSerializer(serializers.ModelSerializer):
+    article_number = serializers.CharField(source='article.article_number', read_only=True, default=None)
+
+    class Meta:
+        model = StatuteNode
+        fields = ['id', 'kind', 'number', 'title', 'depth', 'parent', 'article', 'article_number']
+
+
+class StatuteNodeDetailSerializer(StatuteNodeSerializer):
+    """A node with its breadcrumb, from the `breadcrumb` list set by the view"""
+    breadcrumb = serializers.SerializerMethodField()
+
+    class Meta(StatuteNodeSerializer.Meta):
+        fields = StatuteNodeSerializer.Meta.fields + ['breadcrumb']
+
+    def get_breadcrumb(self, obj):
+        return [
+            {'id': node.id, 'kind': node.kind, 'number': node.number, 'title': node.title}
+            for node in getattr(obj, 'breadcrumb', [])
+        ]
+
+
+class KeywordSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Keyword
+        fields = ['id', 'name', 'article_count']
@@ -0,0 +1,91 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .models import ArticleTombstone, LegalArticle, LegalCategory
+from . import autocomplete, categories, fuzzy, index_version, references, search
+from .citations import parse_articles as parse_citations
+from .keywords import release_article_keywords, sync_article_keywords
+
+
+@receiver(post_save, sender=LegalArticle)
+def update_search_index(sender, instance, **kwargs):
+    """Re-index an article once the save is committed"""
+    versions = index_version.written_versions()
+
+    def reindex():
+        search.index_article(instance)
+        fuzzy.index_article(instance)
+        autocomplete.index_article(instance)
+        references.index_article(instance)
+        index_version.record_applied(versions, [instance.id])
+    transaction.on_commit(reindex)
+
+
+@receiver(post_save, sender=LegalArticle)
+def update_keyword_links(sender, instance, **kwargs):
+    """Mirror the comma-separated keywords into the Keyword tables in the same transaction"""
+    sync_article_keywords(instance)
+
+
+CITED_FIELDS = ('content', 'article_number')
+
+
+@receiver(pre_save, sender=LegalArticle)
+def remember_cited_fields(sender, instance, update_fields=None, **kwargs):
+    """The stored content and article_number, so update_citations can tell whether the save changes them"""
+    instance._stored_cited_fields = None
+    if instance.pk is None or (update_fields is not None and not set(CITED_FIELDS) & set(update_fields)):
+        return
+    instance._stored_cited_fields = (
+        LegalArticle.objects.filter(pk=instance.pk).values_list(*CITED_FIELDS).first()
+    )
+
+
+@receiver(post_save, sender=LegalArticle)
+def update_citations(sender, instance, update_fields=None, **kwargs):
+    """Re-extract the article's citations and link citations waiting for its article_number"""
+    if update_fields is not None and not set(CITED_FIELDS) & set(update_fields):
+        return
+    if getattr(instance, '_stored_cited_fields', None) == tuple(getattr(instance, field) for field in CITED_FIELDS):
+        return
+    parse_citations([instance])
+
+
+@receiver(pre_delete, sender=LegalArticle)
+def release_keyword_links(sender, instance, **kwargs):
+    release_article_keywords(instance.id)
+
+
+@receiver(post_delete, sender=LegalArticle)
+def remove_from_search_index(sender, instance, **kwargs):
+    article_id = instance.id
+    versions = index_version.written_versions()
+
+    def unindex():
+        search.unindex_article(article_id)
+        fuzzy.unindex_article(article_id)
+        autocomplete.unindex_article(article_id)
+        references.unindex_article(article_id)
+        index_version.record_applied(versions, [article_id])
+    transaction.on_commit(unindex)
+
+
+@receiver(post_delete, sender=LegalArticle)
+def record_tombstone(sender, instance, **kwargs):
+    """Remember the deletion so snapshot deltas can tell clients to drop the article"""
+    ArticleTombstone.objects.create(article_id=instance.id, article_number=instance.article_number)
+
+
+@receiver(post_save, sender=LegalArticle)
+def invalidate_category_counts(sender, instance, created, update_fields=None, **kwargs):
+    """A new article, or a save that may have changed its category, changes the counts"""
+    if created or update_fields is None or 'category' in update_fields or 'category_id' in update_fields:
+        categories.invalidate()
+
+
+@receiver(post_delete, sender=LegalArticle)
+@receiver(post_save, sender=LegalCategory)
+@receiver(post_delete, sender=LegalCategory)
+def invalidate_category_list(sender, **kwargs):
+    categories.invalidate()
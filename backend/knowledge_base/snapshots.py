@@ -0,0 +1,214 @@
+"""
+Versioned, precompressed snapshots of the knowledge base for caching clients.
+
+publish() writes the articles of every category as one JSON shard, plus a
+gzip copy (and a brotli copy when the brotli package is installed), into
+<KNOWLEDGE_BASE_SNAPSHOT_ROOT>/v<version>/. Shards never change once
+written, so they are served as files with strong ETags and immutable caching.
+changes_since() returns what was updated or deleted between two versions, so
+a client downloads the whole corpus once and only diffs after that.
+"""
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ArticleTombstone, KnowledgeBaseSnapshot, LegalArticle, LegalCategory
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Article fields in shards and deltas (category is the category id)
+ARTICLE_FIELDS = ('id', 'article_number', 'title', 'content', 'keywords', 'category', 'updated_at')
+
+# A save that started before a version's cut-off may commit after its shards
+# were read; deltas reach back this far so such rows are sent again
+CHANGES_OVERLAP = timedelta(minutes=5)
+
+# Deltas larger than this are refused in favour of downloading the shards
+MAX_CHANGED_ARTICLES = 5000
+
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+CHUNK_SIZE = 1 << 20
+
+# Content-Encoding -> file suffix, most preferred first
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'), ('identity', ''))
+
+
+def snapshot_root():
+    return settings.KNOWLEDGE_BASE_SNAPSHOT_ROOT
+
+
+def version_dir(version):
+    return os.path.join(snapshot_root(), f'v{version}')
+
+
+def shard_name(category_id):
+    return f'category-{category_id}.json'
+
+
+def shard_path(version, category_id, encoding='identity'):
+    suffix = dict(ENCODINGS)[encoding]
+    return os.path.join(version_dir(version), shard_name(category_id) + suffix)
+
+
+def shard_etag(sha256, encoding='identity'):
+    """Strong ETag of one encoding of a shard; each encoding is a different representation"""
+    return f'"{sha256}"' if encoding == 'identity' else f'"{sha256}-{encoding}"'
+
+
+def choose_encoding(accept_encoding, available):
+    """The preferred encoding in available that an Accept-Encoding header allows"""
+    accepted = set()
+    for part in (accept_encoding or '').split(','):
+        name, _, params = part.partition(';')
+        quality = params.strip().replace(' ', '')
+        if quality.startswith('q=') and not quality[2:].strip('0.'):
+            continue
+        accepted.add(name.strip().lower())
+
+    for encoding, _ in ENCODINGS:
+        if encoding in available and (encoding in accepted or '*' in accepted or encoding == 'identity'):
+            return encoding
+    return 'identity'
+
+
+def article_rows(queryset):
+    return queryset.values(*ARTICLE_FIELDS).iterator(chunk_size=2000)
+
+
+def _compress(path):
+    """Write compressed copies next to a shard; returns {encoding: size}"""
+    sizes = {}
+    with open(path, 'rb') as source, gzip.open(path + '.gz', 'wb', compresslevel=GZIP_LEVEL) as target:
+        shutil.copyfileobj(source, target, CHUNK_SIZE)
+    sizes['gzip'] = os.path.getsize(path + '.gz')
+
+    if brotli is not None:
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        with open(path, 'rb') as source, open(path + '.br', 'wb') as target:
+            for chunk in iter(lambda: source.read(CHUNK_SIZE), b''):
+                target.write(compressor.process(chunk))
+            target.write(compressor.finish())
+        sizes['br'] = os.path.getsize(path + '.br')
+    return sizes
+
+
+def _write_shard(directory, category, rows):
+    """Stream one category's rows into a JSON shard and its compressed copies"""
+    path = os.path.join(directory, shard_name(category['id']))
+    digest = hashlib.sha256()
+    count = 0
+
+    with open(path, 'wb') as handle:
+        def write(text):
+            data = text.encode('utf-8')
+            digest.update(data)
+            handle.write(data)
+
+        write('{"category": %s, "articles": [' % json.dumps(category, cls=DjangoJSONEncoder))
+        for row in rows:
+            write((',' if count else '') + json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False))
+            count += 1
+        write(']}')
+
+    sizes = {'identity': os.path.getsize(path)}
+    sizes.update(_compress(path))
+    return {
+        'category': category['id'],
+        'name': category['name'],
+        'articles': count,
+        'sha256': digest.hexdigest(),
+        'sizes': sizes,
+    }
+
+
+def _rows_by_category(categories):
+    """(category, rows) per category, from one pass over articles ordered by category"""
+    rows = article_rows(LegalArticle.objects.order_by('category_id', 'article_number'))
+    pending = next(rows, None)
+
+    def category_rows(category_id):
+        nonlocal pending
+        # Skip articles of categories created after the category list was read
+        while pending is not None and pending['category'] < category_id:
+            pending = next(rows, None)
+        while pending is not None and pending['category'] == category_id:
+            yield pending
+            pending = next(rows, None)
+
+    for category in categories:
+        yield category, category_rows(category['id'])
+
+
+def publish(keep=None):
+    """Write a new snapshot version and return its KnowledgeBaseSnapshot"""
+    root = snapshot_root()
+    os.makedirs(root, exist_ok=True)
+    published_up_to = timezone.now()
+    staging = tempfile.mkdtemp(prefix='.publishing-', dir=root)
+    # mkdtemp creates it private; shards may be served straight from disk by a web server
+    os.chmod(staging, 0o755)
+
+    try:
+        categories = list(LegalCategory.objects.order_by('id').values('id', 'name', 'description'))
+        shards = []
+        for category, rows in _rows_by_category(categories):
+            shards.append(_write_shard(staging, category, rows))
+
+        with transaction.atomic():
+            snapshot = KnowledgeBaseSnapshot.objects.create(
+                published_up_to=published_up_to,
+                article_count=sum(shard['articles'] for shard in shards),
+                manifest={'shards': shards},
+            )
+            # Published only once complete, under its final name
+            os.rename(staging, version_dir(snapshot.id))
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    if keep:
+        prune(keep)
+    return snapshot
+
+
+def prune(keep):
+    """Delete the shard files of all but the newest keep versions, and tombstones no delta needs"""
+    kept = list(KnowledgeBaseSnapshot.objects.filter(pruned=False).order_by('-id')[:keep])
+    if not kept:
+        return 0
+
+    stale = list(KnowledgeBaseSnapshot.objects.filter(pruned=False, id__lt=kept[-1].id))
+    for snapshot in stale:
+        shutil.rmtree(version_dir(snapshot.id), ignore_errors=True)
+    KnowledgeBaseSnapshot.objects.filter(id__in=[snapshot.id for snapshot in stale]).update(pruned=True)
+
+    ArticleTombstone.objects.filter(deleted_at__lt=kept[-1].published_up_to - CHANGES_OVERLAP).delete()
+    return len(stale)
+
+
+def changes_since(since, latest):
+    """
+    (changed articles queryset, deleted article ids) between two versions:
+    articles updated and deleted after since was cut, up to latest's cut
+    """
+    start = since.published_up_to - CHANGES_OVERLAP
+    changed = LegalArticle.objects.filter(
+        updated_at__gt=start, updated_at__lte=latest.published_up_to
+    ).order_by('id')
+    deleted = ArticleTombstone.objects.filter(
+        deleted_at__gt=start, deleted_at__lte=latest.published_up_to
+    ).order_by('article_id').values_list('article_id', flat=True)
+    return changed, list(deleted)
@@ -1,3 +1,714 @@
-from django.test import TestCase
+import gzip
+import io
+import json
+import os
+import tempfile
+import threading
+from collections import Counter
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, connections, transaction
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from rest_framework.test import APIClient
+
+from . import autocomplete, categories, compiled, fulltext, fuzzy, index_version, popularity, references, related, search, snapshots
+from .analysis import analyze
+from .benchmark import runner
+from .fuzzy import TrigramIndex, normalize_reference
+from .highlight import SNIPPET_WINDOW, TermMatcher, build_snippet, snippet_starts
+from .keywords import parse_keywords, sync_article_keywords
+from .models import ArticleCitation, ArticleTombstone, ArticleViewCount, Keyword, LegalArticle, LegalCategory, StatuteNode
+from .search import InvertedIndex
+from .serializers import SNIPPET_LENGTH
+
+
+def make_article(category, article_number, title='', content='', keywords=''):
+    return LegalArticle.objects.create(
+        category=category, article_number=article_number, title=title or article_number,
+        content=content or title or article_number, keywords=keywords
+    )
+
+
+def article_counts():
+    return dict(Keyword.objects.values_list('name', 'article_count'))
+
+
+class RankingTests(SimpleTestCase):
+    def setUp(self):
+        self.index = InvertedIndex()
+        self.index.add(1, 10, 'Punishment', 'Section 363 PPC', '', 'Whoever is guilty of abduction shall be punished')
+        self.index.add(2, 10, 'Abduction', 'Section 362 PPC', 'abduction', 'Whoever by force compels any person to go')
+        self.index.add(3, 20, 'Bail', 'Section 497 CrPC', '', 'When bail may be taken')
+
+    def test_title_matches_rank_above_content_matches(self):
+        result = self.index.search('abduction')
+        self.assertEqual([doc_id for doc_id, _ in result.hits], [2, 1])
+        self.assertEqual(result.facets, [(10, 2)])
+        self.assertEqual(self.index.search('abduction', category_id=20).total, 0)
+
+    def test_removed_articles_stop_matching(self):
+        self.index.remove(2)
+        self.assertEqual([doc_id for doc_id, _ in self.index.search('abduction').hits], [1])
+
+
+class FullTextSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.criminal = LegalCategory.objects.create(name='Criminal Law')
+        cls.procedure = LegalCategory.objects.create(name='Criminal Procedure')
+        cls.title_match = make_article(cls.criminal, 'Section 362 PPC', title='Abduction')
+        cls.content_match = make_article(
+            cls.criminal, 'Section 363 PPC', title='Punishment', content='Whoever is guilty of abduction shall be punished'
+        )
+        cls.other = make_article(cls.procedure, 'Section 497 CrPC', title='Bail', content='Bail in abduction cases')
+
+    def test_hits_are_ranked_with_facets_over_every_category(self):
+        result = fulltext.search_articles('abduction')
+        self.assertEqual(result.total, 3)
+        self.assertEqual(result.hits[0][0], self.title_match.id)
+        self.assertEqual(result.facets, [(self.criminal.id, 2), (self.procedure.id, 1)])
+
+        result = fulltext.search_articles('abduction', category_id=self.procedure.id)
+        self.assertEqual((result.total, [doc_id for doc_id, _ in result.hits]), (1, [self.other.id]))
+        self.assertEqual(result.facets, [(self.criminal.id, 2), (self.procedure.id, 1)])
+
+    def test_trigger_keeps_the_vector_current(self):
+        self.other.content = 'Bail in cases of kidnapping'
+        self.other.save()
+        self.assertEqual(fulltext.search_articles('abduction').total, 2)
+        self.assertEqual([doc_id for doc_id, _ in fulltext.search_articles('kidnapping').hits], [self.other.id])
+
+
+class FuzzyLookupTests(SimpleTestCase):
+    def test_citation_spellings_normalise_alike(self):
+        for text in ('s.302 P.P.C.', 'Sec. 302 PPC', 'u/s 302 Pakistan Penal Code', 'section302ppc'):
+            with self.subTest(text=text):
+                self.assertEqual(normalize_reference(text), 'section 302 ppc')
+        self.assertEqual(normalize_reference('Art 10-A Const.'), 'article 10a constitution')
+
+    def test_misspelt_titles_and_shorthand_numbers_match(self):
+        index = TrigramIndex()
+        index.add(1, 'Section 302 PPC', 'Punishment of qatl-i-amd')
+        index.add(2, 'Section 304 PPC', 'Proof of qisas in qatl-i-amd')
+        index.add(3, 'Article 10-A', 'Right to fair trial')
+
+        self.assertEqual(index.lookup('s.302 ppc')[0][::2], (1, 'article_number'))
+        self.assertEqual(index.lookup('qisaas')[0][::2], (2, 'title'))
+        self.assertEqual(index.lookup('fair trail')[0][::2], (3, 'title'))
+        self.assertEqual(index.lookup('bail'), [])
+
+
+class AnalyzerTests(SimpleTestCase):
+    def test_urdu_script_and_roman_urdu_meet_english_terms(self):
+        self.assertEqual(analyze('Qatl ki saza'), analyze('قتل کی سزا'))
+        self.assertEqual(analyze('Qatl ki saza'), analyze('murder punishment'))
+
+    def test_letter_variants_digits_and_diacritics_are_folded(self):
+        # Arabic yeh and Urdu digits
+        self.assertEqual(analyze('ڈکیتي ۳۰۲'), ['robbery', '302'])
+        self.assertEqual(analyze('Qisāṣ'), analyze('qisaas'))
+
+    def test_inflections_share_a_stem(self):
+        self.assertEqual(analyze('Marriages deceived'), analyze('the marriage deceive'))
+
+
+class KeywordTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = LegalCategory.objects.create(name='Criminal Law')
+
+    def test_parse_keywords_normalises_and_dedupes(self):
+        self.assertEqual(parse_keywords(' Murder,  QATL-E-AMD ,murder,, '), ['murder', 'qatl-e-amd'])
+
+    def test_counts_follow_added_and_removed_keywords(self):
+        article = make_article(self.category, '302 PPC', keywords='murder, qatl')
+        make_article(self.category, '300 PPC', keywords='Murder')
+        self.assertEqual(article_counts(), {'murder': 2, 'qatl': 1})
+
+        article.keywords = 'qatl, punishment'
+        article.save()
+        self.assertEqual(article_counts(), {'murder': 1, 'qatl': 1, 'punishment': 1})
+
+        article.delete()
+        self.assertEqual(article_counts(), {'murder': 1, 'qatl': 0, 'punishment': 0})
+
+    def test_listing_is_paginated_by_frequency(self):
+        make_article(self.category, '302 PPC', keywords='murder, qatl')
+        make_article(self.category, '300 PPC', keywords='murder')
+        response = APIClient().get('/api/knowledge-base/keywords/', {'page_size': 1})
+        self.assertEqual([row['name'] for row in response.json()['results']], ['murder'])
+        response = APIClient().get(response.json()['next'])
+        self.assertEqual([row['name'] for row in response.json()['results']], ['qatl'])
+        self.assertIsNone(response.json()['next'])
+
+    def test_pages_through_more_ties_than_the_offset_cutoff(self):
+        Keyword.objects.bulk_create([Keyword(name=f'term{number:04}', article_count=1) for number in range(1200)])
+        Keyword.objects.create(name='murder', article_count=2)
+        client = APIClient()
+        names = []
+        url = '/api/knowledge-base/keywords/?page_size=500'
+        while url:
+            page = client.get(url).json()
+            names += [row['name'] for row in page['results']]
+            url = page['next']
+        self.assertEqual(names, ['murder'] + [f'term{number:04}' for number in range(1200)])
+
+
+class ConcurrentKeywordSyncTests(TransactionTestCase):
+    def test_concurrent_syncs_count_a_link_once(self):
+        category = LegalCategory.objects.create(name='Criminal Law')
+        article = make_article(category, '302 PPC')
+        LegalArticle.objects.filter(id=article.id).update(keywords='murder')
+        article.keywords = 'murder'
+        Keyword.objects.create(name='murder')
+
+        # The first sync holds its uncommitted link while the second tries to insert the same one
+        linked, done = threading.Event(), threading.Event()
+
+        def first():
+            try:
+                with transaction.atomic():
+                    sync_article_keywords(article)
+                    linked.set()
+                    done.wait(1)
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=first)
+        thread.start()
+        linked.wait()
+        second = threading.Thread(target=lambda: (sync_article_keywords(article), connection.close()))
+        second.start()
+        second.join(0.5)
+        done.set()
+        thread.join()
+        second.join()
+
+        self.assertEqual(article_counts(), {'murder': 1})
+
+
+class AutocompleteTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = LegalCategory.objects.create(name='Criminal Law')
+        cls.punishment = make_article(category, 'Section 302 PPC', title='Punishment of qatl-i-amd', keywords='murder')
+        cls.definition = make_article(category, 'Section 300 PPC', title='Qatl-i-amd')
+
+    def complete(self, q, **params):
+        with mock.patch.object(index_version, 'CHECK_INTERVAL', 0):
+            response = APIClient().get('/api/knowledge-base/articles/autocomplete/', {'q': q, **params})
+        return [row['id'] for row in response.json()]
+
+    def test_numbers_titles_and_keywords_complete(self):
+        self.assertEqual(self.complete('s.302'), [self.punishment.id])
+        # A title starting with the prefix ranks above one with the word later on
+        self.assertEqual(self.complete('qatl'), [self.definition.id, self.punishment.id])
+        self.assertEqual(self.complete('qatl', limit=1), [self.definition.id])
+        self.assertEqual(self.complete('murd'), [self.punishment.id])
+        self.assertEqual(self.complete('bail'), [])
+
+
+class SnippetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = LegalCategory.objects.create(name='Criminal Law')
+
+    def snippets(self):
+        response = APIClient().get('/api/knowledge-base/articles/')
+        return {row['article_number']: row['snippet'] for row in response.json()['results']}
+
+    def test_list_returns_bounded_snippets(self):
+        exact = ('word ' * 40)[:SNIPPET_LENGTH]
+        make_article(self.category, 'exact', content=exact)
+        make_article(self.category, 'longer', content=exact + ' more')
+        make_article(self.category, 'unbroken', content='x' * (SNIPPET_LENGTH + 10))
+
+        snippets = self.snippets()
+        self.assertEqual(snippets['exact'], exact)
+        self.assertEqual(snippets['longer'], exact.rstrip() + '…')
+        self.assertEqual(snippets['unbroken'], 'x' * SNIPPET_LENGTH + '…')
+
+
+@override_settings(KNOWLEDGE_BASE_SEARCH_BACKEND='memory')
+class HighlightTests(TestCase):
+    def test_snippet_is_cut_around_the_matches(self):
+        category = LegalCategory.objects.create(name='Criminal Law')
+        content = 'Whoever takes property ' * 30 + 'by abduction of a woman' + ' and is liable to fine' * 30
+        make_article(category, 'Section 365-B PPC', title='Kidnapping', content=content)
+
+        with mock.patch.object(index_version, 'CHECK_INTERVAL', 0):
+            response = APIClient().get('/api/knowledge-base/articles/search/', {'q': 'abduction'})
+        hit = response.json()['results'][0]
+        self.assertTrue(hit['snippet'].startswith('…') and hit['snippet'].endswith('…'))
+        self.assertLess(len(hit['snippet']), 250)
+        self.assertEqual([hit['snippet'][start:end] for start, end in hit['highlights']], ['abduction'])
+
+    def test_window_offsets_count_the_stripped_diacritics(self):
+        # Every word before the match carries harakat the analyzer strips
+        content = 'اَلْحَمْدُ لِلّٰهِ ' * 60 + 'نکاح' + ' وَالسَّلَامُ' * 30
+        index = InvertedIndex()
+        index.add(1, 10, 'Registration', 'Section 5 MFLO', '', content)
+
+        start = snippet_starts([(1, 1.0)], 'nikah', index=index)[1]
+        snippet, highlights = build_snippet(content[start:start + SNIPPET_WINDOW], start, TermMatcher('nikah'))
+        self.assertEqual([snippet[begin:end] for begin, end in highlights], ['نکاح'])
+
+
+class RelatedArticleTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = LegalCategory.objects.create(name='Criminal Law')
+        cls.abduction = make_article(cls.category, 'Section 364-A PPC', title='Child abduction', content='Abduction of a child for ransom')
+        cls.ransom = make_article(cls.category, 'Section 365-A PPC', title='Kidnapping for ransom', content='Kidnapping or abduction for extorting ransom')
+        cls.bail = make_article(cls.category, 'Section 497 CrPC', title='Bail', content='Release on bail with sureties')
+
+    def related_ids(self, article):
+        response = APIClient().get(f'/api/knowledge-base/articles/{article.id}/related/')
+        return [row['id'] for row in response.json()['results']]
+
+    def test_neighbours_share_terms_and_follow_changes(self):
+        related.rebuild(full=True)
+        self.assertEqual(self.related_ids(self.abduction), [self.ransom.id])
+        self.assertEqual(self.related_ids(self.bail), [])
+
+        surety = make_article(self.category, 'Section 499 CrPC', title='Bond', content='Bond of accused and sureties')
+        related.rebuild()
+        self.assertEqual(self.related_ids(self.bail), [surety.id])
+        self.assertEqual(self.related_ids(surety), [self.bail.id])
+
+
+class ImportTests(TestCase):
+    def import_statutes(self, records):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'ppc.jsonl')
+        with open(path, 'w') as handle:
+            for record in records:
+                handle.write((record if isinstance(record, str) else json.dumps(record)) + '\n')
+        output = io.StringIO()
+        call_command('import_statutes', path, '--batch-size', '2', stdout=output)
+        return output.getvalue()
+
+    def test_rerunning_an_import_changes_nothing(self):
+        records = [
+            {'article_number': 'Section 302 PPC', 'title': 'Punishment of qatl-i-amd',
+             'content': 'Whoever commits qatl-i-amd', 'keywords': 'murder', 'category': 'Criminal Law'},
+            {'article_number': 'Section 109 PPC', 'title': 'Abetment',
+             'content': 'Abetment of an offence under section 302', 'keywords': 'murder, abetment',
+             'category': 'Criminal Law'},
+            '{not json',
+            {'article_number': 'Section 34 PPC', 'title': 'Common intention', 'content': 'Acts done by several persons',
+             'category': 'Criminal Law'},
+        ]
+        output = self.import_statutes(records)
+        self.assertIn('3 records imported (3 inserted or changed, 0 unchanged), 1 invalid', output)
+        stored = list(LegalArticle.objects.values_list('article_number', 'updated_at'))
+        cites = dict(ArticleCitation.objects.values_list('reference', 'target__article_number'))
+
+        output = self.import_statutes(records)
+        self.assertIn('3 records imported (0 inserted or changed, 3 unchanged)', output)
+        self.assertEqual(list(LegalArticle.objects.values_list('article_number', 'updated_at')), stored)
+        self.assertEqual(LegalCategory.objects.count(), 1)
+        self.assertEqual(article_counts(), {'murder': 2, 'abetment': 1})
+        self.assertEqual(cites, {'section 302 ppc': 'Section 302 PPC'})
+        self.assertEqual(dict(ArticleCitation.objects.values_list('reference', 'target__article_number')), cites)
+
+
+class CitationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = LegalCategory.objects.create(name='Criminal Law')
+
+    def setUp(self):
+        patcher = mock.patch.object(index_version, 'CHECK_INTERVAL', 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def cites(self, article):
+        return dict(ArticleCitation.objects.filter(source=article).values_list('reference', 'target_id'))
+
+    def test_citations_are_extracted_and_linked_when_their_target_arrives(self):
+        abetment = make_article(
+            self.category, 'Section 109 PPC', content='Abetment of an offence under sections 302 and 34 of this Code'
+        )
+        self.assertEqual(self.cites(abetment), {'section 302 ppc': None, 'section 34 ppc': None})
+
+        murder = make_article(self.category, 'Section 302 PPC', content='Whoever commits qatl-i-amd')
+        self.assertEqual(self.cites(abetment), {'section 302 ppc': murder.id, 'section 34 ppc': None})
+
+    def test_only_changes_to_content_or_number_reparse(self):
+        article = make_article(self.category, 'Section 109 PPC', content='Under section 302 PPC')
+        with mock.patch('knowledge_base.signals.parse_citations') as parse:
+            article.title = 'Abetment'
+            article.save()
+            parse.assert_not_called()
+
+            article.content = 'Under section 34 PPC'
+            article.save()
+            parse.assert_called_once_with([article])
+
+    def test_citing_articles_page_both_ways(self):
+        murder = make_article(self.category, 'Section 302 PPC', content='Whoever commits qatl-i-amd')
+        for number in ('Section 109 PPC', 'Section 34 PPC', 'Section 311 PPC'):
+            make_article(self.category, number, content='Read with section 302 PPC')
+
+        client = APIClient()
+        url = f'/api/knowledge-base/articles/{murder.id}/cited-by/?page_size=2'
+        first = client.get(url).json()
+        second = client.get(first['next']).json()
+        self.assertEqual(
+            [row['article_number'] for row in first['results'] + second['results']],
+            ['Section 109 PPC', 'Section 311 PPC', 'Section 34 PPC']
+        )
+        self.assertIsNone(second['next'])
+        back = client.get(second['previous']).json()
+        self.assertEqual(back['results'], first['results'])
+        self.assertIsNone(back['previous'])
+
+
+class ResolveTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = LegalCategory.objects.create(name='Criminal Law')
+        cls.article = make_article(category, 'Section 302 PPC', title='Punishment of qatl-i-amd')
+
+    def resolve(self, data):
+        with mock.patch.object(index_version, 'CHECK_INTERVAL', 0):
+            return APIClient().post('/api/knowledge-base/articles/resolve/', data, format='json')
+
+    def test_resolves_citations_in_any_spelling(self):
+        response = self.resolve({'citations': ['s.302 P.P.C.', '302', 'section 999 ppc']})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['resolved'], 2)
+        self.assertEqual(
+            [row['id'] for row in response.json()['results']], [self.article.id, self.article.id, None]
+        )
+
+    def test_malformed_bodies_are_rejected(self):
+        for data in (['s.302 PPC'], 's.302 PPC', {'citations': 's.302 PPC'}, {'citations': ['302'], 'code': 5}):
+            with self.subTest(data=data):
+                self.assertEqual(self.resolve(data).status_code, 400)
+
+
+class SnapshotTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = LegalCategory.objects.create(name='Criminal Law')
+        cls.murder = make_article(cls.category, 'Section 302 PPC', title='Punishment of qatl-i-amd')
+        cls.abetment = make_article(cls.category, 'Section 109 PPC', title='Abetment')
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings = override_settings(KNOWLEDGE_BASE_SNAPSHOT_ROOT=directory.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.client = APIClient()
+
+    def test_manifest_and_shards_honour_if_none_match(self):
+        snapshot = snapshots.publish()
+        response = self.client.get('/api/knowledge-base/snapshots/')
+        self.assertEqual(response.json()['version'], snapshot.id)
+        self.assertEqual(
+            self.client.get('/api/knowledge-base/snapshots/', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304
+        )
+
+        url = response.json()['shards'][0]['url']
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        shard = json.loads(gzip.decompress(b''.join(response.streaming_content)))
+        self.assertIn('Section 302 PPC', json.dumps(shard))
+        self.assertEqual(
+            self.client.get(url, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304
+        )
+
+    def test_changes_since_a_version(self):
+        first = snapshots.publish()
+        self.murder.title = 'Punishment of murder'
+        self.murder.save()
+        abetment_id = self.abetment.id
+        self.abetment.delete()
+        latest = snapshots.publish()
+
+        response = self.client.get('/api/knowledge-base/snapshots/changes/', {'since': first.id})
+        self.assertEqual(response.json()['version'], latest.id)
+        changed = {row['id']: row['title'] for row in response.json()['changed']}
+        self.assertEqual(changed[self.murder.id], 'Punishment of murder')
+        self.assertEqual(response.json()['deleted'], [abetment_id])
+        self.assertEqual(self.client.get('/api/knowledge-base/snapshots/changes/', {'since': 999}).status_code, 410)
+
+    def test_tombstones_hold_ids_past_32_bits(self):
+        first = snapshots.publish()
+        ArticleTombstone.objects.create(article_id=2 ** 31 + 7, article_number='Section 999 PPC')
+        snapshots.publish()
+        response = self.client.get('/api/knowledge-base/snapshots/changes/', {'since': first.id})
+        self.assertEqual(response.json()['deleted'], [2 ** 31 + 7])
+
+
+class CompiledIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        criminal = LegalCategory.objects.create(name='Criminal Law')
+        procedure = LegalCategory.objects.create(name='Criminal Procedure')
+        cls.abduction = make_article(criminal, 'Section 362 PPC', title='Abduction', content='Whoever by force compels')
+        make_article(criminal, 'Section 363 PPC', title='Punishment', content='Whoever is guilty of abduction')
+        make_article(procedure, 'Section 497 CrPC', title='Bail', content='Bail in abduction cases')
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'search.kbindex')
+        compiled.compile_index(self.path)
+
+    def test_compiled_file_ranks_like_the_memory_index(self):
+        index = compiled.CompiledIndex.open(self.path)
+        expected = search.build_index().search('abduction')
+        result = index.search('abduction')
+        self.assertEqual([doc_id for doc_id, _ in result.hits], [doc_id for doc_id, _ in expected.hits])
+        self.assertEqual(
+            [round(score, 6) for _, score in result.hits], [round(score, 6) for _, score in expected.hits]
+        )
+        self.assertEqual(result.facets, expected.facets)
+        self.assertEqual(index.stored_fields(self.abduction.id)['content'], 'Whoever by force compels')
+
+    def test_search_is_served_from_the_mapped_file(self):
+        with override_settings(KNOWLEDGE_BASE_SEARCH_BACKEND='compiled', KNOWLEDGE_BASE_COMPILED_INDEX=self.path), \
+                mock.patch.object(compiled, '_index', None), mock.patch.object(compiled, '_checked_at', None), \
+                self.assertNumQueries(0):
+            response = APIClient().get('/api/knowledge-base/articles/search/', {'q': 'abduction'})
+        self.assertEqual(response.json()['count'], 3)
+        self.assertEqual(response.json()['results'][0]['article_number'], 'Section 362 PPC')
+        self.assertEqual(
+            [facet['category_name'] for facet in response.json()['facets']], ['Criminal Law', 'Criminal Procedure']
+        )
+
+
+class CategoryCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.criminal = LegalCategory.objects.create(name='Criminal Law')
+        cls.family = LegalCategory.objects.create(name='Family Law')
+        make_article(cls.criminal, 'Section 302 PPC')
+        make_article(cls.criminal, 'Section 109 PPC')
+
+    def setUp(self):
+        cache.delete(categories.CACHE_KEY)
+
+    def counts(self):
+        response = APIClient().get('/api/knowledge-base/categories/')
+        return {row['name']: row['article_count'] for row in response.json()}
+
+    def test_counts_come_from_one_query_then_the_cache(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.counts(), {'Criminal Law': 2, 'Family Law': 0})
+        with self.assertNumQueries(0):
+            self.counts()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            make_article(self.family, 'Section 5 MFLO')
+        self.assertEqual(self.counts(), {'Criminal Law': 2, 'Family Law': 1})
+
+
+class ViewCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.criminal = LegalCategory.objects.create(name='Criminal Law')
+        cls.family = LegalCategory.objects.create(name='Family Law')
+        cls.murder = make_article(cls.criminal, 'Section 302 PPC')
+        cls.abetment = make_article(cls.criminal, 'Section 109 PPC')
+        cls.divorce = make_article(cls.family, 'Section 7 MFLO')
+
+    def setUp(self):
+        patcher = mock.patch.object(popularity, '_pending', Counter())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def view(self, article, times):
+        for _ in range(times):
+            APIClient().get(f'/api/knowledge-base/articles/{article.id}/')
+
+    def popular(self, **params):
+        response = APIClient().get('/api/knowledge-base/articles/popular/', params)
+        return [(row['id'], row['views']) for row in response.json()]
+
+    def test_views_are_buffered_then_ranked(self):
+        with mock.patch.object(popularity, 'FLUSH_INTERVAL', 3600):
+            self.view(self.abetment, 1)
+            self.view(self.divorce, 2)
+            self.view(self.murder, 3)
+            # A view of an article deleted before the flush is dropped
+            popularity.record_view(self.murder.id + 1000)
+            self.assertFalse(ArticleViewCount.objects.exists())
+
+        self.assertEqual(popularity.flush(), 4)
+        self.assertEqual(
+            dict(ArticleViewCount.objects.values_list('article_id', 'views')),
+            {self.murder.id: 3, self.divorce.id: 2, self.abetment.id: 1}
+        )
+
+        popularity.refresh()
+        self.assertEqual(self.popular(), [(self.murder.id, 3), (self.divorce.id, 2), (self.abetment.id, 1)])
+        self.assertEqual(self.popular(category=self.criminal.id), [(self.murder.id, 3), (self.abetment.id, 1)])
+
+
+class BenchmarkTests(TestCase):
+    dataset = {
+        'articles': [
+            {'article_number': 'Section 302 PPC', 'title': 'Punishment of qatl-i-amd',
+             'content': 'Whoever commits qatl-i-amd shall be punished with death', 'keywords': 'murder',
+             'category': 'Criminal Law'},
+            {'article_number': 'Section 497 CrPC', 'title': 'Bail in non-bailable offences',
+             'content': 'When any person accused of a non-bailable offence is arrested', 'keywords': 'bail',
+             'category': 'Criminal Procedure'},
+        ],
+        'queries': [
+            {'query': 'qatl ki saza', 'language': 'roman_urdu', 'relevant': ['Section 302 PPC']},
+            {'query': 'zamanat', 'language': 'roman_urdu', 'relevant': ['Section 497 CrPC']},
+            {'query': 'haq mehr', 'language': 'roman_urdu', 'relevant': ['Section 5 MFLO']},
+        ],
+    }
+
+    def test_ranking_metrics(self):
+        self.assertEqual(runner.recall_at(['a', 'b', 'c'], {'b', 'd'}, 2), 0.5)
+        self.assertEqual(runner.reciprocal_rank(['a', 'b', 'c'], {'c'}), 1 / 3)
+        self.assertEqual(runner.reciprocal_rank(['a'], {'c'}), 0.0)
+
+    def test_run_scores_each_backend_and_rolls_the_corpus_back(self):
+        report = runner._run(self.dataset, [2, 20], ['memory', 'postgres'], (1, 5), repeat=1, seed=7, log=None)
+
+        self.assertEqual(
+            [(row['backend'], row['size']) for row in report['runs']],
+            [('memory', 2), ('postgres', 2), ('memory', 20), ('postgres', 20)]
+        )
+        memory = report['runs'][0]
+        self.assertEqual(memory['overall']['queries'], 3)
+        self.assertEqual(memory['overall']['recall@1'], 0.6667)
+        self.assertEqual(memory['overall']['mrr'], 0.6667)
+        self.assertEqual([miss['query'] for miss in memory['misses']], ['haq mehr'])
+        self.assertFalse(LegalArticle.objects.exists())
+
+
+class StatuteTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = LegalCategory.objects.create(name='Criminal Law')
+        cls.act = StatuteNode.objects.create(kind='act', title='Pakistan Penal Code')
+        cls.chapter = cls.act.add_child(kind='chapter', number='XVI', title='Offences affecting the human body')
+        cls.murder = cls.chapter.add_child(
+            kind='section', number='302', article=make_article(category, 'Section 302 PPC')
+        )
+        cls.subsection = cls.murder.add_child(kind='subsection', number='(a)')
+        cls.hurt = cls.chapter.add_child(kind='section', number='337')
+        cls.other_act = StatuteNode.objects.create(kind='act', title='Code of Criminal Procedure')
+        cls.other_act.add_child(kind='section', number='497')
+
+    def get(self, url, **params):
+        return APIClient().get(f'/api/knowledge-base/statutes/{url}', params).json()
+
+    def test_paths_follow_document_order(self):
+        self.assertEqual(
+            [self.act.path, self.chapter.path, self.murder.path, self.subsection.path, self.hurt.path, self.other_act.path],
+            ['00001', '0000100001', '000010000100001', '00001000010000100001', '000010000100002', '00002']
+        )
+
+    def test_breadcrumb_and_descendants(self):
+        node = self.get(f'{self.subsection.id}/')
+        self.assertEqual([crumb['id'] for crumb in node['breadcrumb']], [self.act.id, self.chapter.id, self.murder.id])
+
+        # The node, then its whole subtree in one prefix scan
+        with self.assertNumQueries(2):
+            page = self.get(f'{self.act.id}/descendants/', kind='section', page_size=1)
+        self.assertEqual([row['article_number'] for row in page['results']], ['Section 302 PPC'])
+        page = APIClient().get(page['next']).json()
+        self.assertEqual([row['id'] for row in page['results']], [self.hurt.id])
+        self.assertIsNone(page['next'])
+
+        self.assertEqual(
+            [row['id'] for row in self.get(f'{self.chapter.id}/children/')['results']], [self.murder.id, self.hurt.id]
+        )
+        self.assertEqual([row['id'] for row in self.get('')['results']], [self.act.id, self.other_act.id])
+
+
+class BlankSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        criminal = LegalCategory.objects.create(name='Criminal Law')
+        family = LegalCategory.objects.create(name='Family Law')
+        cls.category = criminal
+        for number in ('Section 302 PPC', 'Section 109 PPC'):
+            make_article(criminal, number)
+        make_article(family, 'Section 5 MFLO')
+
+    def test_blank_query_is_paged_by_article_number(self):
+        client = APIClient()
+        response = client.get('/api/knowledge-base/articles/search/', {'q': ' ', 'category': self.category.id, 'page_size': 1})
+        self.assertEqual([row['article_number'] for row in response.json()['results']], ['Section 109 PPC'])
+        response = client.get(response.json()['next'])
+        self.assertEqual([row['article_number'] for row in response.json()['results']], ['Section 302 PPC'])
+        self.assertIsNone(response.json()['next'])
+
+    def test_non_integer_category_is_rejected(self):
+        response = APIClient().get('/api/knowledge-base/articles/search/', {'category': 'criminal'})
+        self.assertEqual(response.status_code, 400)
+
+
+class IndexVersionTests(TransactionTestCase):
+    def test_indexes_pick_up_writes_from_another_connection(self):
+        category = LegalCategory.objects.create(name='Criminal Law')
+        article = make_article(category, 'Section 302 PPC', title='Punishment')
+
+        with mock.patch.object(index_version, 'CHECK_INTERVAL', 0):
+            self.assertEqual(search.get_index().search('abduction').total, 0)
+            self.assertEqual(references.get_index().resolve('s.302 PPC'), article.id)
+
+            # Another worker's write: no signal reaches this process
+            other = connections.create_connection('default')
+            try:
+                with other.cursor() as cursor:
+                    cursor.execute(
+                        'UPDATE knowledge_base_legalarticle SET title = %s, article_number = %s WHERE id = %s',
+                        ['Punishment of abduction', 'Section 302-A PPC', article.id]
+                    )
+            finally:
+                other.close()
+
+            self.assertEqual([doc_id for doc_id, _ in search.get_index().search('abduction').hits], [article.id])
+            self.assertEqual(references.get_index().resolve('s.302 PPC'), None)
+
+    def test_own_saves_are_skipped_and_other_writes_reread(self):
+        category = LegalCategory.objects.create(name='Criminal Law')
+        article = make_article(category, 'Section 302 PPC', title='Punishment', content='Whoever commits qatl')
+        indexes = [search._index, fuzzy._index, autocomplete._index, references._index]
+
+        with mock.patch.object(index_version, 'CHECK_INTERVAL', 0):
+            for index in indexes:
+                index.get()
+            builds, updates = [], []
+            for index in indexes:
+                for method, calls in (('build', builds), ('update', updates)):
+                    patcher = mock.patch.object(index, method, wraps=getattr(index, method))
+                    calls.append(patcher.start())
+                    self.addCleanup(patcher.stop)
+
+            # Also reparses citations, which reads the reference map mid-save
+            article.title = 'Punishment of abduction'
+            article.content = 'Whoever commits qatl, read with section 34 PPC'
+            article.save()
+            for index in indexes:
+                index.get()
+            self.assertEqual([doc_id for doc_id, _ in search.get_index().search('abduction').hits], [article.id])
+            self.assertEqual([call.call_count for call in builds + updates], [0] * 8)
+
+            other = connections.create_connection('default')
+            try:
+                with other.cursor() as cursor:
+                    cursor.execute('UPDATE knowledge_base_legalarticle SET title = %s WHERE id = %s', ['Qisas', article.id])
+            finally:
+                other.close()
+            for index in indexes:
+                index.get()
+            self.assertEqual([call.call_count for call in builds], [0] * 4)
+            self.assertEqual([call.call_args.args[1] for call in updates], [{article.id}] * 4)
+            self.assertEqual(autocomplete.complete('qisas')[0]['id'], article.id)
@@ -5,6 +5,9 @@ from . import views
 router = DefaultRouter()
 router.register(r'categories', views.LegalCategoryViewSet, basename='category')
 router.register(r'articles', views.LegalArticleViewSet, basename='article')
+router.register(r'keywords', views.KeywordViewSet, basename='keyword')
+router.register(r'statutes', views.StatuteNodeViewSet, basename='statute')
+router.register(r'snapshots', views.KnowledgeBaseSnapshotViewSet, basename='snapshot')
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -2,71 +2,617 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
-from django.db.models import Q
-from .models import LegalCategory, LegalArticle
-from .serializers import LegalCategorySerializer, LegalArticleSerializer
+from django.conf import settings
+from django.http import FileResponse, Http404
+from django.urls import reverse
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags
+from django.db.models import Case, F, When, Value, IntegerField
+from django.db.models.functions import Substr
+from qanoon_assist.pagination import KeysetPagination
+from .models import LegalCategory, LegalArticle, Keyword, KnowledgeBaseSnapshot, StatuteNode
+from .serializers import (
+    LegalCategorySerializer, LegalArticleSerializer, LegalArticleSummarySerializer,
+    LegalArticleSearchHitSerializer, RelatedArticleSerializer, PopularArticleSerializer, KeywordSerializer,
+    StatuteNodeSerializer, StatuteNodeDetailSerializer, SNIPPET_LENGTH
+)
+from .highlight import SNIPPET_WINDOW, TermMatcher, build_snippet, snippet_starts
+from .keywords import normalize_keyword
+from .search import get_backend_index, search_articles
+from .compiled import CompiledIndex
+from .fuzzy import fuzzy_lookup
+from . import autocomplete as completions
+from . import categories
+from . import popularity
+from . import references
+from . import snapshots
+
+# Upper bound on ranked hits returned by a single search
+MAX_SEARCH_RESULTS = 200
+
+# Upper bound on citations resolved by a single articles/resolve/ call
+MAX_RESOLVE_CITATIONS = 500
+
+
+# Manifests and deltas change with each published version; shards never change
+LATEST_MAX_AGE = 60
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+
+def _int_param(value, default=None):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _not_modified(request, etag):
+    etags = parse_etags(request.headers.get('If-None-Match', ''))
+    return etag in etags or '*' in etags
 
 
 class LegalCategoryViewSet(viewsets.ReadOnlyModelViewSet):
-    """List all legal categories"""
-    queryset = LegalCategory.objects.all()
+    """List all legal categories, with article counts"""
     serializer_class = LegalCategorySerializer
     permission_classes = [AllowAny]
 
+    def get_queryset(self):
+        return categories.with_article_counts(LegalCategory.objects.order_by('id'))
+
+    def list(self, request, *args, **kwargs):
+        """Served from the cache until an article or category changes"""
+        return Response(categories.cached_list(
+            lambda: self.get_serializer(self.get_queryset(), many=True).data
+        ))
+
+
+class KeywordFrequencyPagination(KeysetPagination):
+    """Most frequent first, along the keyword_frequency index; the cursor keeps (article_count, name), so ties page by name"""
+    ordering = ('-article_count', 'name')
+
+
+class KeywordViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Browse keywords by frequency
+
+    Query params:
+    - prefix: keywords starting with this text (typeahead)
+    - name: a single exact keyword
+    """
+    serializer_class = KeywordSerializer
+    permission_classes = [AllowAny]
+    pagination_class = KeywordFrequencyPagination
+
+    def get_queryset(self):
+        queryset = Keyword.objects.filter(article_count__gt=0)
+
+        name = self.request.query_params.get('name', None)
+        if name:
+            return queryset.filter(name=normalize_keyword(name))
+
+        prefix = self.request.query_params.get('prefix', None)
+        if prefix:
+            queryset = queryset.filter(name__startswith=normalize_keyword(prefix))
+
+        return queryset.order_by('-article_count', 'name')
+
+
+class StatutePathPagination(KeysetPagination):
+    """Keyset pages in document order, so deep pages of a large act cost the same as the first"""
+    ordering = 'path'
+
+
+class ArticleNumberPagination(KeysetPagination):
+    ordering = 'article_number'
+
+
+class RelatedRankPagination(KeysetPagination):
+    """The rank of each related article (unique per source article), annotated by the related action"""
+    ordering = 'rank'
+
+
+class StatuteNodeViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Browse statutes as Act > Part > Chapter > Section > Subsection
+
+    - statutes/: the acts
+    - statutes/{id}/: a node and its breadcrumb
+    - statutes/{id}/children/: its direct children, paginated
+    - statutes/{id}/descendants/?kind=section: everything below it, paginated
+
+    Subtrees and breadcrumbs are path-prefix lookups on StatuteNode.path, so
+    none of these walk the tree level by level.
+    """
+    permission_classes = [AllowAny]
+    pagination_class = StatutePathPagination
+
+    def get_serializer_class(self):
+        if self.action == 'retrieve':
+            return StatuteNodeDetailSerializer
+        return StatuteNodeSerializer
+
+    def get_queryset(self):
+        queryset = StatuteNode.objects.select_related('article').only(
+            'id', 'kind', 'number', 'title', 'depth', 'path', 'parent_id', 'article__id', 'article__article_number'
+        )
+        if self.action == 'list':
+            return queryset.roots()
+        return queryset
+
+    def retrieve(self, request, *args, **kwargs):
+        node = self.get_object()
+        node.breadcrumb = list(
+            StatuteNode.objects.ancestors_of(node).only('id', 'kind', 'number', 'title', 'path', 'depth')
+        )
+        return Response(self.get_serializer(node).data)
+
+    def _paginated(self, queryset):
+        page = self.paginate_queryset(queryset)
+        return self.get_paginated_response(self.get_serializer(page, many=True).data)
+
+    @action(detail=True, methods=['get'])
+    def children(self, request, pk=None):
+        return self._paginated(self.get_queryset().filter(parent_id=pk))
+
+    @action(detail=True, methods=['get'])
+    def descendants(self, request, pk=None):
+        """Query params: kind, e.g. kind=section for every section under a chapter"""
+        node = self.get_object()
+        queryset = self.get_queryset().descendants_of(node)
+        kind = request.query_params.get('kind', None)
+        if kind:
+            queryset = queryset.filter(kind=kind)
+        return self._paginated(queryset)
+
 
 class LegalArticleViewSet(viewsets.ReadOnlyModelViewSet):
     """
     Retrieve articles with search and category filtering
-    
+
     Query params:
-    - search: keyword search in title, article_number, keywords, content
+    - search: ranked search over title, article_number, keywords, content
     - category: filter by category ID
+    - keyword: articles tagged with this exact keyword
+
+    List and search responses use the summary projection (snippet, no content);
+    the full text is only returned by the detail route.
     """
     queryset = LegalArticle.objects.all()
     serializer_class = LegalArticleSerializer
     permission_classes = [AllowAny]
+    pagination_class = ArticleNumberPagination
+
+    def get_serializer_class(self):
+        if self.action == 'retrieve':
+            return LegalArticleSerializer
+        if self.action == 'search':
+            return LegalArticleSearchHitSerializer
+        if self.action == 'related':
+            return RelatedArticleSerializer
+        if self.action == 'popular':
+            return PopularArticleSerializer
+        return LegalArticleSummarySerializer
+
+    @staticmethod
+    def summary_queryset(snippet=None):
+        """Articles with content deferred, a bounded snippet and the category joined"""
+        return (
+            LegalArticle.objects
+            .select_related('category')
+            .defer('content', 'search_vector')
+            .annotate(snippet=snippet or Substr('content', 1, SNIPPET_LENGTH + 1))
+        )
 
     def get_queryset(self):
-        queryset = LegalArticle.objects.all()
-        
-        # Keyword search
-        search = self.request.query_params.get('search', None)
-        if search:
-            queryset = queryset.filter(
-                Q(title__icontains=search) |
-                Q(article_number__icontains=search) |
-                Q(keywords__icontains=search) |
-                Q(content__icontains=search)
-            )
-        
+        if self.action == 'retrieve':
+            return LegalArticle.objects.select_related('category').defer('search_vector')
+
+        queryset = self.summary_queryset()
+
         # Category filter
         category = self.request.query_params.get('category', None)
         if category:
             queryset = queryset.filter(category_id=category)
-        
+
+        # Exact keyword, resolved through the indexed Keyword table
+        keyword = self.request.query_params.get('keyword', None)
+        if keyword:
+            queryset = queryset.filter(article_keywords__keyword__name=normalize_keyword(keyword))
+
+        # Keyword search, served from the search backend and ordered by relevance
+        search = self.request.query_params.get('search', None)
+        if search:
+            result = search_articles(
+                search,
+                category_id=_int_param(category),
+                limit=MAX_SEARCH_RESULTS
+            )
+            article_ids = [article_id for article_id, _ in result.hits]
+            relevance = Case(
+                *[When(pk=article_id, then=position) for position, article_id in enumerate(article_ids)]
+            ) if article_ids else 'article_number'
+            return queryset.filter(id__in=article_ids).order_by(relevance)
+
         return queryset.order_by('article_number')
 
+    def paginate_queryset(self, queryset):
+        # Search results are ordered by relevance, which has no cursor, and are capped at MAX_SEARCH_RESULTS
+        if self.action == 'list' and self.request.query_params.get('search'):
+            return None
+        return super().paginate_queryset(queryset)
+
+    def retrieve(self, request, *args, **kwargs):
+        """The full article; each call counts as a view (buffered, see popularity.py)"""
+        response = super().retrieve(request, *args, **kwargs)
+        popularity.record_view(response.data['id'])
+        return response
+
     @action(detail=False, methods=['get'])
     def search(self, request):
-        """Advanced search endpoint"""
+        """
+        Advanced search endpoint, ranked by relevance
+
+        Also returns per-category match counts ("facets") for the query,
+        computed before the optional category filter is applied.
+
+        A blank q returns every article (of the category) in keyset pages by
+        article_number instead, with next/previous links and no count.
+
+        mode=fuzzy instead returns the closest article numbers and titles by
+        trigram similarity, for misspelt or abbreviated queries ("s.302 ppc").
+
+        Ranked results carry a snippet cut around the matched terms and the
+        [start, end] ranges of the matches within it ("highlights").
+        """
         search_term = request.query_params.get('q', '')
         category_id = request.query_params.get('category', None)
-        
-        queryset = LegalArticle.objects.all()
-        
-        if search_term:
-            queryset = queryset.filter(
-                Q(title__icontains=search_term) |
-                Q(article_number__icontains=search_term) |
-                Q(keywords__icontains=search_term) |
-                Q(content__icontains=search_term)
+        mode = request.query_params.get('mode', 'ranked')
+
+        if category_id and _int_param(category_id) is None:
+            return Response(
+                {'error': 'category must be an integer'},
+                status=status.HTTP_400_BAD_REQUEST
             )
-        
-        if category_id:
-            queryset = queryset.filter(category_id=category_id)
-        
+
+        if not search_term.strip():
+            # Nothing to rank by: keyset pages by article_number, as the list route
+            queryset = self.summary_queryset()
+            if category_id:
+                queryset = queryset.filter(category_id=category_id)
+            page = self.paginate_queryset(queryset)
+            return self.get_paginated_response(self.get_serializer(page, many=True).data)
+
+        limit = min(_int_param(request.query_params.get('limit'), MAX_SEARCH_RESULTS), MAX_SEARCH_RESULTS)
+
+        if mode == 'fuzzy':
+            return self._fuzzy_search(search_term, _int_param(category_id), max(limit, 1))
+        if mode != 'ranked':
+            return Response(
+                {'error': "mode must be 'ranked' or 'fuzzy'"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        index = get_backend_index() if getattr(settings, 'KNOWLEDGE_BASE_SEARCH_BACKEND', 'memory') == 'compiled' else None
+        if isinstance(index, CompiledIndex):
+            # Hits, windows and facet names all come from the memory-mapped file
+            result = index.search(search_term, category_id=_int_param(category_id), limit=max(limit, 1))
+            starts = snippet_starts(result.hits, search_term, index=index)
+            articles = index.articles({article_id: (start, SNIPPET_WINDOW) for article_id, start in starts.items()})
+            category_names = index.categories
+        else:
+            result = search_articles(
+                search_term,
+                category_id=_int_param(category_id),
+                limit=max(limit, 1)
+            )
+
+            # Read only a bounded window of content per hit, positioned over its matches
+            starts = snippet_starts(result.hits, search_term)
+            window_start = Case(
+                *[When(pk=article_id, then=Value(start + 1)) for article_id, start in starts.items()],
+                default=Value(1),
+                output_field=IntegerField()
+            )
+            articles = (
+                self.summary_queryset(snippet=Substr('content', window_start, SNIPPET_WINDOW))
+                .in_bulk(list(starts))
+            )
+            category_names = dict(
+                LegalCategory.objects.filter(id__in=[category for category, _ in result.facets])
+                .values_list('id', 'name')
+            ) if result.facets else {}
+
+        matcher = TermMatcher(search_term)
+        results = []
+        for article_id, _ in result.hits:
+            article = articles.get(article_id)
+            if article is None:
+                continue
+            article.highlighted_snippet, article.highlights = build_snippet(
+                article.snippet, starts[article_id], matcher
+            )
+            results.append(article)
+
+        serializer = self.get_serializer(results, many=True)
+        return Response({
+            'count': result.total,
+            'results': serializer.data,
+            'facets': [
+                {'category': category, 'category_name': category_names.get(category), 'count': count}
+                for category, count in result.facets
+            ]
+        })
+
+    @action(detail=False, methods=['get'])
+    def autocomplete(self, request):
+        """
+        Typeahead completions: id, article_number and title only
+
+        Query params:
+        - q: the text typed so far
+        - limit: number of completions (default 8, max 20)
+        """
+        limit = _int_param(request.query_params.get('limit'), completions.DEFAULT_LIMIT)
+        limit = min(max(limit, 1), completions.MAX_LIMIT)
+        return Response(completions.complete(request.query_params.get('q', ''), limit=limit))
+
+    def _paginated(self, queryset):
+        page = self.paginate_queryset(queryset)
+        return self.get_paginated_response(self.get_serializer(page, many=True).data)
+
+    @action(detail=True, methods=['get'], pagination_class=RelatedRankPagination)
+    def related(self, request, pk=None):
+        """Precomputed "see also" articles, most similar first (see build_related_articles)"""
+        return self._paginated(
+            self.summary_queryset()
+            .filter(related_to_links__article_id=pk)
+            .annotate(score=F('related_to_links__score'), rank=F('related_to_links__rank'))
+        )
+
+    @action(detail=False, methods=['get'])
+    def popular(self, request):
+        """
+        Most viewed articles, from the lists stored by refresh_popular_articles
+
+        Query params:
+        - category: most viewed in this category (default: across all categories)
+        """
+        category = request.query_params.get('category', None)
+        if category and _int_param(category) is None:
+            return Response(
+                {'error': 'category must be an integer'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        queryset = self.summary_queryset()
+        if category:
+            queryset = queryset.filter(popular_links__category_id=category)
+        else:
+            queryset = queryset.filter(popular_links__isnull=False, popular_links__category__isnull=True)
+        queryset = queryset.annotate(views=F('popular_links__views')).order_by('popular_links__rank')
         serializer = self.get_serializer(queryset, many=True)
+        return Response(serializer.data)
+
+    @action(detail=True, methods=['get'])
+    def cites(self, request, pk=None):
+        """Articles this article refers to in its text, via the citation graph"""
+        return self._paginated(self.summary_queryset().filter(incoming_citations__source_id=pk))
+
+    @action(detail=True, methods=['get'], url_path='cited-by')
+    def cited_by(self, request, pk=None):
+        """Articles whose text refers to this article"""
+        return self._paginated(self.summary_queryset().filter(outgoing_citations__target_id=pk))
+
+    @action(detail=False, methods=['post'])
+    def resolve(self, request):
+        """
+        Resolve many free-form citations in one call
+
+        Body:
+        - citations: list of strings such as "s.302 PPC", "Art 10-A", "302 P.P.C."
+        - code: optional statute assumed for citations that name none, e.g. "PPC"
+
+        Citations are resolved against the in-memory reference map; only the
+        matched articles' titles and categories are read from the database.
+        """
+        if not isinstance(request.data, dict):
+            return Response(
+                {'error': 'Body must be an object with a citations list'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        citations = request.data.get('citations')
+        if not isinstance(citations, list) or not all(isinstance(citation, str) for citation in citations):
+            return Response(
+                {'error': 'citations must be a list of strings'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(citations) > MAX_RESOLVE_CITATIONS:
+            return Response(
+                {'error': f'At most {MAX_RESOLVE_CITATIONS} citations can be resolved per request'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        default_code = request.data.get('code') or None
+        if default_code is not None and not isinstance(default_code, str):
+            return Response(
+                {'error': 'code must be a string'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        reference_map = references.get_index()
+        resolved = [
+            (citation,) + reference_map.resolve_citation(citation, default_code=default_code)
+            for citation in citations
+        ]
+
+        article_ids = {article_id for _, _, article_id in resolved if article_id is not None}
+        articles = {
+            row['id']: row for row in LegalArticle.objects.filter(id__in=article_ids).values(
+                'id', 'article_number', 'title', 'category', 'category__name'
+            )
+        } if article_ids else {}
+
+        results = []
+        for citation, reference, article_id in resolved:
+            article = articles.get(article_id)
+            results.append({
+                'citation': citation,
+                'reference': reference,
+                'resolved': article is not None,
+                'id': article['id'] if article else None,
+                'article_number': article['article_number'] if article else None,
+                'title': article['title'] if article else None,
+                'category': article['category'] if article else None,
+                'category_name': article['category__name'] if article else None,
+            })
+
+        return Response({
+            'count': len(results),
+            'resolved': sum(1 for result in results if result['resolved']),
+            'results': results
+        })
+
+    def _fuzzy_search(self, search_term, category_id, limit):
+        matches = fuzzy_lookup(search_term, limit=limit if category_id is None else MAX_SEARCH_RESULTS)
+
+        articles = self.summary_queryset().in_bulk([article_id for article_id, _, _ in matches])
+        results = []
+        for article_id, similarity, field in matches:
+            article = articles.get(article_id)
+            if article is None or (category_id is not None and article.category_id != category_id):
+                continue
+            data = self.get_serializer(article).data
+            data['similarity'] = similarity
+            data['matched_field'] = field
+            results.append(data)
+
+        results = results[:limit]
         return Response({
-            'count': queryset.count(),
-            'results': serializer.data
-        })
\ No newline at end of file
+            'count': len(results),
+            'results': results
+        })
+
+
+class KnowledgeBaseSnapshotViewSet(viewsets.ViewSet):
+    """
+    Versioned snapshots of the knowledge base for clients and CDNs that cache it
+
+    - snapshots/: manifest of the latest version, with a URL per category shard
+    - snapshots/{version}/: manifest of that version
+    - snapshots/{version}/shards/{category}/: a category's articles, precompressed
+    - snapshots/changes/?since={version}: articles changed and deleted since that
+      version, up to the latest one
+
+    Published by the publish_knowledge_base command.
+    """
+    permission_classes = [AllowAny]
+
+    def _manifest_response(self, request, snapshot, max_age):
+        etag = f'"v{snapshot.id}"'
+        if _not_modified(request, etag):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            shards = []
+            for shard in snapshot.manifest['shards']:
+                url = reverse('snapshot-shard', kwargs={'pk': snapshot.id, 'category': shard['category']})
+                shards.append(dict(shard, url=request.build_absolute_uri(url), etag=snapshots.shard_etag(shard['sha256'])))
+            response = Response({
+                'version': snapshot.id,
+                'published_at': snapshot.created_at,
+                'article_count': snapshot.article_count,
+                'shards': shards,
+            })
+        response['ETag'] = etag
+        patch_cache_control(response, public=True, max_age=max_age)
+        return response
+
+    def _published(self):
+        return KnowledgeBaseSnapshot.objects.filter(pruned=False).defer('manifest')
+
+    def list(self, request):
+        """Manifest of the latest version"""
+        snapshot = KnowledgeBaseSnapshot.objects.filter(pruned=False).first()
+        if snapshot is None:
+            return Response({'error': 'No snapshot has been published'}, status=status.HTTP_404_NOT_FOUND)
+        return self._manifest_response(request, snapshot, LATEST_MAX_AGE)
+
+    def retrieve(self, request, pk=None):
+        snapshot = KnowledgeBaseSnapshot.objects.filter(pk=_int_param(pk), pruned=False).first()
+        if snapshot is None:
+            raise Http404
+        return self._manifest_response(request, snapshot, IMMUTABLE_MAX_AGE)
+
+    @action(detail=True, methods=['get'], url_path=r'shards/(?P<category>\d+)')
+    def shard(self, request, pk=None, category=None):
+        """One category's articles, served from the precompressed file the client accepts"""
+        snapshot = KnowledgeBaseSnapshot.objects.filter(pk=_int_param(pk), pruned=False).first()
+        entry = next(
+            (shard for shard in snapshot.manifest['shards'] if shard['category'] == int(category)), None
+        ) if snapshot else None
+        if entry is None:
+            raise Http404
+
+        encoding = snapshots.choose_encoding(request.headers.get('Accept-Encoding'), entry['sizes'])
+        etag = snapshots.shard_etag(entry['sha256'], encoding)
+        if _not_modified(request, etag):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            try:
+                handle = open(snapshots.shard_path(snapshot.id, entry['category'], encoding), 'rb')
+            except FileNotFoundError:
+                raise Http404
+            response = FileResponse(handle, content_type='application/json')
+            if encoding != 'identity':
+                response['Content-Encoding'] = encoding
+
+        response['ETag'] = etag
+        patch_vary_headers(response, ['Accept-Encoding'])
+        patch_cache_control(response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True)
+        return response
+
+    @action(detail=False, methods=['get'])
+    def changes(self, request):
+        """
+        Articles updated and deleted since a version, up to the latest version
+
+        Query params:
+        - since: the version the client holds
+
+        Apply "changed" as upserts by id and drop the "deleted" ids, then keep
+        "version" for the next call. 410 means the delta is no longer (or too
+        large to be) served and the latest shards should be downloaded instead.
+        """
+        since_version = _int_param(request.query_params.get('since'))
+        if since_version is None:
+            return Response({'error': 'since must be a snapshot version'}, status=status.HTTP_400_BAD_REQUEST)
+
+        latest = self._published().first()
+        since = self._published().filter(pk=since_version).first()
+        if latest is None or since is None or since.id > latest.id:
+            return Response(
+                {'error': f'Version {since_version} is not available; download the latest snapshot',
+                 'version': latest.id if latest else None},
+                status=status.HTTP_410_GONE
+            )
+
+        etag = f'"v{since.id}-v{latest.id}"'
+        if _not_modified(request, etag):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            changed, deleted = snapshots.changes_since(since, latest)
+            if since.id == latest.id:
+                changed = changed.none()
+            elif changed.count() > snapshots.MAX_CHANGED_ARTICLES:
+                return Response(
+                    {'error': 'Too many changes; download the latest snapshot', 'version': latest.id},
+                    status=status.HTTP_410_GONE
+                )
+            response = Response({
+                'since': since.id,
+                'version': latest.id,
+                'categories': LegalCategory.objects.order_by('id').values('id', 'name', 'description'),
+                'changed': list(snapshots.article_rows(changed)),
+                'deleted': deleted if since.id != latest.id else [],
+            })
+        response['ETag'] = etag
+        patch_cache_control(response, public=True, max_age=LATEST_MAX_AGE)
+        return response
@@ -0,0 +1,29 @@
+"""
+Builds the in-process knowledge-base lookup structures when a worker starts,
+so the first typeahead or search request does not pay for loading the corpus.
+"""
+import logging
+import threading
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _build_all():
+    from . import autocomplete, fuzzy, references, search
+
+    for get_index in (autocomplete.get_index, references.get_index, search.get_backend_index, fuzzy.get_index):
+        try:
+            get_index()
+        except Exception:
+            logger.exception('Could not preload %s index', get_index.__module__)
+
+
+def preload_indexes():
+    """Start building the indexes in a background thread (KNOWLEDGE_BASE_PRELOAD_INDEXES)"""
+    if not getattr(settings, 'KNOWLEDGE_BASE_PRELOAD_INDEXES', False):
+        return None
+    thread = threading.Thread(target=_build_all, name='knowledge-base-warmup', daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.7 on 2026-10-17 20:16
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Built without locking writes out of the tables
+    atomic = False
+
+    dependencies = [
+        ('messaging', '0001_initial'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='message',
+            index=models.Index(fields=['case_request', 'timestamp', 'id'], name='message_case_request_time'),
+        ),
+        AddIndexConcurrently(
+            model_name='message',
+            index=models.Index(fields=['timestamp', 'id'], name='message_timestamp'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-17 20:18
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Built without locking writes out of the tables
+    atomic = False
+
+    dependencies = [
+        ('messaging', '0002_keyset_indexes'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='message',
+            index=models.Index(condition=models.Q(('is_read', False)), fields=['case_request'], name='message_unread'),
+        ),
+    ]
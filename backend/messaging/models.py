@@ -1,6 +1,13 @@
 from django.db import models
 from users.models import User
 from cases.models import CaseRequest
+from users.querysets import RoleScopedQuerySet
+
+
+class MessageQuerySet(RoleScopedQuerySet):
+    citizen_path = 'case_request__requester'
+    lawyer_path = 'case_request__lawyer'
+
 
 class Message(models.Model):
     case_request = models.ForeignKey(CaseRequest, on_delete=models.CASCADE, related_name='messages')
@@ -10,9 +17,18 @@ class Message(models.Model):
     timestamp = models.DateTimeField(auto_now_add=True)
     is_read = models.BooleanField(default=False)
     
+    objects = MessageQuerySet.as_manager()
+    
     class Meta:
         db_table = 'messages'
         ordering = ['timestamp']
+        indexes = [
+            # A conversation in order, and keyset pages across conversations
+            models.Index(fields=['case_request', 'timestamp', 'id'], name='message_case_request_time'),
+            models.Index(fields=['timestamp', 'id'], name='message_timestamp'),
+            # Unread counts; few messages stay unread, so this stays small
+            models.Index(fields=['case_request'], condition=models.Q(is_read=False), name='message_unread'),
+        ]
     
     def __str__(self):
         return f"Message from {self.sender.username} in case {self.case_request.id}"
\ No newline at end of file
@@ -1,3 +1,61 @@
 from django.test import TestCase
 
-# Create your tests here.
+from cases.models import CaseRequest
+from cases.tests import make_citizen, make_lawyer
+from users.models import User
+from .models import Message
+
+
+class ForUserTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.citizen = make_citizen('citizen', '35202-0000001-1')
+        cls.other_citizen = make_citizen('other', '35202-0000002-2')
+        cls.lawyer = make_lawyer('lawyer', 'BC-1')
+        cls.other_lawyer = make_lawyer('other_lawyer', 'BC-2')
+        cls.own = own = CaseRequest.objects.create(
+            requester=cls.citizen.citizen_profile, lawyer=cls.lawyer.lawyer_profile,
+            case_title='Own', case_type='Civil', description='...'
+        )
+        other = CaseRequest.objects.create(
+            requester=cls.other_citizen.citizen_profile, lawyer=cls.other_lawyer.lawyer_profile,
+            case_title='Other', case_type='Civil', description='...'
+        )
+        cls.own_messages = {
+            Message.objects.create(case_request=own, sender=cls.citizen, content='Hello').id,
+            Message.objects.create(case_request=own, sender=cls.lawyer, content='Hi').id,
+        }
+        Message.objects.create(case_request=other, sender=cls.other_citizen, content='Hello')
+
+    def scoped(self, user):
+        user = User.objects.get(id=user.id)
+        with self.assertNumQueries(1):
+            return {message.id for message in Message.objects.for_user(user).select_related('sender', 'case_request')}
+
+    def test_parties_see_their_case_messages(self):
+        self.assertEqual(self.scoped(self.citizen), self.own_messages)
+        self.assertEqual(self.scoped(self.lawyer), self.own_messages)
+
+    def test_admin_sees_all_messages(self):
+        admin = User.objects.create_user(username='admin', password='x', user_type='admin')
+        self.assertEqual(self.scoped(admin), set(Message.objects.values_list('id', flat=True)))
+
+    def test_list_endpoint(self):
+        from rest_framework.test import APIClient
+
+        client = APIClient()
+        client.force_authenticate(User.objects.get(id=self.lawyer.id))
+        response = client.get('/api/messages/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({message['id'] for message in response.json()['results']}, self.own_messages)
+
+    def test_conversation_is_paged_in_order(self):
+        from rest_framework.test import APIClient
+
+        client = APIClient()
+        client.force_authenticate(User.objects.get(id=self.citizen.id))
+        response = client.get('/api/messages/by_case/', {'case_request_id': self.own.id, 'page_size': 1})
+        self.assertEqual([message['content'] for message in response.json()['results']], ['Hello'])
+        response = client.get(response.json()['next'])
+        self.assertEqual([message['content'] for message in response.json()['results']], ['Hi'])
+        self.assertIsNone(response.json()['next'])
@@ -0,0 +1,128 @@
+"""
+Keyset (cursor) pagination for the list endpoints.
+
+Each page is one LIMIT-bounded query that continues from where the previous
+page's last row sorted, using a composite index on (scoping key, sort key,
+id), so the thousandth page costs what the first does. Subclasses name the
+ordering; it must end in a unique column (id, or a unique name or path) so
+rows with equal sort keys still come in a fixed order.
+
+The cursor holds the whole ordering key of its boundary row and pages filter
+on (a < x) OR (a = x AND b > y) ..., so runs of equal sort keys of any length
+page through without DRF's OFFSET fallback (capped at offset_cutoff, past
+which next links stop advancing).
+"""
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination, _reverse_ordering
+
+
+class KeysetPagination(CursorPagination):
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor.reverse
+        position = self.cursor.position if self.cursor else None
+
+        # Previous pages walk the reversed ordering back from the page's first row
+        ordering = _reverse_ordering(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            try:
+                queryset = queryset.filter(self._after(ordering, position))
+            except (TypeError, ValueError, ValidationError):
+                raise NotFound(self.invalid_cursor_message)
+
+        # One extra row tells whether there is a page beyond this one
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_more = len(results) > self.page_size
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    @staticmethod
+    def _after(ordering, position):
+        """Rows that sort after position under ordering"""
+        condition = Q(pk__in=[])
+        equal = Q()
+        for field, value in zip(ordering, position):
+            name = field.lstrip('-')
+            condition |= equal & Q(**{name + ('__lt' if field.startswith('-') else '__gt'): value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        position = self._get_position_from_instance(self.page[-1], self.ordering) if self.page else self.cursor.position
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=json.dumps(position)))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        position = self._get_position_from_instance(self.page[0], self.ordering) if self.page else self.cursor.position
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=json.dumps(position)))
+
+    def decode_cursor(self, request):
+        cursor = super().decode_cursor(request)
+        if cursor is None:
+            return None
+        try:
+            position = json.loads(cursor.position)
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return Cursor(offset=0, reverse=cursor.reverse, position=position)
+
+    def _get_position_from_instance(self, instance, ordering):
+        position = []
+        for field in ordering:
+            name = field.lstrip('-')
+            value = instance[name] if isinstance(instance, dict) else getattr(instance, name)
+            position.append(str(value))
+        return position
+
+
+class RequestDatePagination(KeysetPagination):
+    ordering = ('-request_date', '-id')
+
+
+class FilingDatePagination(KeysetPagination):
+    ordering = ('-filing_date', '-id')
+
+
+class HearingDatePagination(KeysetPagination):
+    ordering = ('-hearing_date', '-id')
+
+
+class CreatedAtPagination(KeysetPagination):
+    ordering = ('-created_at', '-id')
+
+
+class TimestampPagination(KeysetPagination):
+    ordering = ('timestamp', 'id')
+
+
+class NewestFirstPagination(KeysetPagination):
+    ordering = '-id'
@@ -0,0 +1,26 @@
+"""
+A throwaway database for load checks and benchmarks.
+
+These seed millions of rows, truncate tables and ANALYZE. A rollback does not
+undo ANALYZE: it rewrites the live tables' planner statistics in place. While
+they run, they also hold locks that block the site's readers. So they never
+run against the configured database. scratch_database() creates and migrates
+test_<NAME>, the database `manage.py test` uses, and points the default
+connection at it for the duration. It drops the database afterwards.
+"""
+import contextlib
+
+from django.db import connection
+from django.test.utils import setup_databases, teardown_databases
+
+
+@contextlib.contextmanager
+def scratch_database(keep=False, log=None):
+    """keep reuses test_<NAME> if it exists and leaves it in place afterwards, like test --keepdb"""
+    old_config = setup_databases(0, False, keepdb=keep, aliases={'default'}, serialized_aliases=set())
+    if log:
+        log(f'Using scratch database {connection.settings_dict["NAME"]}')
+    try:
+        yield
+    finally:
+        teardown_databases(old_config, 0, keepdb=keep)
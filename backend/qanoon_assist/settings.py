@@ -25,6 +25,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'corsheaders',
     'users',
@@ -58,6 +59,18 @@ REST_FRAMEWORK = {
     ),
 }
 
+# Knowledge base search backend: 'memory' (in-process BM25 index), 'compiled' (the same index
+# compiled by compile_search_index and memory-mapped) or 'postgres' (GIN-indexed tsvector)
+KNOWLEDGE_BASE_SEARCH_BACKEND = config('KNOWLEDGE_BASE_SEARCH_BACKEND', default='memory')
+# Build the in-process knowledge base indexes when a worker starts instead of on first request
+KNOWLEDGE_BASE_PRELOAD_INDEXES = config('KNOWLEDGE_BASE_PRELOAD_INDEXES', default=not DEBUG, cast=bool)
+# Directory for the versioned shards written by publish_knowledge_base
+KNOWLEDGE_BASE_SNAPSHOT_ROOT = config('KNOWLEDGE_BASE_SNAPSHOT_ROOT', default=os.path.join(BASE_DIR, 'snapshots'))
+# File written by compile_search_index and mapped by every worker when the backend is 'compiled'
+KNOWLEDGE_BASE_COMPILED_INDEX = config(
+    'KNOWLEDGE_BASE_COMPILED_INDEX', default=os.path.join(KNOWLEDGE_BASE_SNAPSHOT_ROOT, 'search.kbindex')
+)
+
 # JWT Settings
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
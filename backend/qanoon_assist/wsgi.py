@@ -14,3 +14,7 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'qanoon_assist.settings')
 
 application = get_wsgi_application()
+
+# Build the knowledge-base search/typeahead structures at worker start
+from knowledge_base.warmup import preload_indexes  # noqa: E402
+preload_indexes()
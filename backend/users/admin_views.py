@@ -5,6 +5,8 @@ from rest_framework.permissions import IsAuthenticated
 from django.utils import timezone
 from django.db.models import Count, Q
 
+from qanoon_assist.pagination import NewestFirstPagination
+
 from .models import LawyerProfile, User
 from .serializers import LawyerProfileSerializer
 
@@ -136,9 +138,10 @@ class AdminDashboardViewSet(viewsets.ViewSet):
         if request.user.user_type != 'admin':
             return Response({'error': 'Admin access required'}, status=status.HTTP_403_FORBIDDEN)
         
-        pending = LawyerProfile.objects.filter(is_verified=False).select_related('user')
+        paginator = NewestFirstPagination()
+        pending = paginator.paginate_queryset(LawyerProfile.objects.unverified().for_listing(), request, view=self)
         serializer = LawyerProfileSerializer(pending, many=True, context={'request': request})
-        return Response(serializer.data)
+        return paginator.get_paginated_response(serializer.data)
     
     @action(detail=False, methods=['get'])
     def recent_activity(self, request):
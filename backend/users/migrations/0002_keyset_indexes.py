@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-17 20:16
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Built without locking writes out of the tables
+    atomic = False
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='lawyerprofile',
+            index=models.Index(fields=['is_verified', '-id'], name='lawyer_verified_id'),
+        ),
+    ]
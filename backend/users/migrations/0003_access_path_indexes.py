@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-17 20:18
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+    # Built without locking writes out of the tables
+    atomic = False
+
+    dependencies = [
+        ('users', '0002_keyset_indexes'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='lawyerprofile',
+            index=models.Index(models.F('is_verified'), django.db.models.functions.text.Upper('city'), name='lawyer_verified_city'),
+        ),
+    ]
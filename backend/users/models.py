@@ -1,7 +1,10 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models.functions import Upper
 import uuid
 
+from .querysets import LawyerProfileQuerySet
+
 class User(AbstractUser):
     USER_TYPES = (
         ('citizen', 'Citizen'),
@@ -87,8 +90,18 @@ class LawyerProfile(models.Model):
         related_name='verified_lawyers'
     )
     
+    objects = LawyerProfileQuerySet.as_manager()
+    
     class Meta:
         db_table = 'lawyer_profiles'
+        indexes = [
+            # Keyset pages of the (un)verified lawyer lists, newest first
+            models.Index(fields=['is_verified', '-id'], name='lawyer_verified_id'),
+            # ?city= matches a substring of UPPER(city), which no btree can seek;
+            # this index gives the planner statistics on the expression so it
+            # estimates the match instead of assuming one row and sorting a scan
+            models.Index('is_verified', Upper('city'), name='lawyer_verified_city'),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - Lawyer Profile"
@@ -0,0 +1,51 @@
+"""
+Role-scoped querysets shared by the cases and messaging apps.
+
+A model whose rows belong to a citizen and a lawyer names the path from the
+row to each profile, and for_user(user) then returns one lazy query that
+joins to the profile's user_id: citizens and lawyers see their own rows,
+admins see everything and anyone else sees nothing. Nothing is read until the
+queryset is evaluated, so it can be filtered, ordered and paginated further.
+"""
+from django.db import models
+
+
+class RoleScopedQuerySet(models.QuerySet):
+    # Lookup paths from the model to its CitizenProfile and LawyerProfile
+    citizen_path = None
+    lawyer_path = None
+
+    def for_citizen(self, user):
+        return self.filter(**{f'{self.citizen_path}__user_id': user.id})
+
+    def for_lawyer(self, user):
+        return self.filter(**{f'{self.lawyer_path}__user_id': user.id})
+
+    def for_user(self, user):
+        """Rows user may see, as a single query"""
+        user_type = getattr(user, 'user_type', None) if user.is_authenticated else None
+        if user_type == 'citizen':
+            return self.for_citizen(user)
+        if user_type == 'lawyer':
+            return self.for_lawyer(user)
+        if user_type == 'admin':
+            return self.all()
+        return self.none()
+
+
+class LawyerProfileQuerySet(models.QuerySet):
+    def verified(self):
+        return self.filter(is_verified=True)
+
+    def unverified(self):
+        return self.filter(is_verified=False)
+
+    def in_city(self, city):
+        return self.filter(city__icontains=city)
+
+    def with_specialty(self, specialty_id):
+        return self.filter(specialties__id=specialty_id)
+
+    def for_listing(self):
+        """Everything LawyerProfileSerializer reads, in two queries"""
+        return self.select_related('user').prefetch_related('specialties')
@@ -1,3 +1,45 @@
 from django.test import TestCase
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from .models import LawyerProfile, LawyerSpecialty, User
+
+
+class LawyerListTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.criminal = LawyerSpecialty.objects.create(name='Criminal')
+        family = LawyerSpecialty.objects.create(name='Family')
+        for number, (city, verified) in enumerate([('Lahore', True), ('Karachi', True), ('lahore cantt', True), ('Lahore', False)]):
+            user = User.objects.create_user(username=f'lawyer{number}', password='x', user_type='lawyer')
+            lawyer = LawyerProfile.objects.create(
+                user=user, bar_council_number=f'BC-{number}', experience_years=5,
+                consultation_fee=1000, city=city, is_verified=verified
+            )
+            lawyer.specialties.set([cls.criminal, family] if number % 2 == 0 else [family])
+
+    def lawyers(self, query=''):
+        with self.assertNumQueries(2):
+            response = APIClient().get('/api/lawyers/' + query)
+        self.assertEqual(response.status_code, 200)
+        return [lawyer['user']['username'] for lawyer in response.json()['results']]
+
+    def test_lists_verified_lawyers_newest_first(self):
+        self.assertEqual(self.lawyers(), ['lawyer2', 'lawyer1', 'lawyer0'])
+
+    def test_city_filter_is_case_insensitive_substring(self):
+        self.assertEqual(self.lawyers('?city=LAHORE'), ['lawyer2', 'lawyer0'])
+
+    def test_specialty_filter(self):
+        self.assertEqual(self.lawyers(f'?specialty={self.criminal.id}'), ['lawyer2', 'lawyer0'])
+
+    def test_pages_follow_the_cursor(self):
+        client = APIClient()
+        seen = []
+        url = '/api/lawyers/?page_size=2'
+        while url:
+            # One query for the page of lawyers, one for their specialties
+            with self.assertNumQueries(2):
+                page = client.get(url).json()
+            seen += [lawyer['user']['username'] for lawyer in page['results']]
+            url = page['next']
+        self.assertEqual(seen, ['lawyer2', 'lawyer1', 'lawyer0'])
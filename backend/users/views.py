@@ -83,6 +83,7 @@ from rest_framework_simplejwt.views import TokenObtainPairView
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 
+from qanoon_assist.pagination import NewestFirstPagination
 from .models import LawyerProfile, LawyerSpecialty, CitizenProfile
 from .serializers import (
     LawyerProfileSerializer, LawyerSpecialtySerializer,
@@ -93,40 +94,23 @@ from .serializers import (
 User = get_user_model()
 
 class LawyerViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = LawyerProfile.objects.filter(is_verified=True)
+    queryset = LawyerProfile.objects.verified()
     serializer_class = LawyerProfileSerializer
     permission_classes = [AllowAny]
+    pagination_class = NewestFirstPagination
     
     def get_queryset(self):
-        """Get verified lawyers with optional filters (using raw SQL for city filter)"""
-        from django.db import connection
-        
+        """Verified lawyers, optionally filtered by city and specialty"""
         city = self.request.query_params.get('city', None)
         specialty_id = self.request.query_params.get('specialty', None)
         
-        # Use raw SQL when city filter is applied
+        queryset = LawyerProfile.objects.verified()
         if city:
-            with connection.cursor() as cursor:
-                cursor.execute("""
-                    SELECT * FROM lawyer_profiles 
-                    WHERE is_verified = TRUE 
-                    AND LOWER(city) LIKE LOWER(%s)
-                    ORDER BY id DESC
-                """, [f'%{city}%'])
-                
-                columns = [col[0] for col in cursor.description]
-                lawyer_data = [dict(zip(columns, row)) for row in cursor.fetchall()]
-                lawyer_ids = [item['id'] for item in lawyer_data]
-                queryset = LawyerProfile.objects.filter(id__in=lawyer_ids)
-        else:
-            # Use ORM for base query
-            queryset = LawyerProfile.objects.filter(is_verified=True)
-        
-        # Apply specialty filter using ORM
+            queryset = queryset.in_city(city)
         if specialty_id:
-            queryset = queryset.filter(specialties__id=specialty_id)
+            queryset = queryset.with_specialty(specialty_id)
         
-        return queryset
+        return queryset.for_listing().order_by('-id')
         
     @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
     def unverified(self, request):
@@ -134,26 +118,10 @@ class LawyerViewSet(viewsets.ReadOnlyModelViewSet):
         if request.user.user_type != 'admin':
             return Response({'error': 'Unauthorized'}, status=status.HTTP_403_FORBIDDEN)
         
-        # Raw SQL Query - Demonstrates ability to use both ORM and raw SQL
-        from django.db import connection
-        
-        with connection.cursor() as cursor:
-            cursor.execute("""
-                SELECT * FROM lawyer_profiles 
-                WHERE is_verified = FALSE
-                ORDER BY id DESC
-            """)
-            columns = [col[0] for col in cursor.description]
-            unverified_data = [
-                dict(zip(columns, row))
-                for row in cursor.fetchall()
-            ]
-        
-        # Convert raw data to LawyerProfile objects for serialization
-        unverified_ids = [item['id'] for item in unverified_data]
-        unverified = LawyerProfile.objects.filter(id__in=unverified_ids)
-        serializer = self.get_serializer(unverified, many=True)
-        return Response(serializer.data)
+        unverified = LawyerProfile.objects.unverified().for_listing()
+        page = self.paginate_queryset(unverified)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
     
     @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
     def verify(self, request, pk=None):
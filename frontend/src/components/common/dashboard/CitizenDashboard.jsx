@@ -9,7 +9,7 @@ import {
     HourglassEmpty, Assignment, Dashboard,
     Message, Visibility, Person
 } from '@mui/icons-material';
-import { caseRequestAPI } from '../../../services/api';
+import { caseRequestAPI, getPage } from '../../../services/api';
 
 function TabPanel({ children, value, index }) {
     return (
@@ -21,6 +21,9 @@ function TabPanel({ children, value, index }) {
 
 function CitizenDashboard() {
     const [requests, setRequests] = useState([]);
+    const [next, setNext] = useState(null);
+    const [loadingMore, setLoadingMore] = useState(false);
+    const [counts, setCounts] = useState(null);
     const [loading, setLoading] = useState(true);
     const [filter, setFilter] = useState('all');
     const [tabValue, setTabValue] = useState(0);
@@ -32,10 +35,15 @@ function CitizenDashboard() {
     const fetchRequests = async () => {
         try {
             setLoading(true);
-            const response = await caseRequestAPI.getAll();
+            const [response, statsResponse] = await Promise.all([
+                caseRequestAPI.getAll(),
+                caseRequestAPI.getStats()
+            ]);
             console.log('🔍 Case Requests Data:', response.data);
-            console.log('🔍 First Request:', response.data[0]);
-            setRequests(response.data);
+            console.log('🔍 First Request:', response.data.results[0]);
+            setRequests(response.data.results);
+            setNext(response.data.next);
+            setCounts(statsResponse.data);
         } catch (error) {
             console.error('Error fetching requests:', error);
         } finally {
@@ -43,6 +51,19 @@ function CitizenDashboard() {
         }
     };
 
+    const handleLoadMore = async () => {
+        try {
+            setLoadingMore(true);
+            const response = await getPage(next);
+            setRequests((loaded) => [...loaded, ...response.data.results]);
+            setNext(response.data.next);
+        } catch (error) {
+            console.error('Error loading more requests:', error);
+        } finally {
+            setLoadingMore(false);
+        }
+    };
+
     const getStatusColor = (status) => {
         switch (status) {
             case 'pending': return 'warning';
@@ -65,12 +86,13 @@ function CitizenDashboard() {
         }
     };
 
+    // Totals come from the counters endpoint; only the loaded pages are in `requests`
     const stats = {
-        total: requests.length,
-        pending: requests.filter(r => r.status === 'pending').length,
-        accepted: requests.filter(r => r.status === 'accepted').length,
-        inProgress: requests.filter(r => r.status === 'in_progress').length,
-        completed: requests.filter(r => r.status === 'completed').length,
+        total: counts?.total_requests ?? 0,
+        pending: counts?.pending ?? 0,
+        accepted: counts?.accepted ?? 0,
+        inProgress: counts?.in_progress ?? 0,
+        completed: counts?.completed ?? 0,
     };
 
     const filteredRequests = filter === 'all' 
@@ -455,6 +477,14 @@ function CitizenDashboard() {
                         ))}
                     </Grid>
                 )}
+
+                {next && (
+                    <Box sx={{ textAlign: 'center', mt: 4 }}>
+                        <Button variant="outlined" onClick={handleLoadMore} disabled={loadingMore} sx={{ color: 'white', borderColor: 'rgba(255,255,255,0.4)' }}>
+                            {loadingMore ? 'Loading...' : 'Load more requests'}
+                        </Button>
+                    </Box>
+                )}
             </Container>
         </Box>
     );
@@ -10,7 +10,7 @@ import {
     HourglassEmpty, Assignment, Email, Phone,
     Dashboard, Message, Work, TaskAlt
 } from '@mui/icons-material';
-import { caseRequestAPI } from '../../../services/api';
+import { caseRequestAPI, getPage } from '../../../services/api';
 
 function TabPanel({ children, value, index }) {
     return (
@@ -22,6 +22,9 @@ function TabPanel({ children, value, index }) {
 
 function LawyerDashboard() {
     const [requests, setRequests] = useState([]);
+    const [next, setNext] = useState(null);
+    const [loadingMore, setLoadingMore] = useState(false);
+    const [counts, setCounts] = useState(null);
     const [loading, setLoading] = useState(true);
     const [filter, setFilter] = useState('pending');
     const [actionDialog, setActionDialog] = useState({ open: false, request: null, action: null });
@@ -37,8 +40,13 @@ function LawyerDashboard() {
     const fetchRequests = async () => {
         try {
             setLoading(true);
-            const response = await caseRequestAPI.getAll();
-            setRequests(response.data);
+            const [response, statsResponse] = await Promise.all([
+                caseRequestAPI.getAll(),
+                caseRequestAPI.getStats()
+            ]);
+            setRequests(response.data.results);
+            setNext(response.data.next);
+            setCounts(statsResponse.data);
         } catch (error) {
             console.error('Error fetching requests:', error);
             showAlert('Failed to load case requests', 'error');
@@ -47,6 +55,19 @@ function LawyerDashboard() {
         }
     };
 
+    const handleLoadMore = async () => {
+        try {
+            setLoadingMore(true);
+            const response = await getPage(next);
+            setRequests((loaded) => [...loaded, ...response.data.results]);
+            setNext(response.data.next);
+        } catch (error) {
+            console.error('Error loading more requests:', error);
+        } finally {
+            setLoadingMore(false);
+        }
+    };
+
     const handleOpenDialog = (request, action) => {
         setActionDialog({ open: true, request, action });
         setResponseMessage('');
@@ -101,12 +122,13 @@ function LawyerDashboard() {
         }
     };
 
+    // Totals come from the counters endpoint; only the loaded pages are in `requests`
     const stats = {
-        pending: requests.filter(r => r.status === 'pending').length,
-        accepted: requests.filter(r => r.status === 'accepted').length,
-        inProgress: requests.filter(r => r.status === 'in_progress').length,
-        completed: requests.filter(r => r.status === 'completed').length,
-        total: requests.length
+        total: counts?.total_requests ?? 0,
+        pending: counts?.pending ?? 0,
+        accepted: counts?.accepted ?? 0,
+        inProgress: counts?.in_progress ?? 0,
+        completed: counts?.completed ?? 0,
     };
 
     const filteredRequests = filter === 'all' 
@@ -589,6 +611,14 @@ function LawyerDashboard() {
                     </Grid>
                 )}
 
+                {next && (
+                    <Box sx={{ textAlign: 'center', mt: 4 }}>
+                        <Button variant="outlined" onClick={handleLoadMore} disabled={loadingMore} sx={{ color: 'white', borderColor: 'rgba(255,255,255,0.4)' }}>
+                            {loadingMore ? 'Loading...' : 'Load more requests'}
+                        </Button>
+                    </Box>
+                )}
+
                 {/* Action Dialog */}
                 <Dialog 
                     open={actionDialog.open} 
@@ -9,15 +9,29 @@ import { useAuth } from '../../../contexts/AuthContext';
 
 function MessageBox({ caseRequestId, onBack }) {
     const { user } = useAuth();
-    const [messages, setMessages] = useState([]);
+    // Cursor pages of the conversation, oldest first: [{ url, results }]
+    const [pages, setPages] = useState([]);
+    const [next, setNext] = useState(null);
+    const [loadingMore, setLoadingMore] = useState(false);
     const [newMessage, setNewMessage] = useState('');
     const [selectedFile, setSelectedFile] = useState(null);
     const [loading, setLoading] = useState(true);
     const [sending, setSending] = useState(false);
     const messagesEndRef = useRef(null);
     const fileInputRef = useRef(null);
+    // The polling interval reads the pages loaded so far from here
+    const pagesRef = useRef([]);
+
+    const messages = pages.flatMap((page) => page.results);
+
+    const updatePages = (loaded) => {
+        pagesRef.current = loaded;
+        setPages(loaded);
+    };
 
     useEffect(() => {
+        updatePages([]);
+        setNext(null);
         fetchMessages();
         // Poll for new messages every 3 seconds
         const interval = setInterval(fetchMessages, 3000);
@@ -26,12 +40,16 @@ function MessageBox({ caseRequestId, onBack }) {
 
     useEffect(() => {
         scrollToBottom();
-    }, [messages]);
+    }, [pages]);
 
+    // Re-read the last loaded page, which is where new messages arrive
     const fetchMessages = async () => {
         try {
-            const response = await messageAPI.getByCaseRequest(caseRequestId);
-            setMessages(response.data);
+            const loaded = pagesRef.current;
+            const url = loaded.length ? loaded[loaded.length - 1].url : null;
+            const response = await messageAPI.getByCaseRequest(caseRequestId, url);
+            updatePages([...loaded.slice(0, -1), { url, results: response.data.results }]);
+            setNext(response.data.next);
             setLoading(false);
         } catch (error) {
             console.error('Error fetching messages:', error);
@@ -39,6 +57,19 @@ function MessageBox({ caseRequestId, onBack }) {
         }
     };
 
+    const handleLoadMore = async () => {
+        setLoadingMore(true);
+        try {
+            const response = await messageAPI.getByCaseRequest(caseRequestId, next);
+            updatePages([...pagesRef.current, { url: next, results: response.data.results }]);
+            setNext(response.data.next);
+        } catch (error) {
+            console.error('Error loading more messages:', error);
+        } finally {
+            setLoadingMore(false);
+        }
+    };
+
     const scrollToBottom = () => {
         messagesEndRef.current?.scrollIntoView({ behavior: 'smooth' });
     };
@@ -177,6 +208,13 @@ function MessageBox({ caseRequestId, onBack }) {
                         );
                     })
                 )}
+                {next && (
+                    <Box textAlign="center" mb={2}>
+                        <Button size="small" onClick={handleLoadMore} disabled={loadingMore}>
+                            {loadingMore ? 'Loading...' : 'Load more messages'}
+                        </Button>
+                    </Box>
+                )}
                 <div ref={messagesEndRef} />
             </Box>
 
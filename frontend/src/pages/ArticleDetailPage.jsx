@@ -21,6 +21,7 @@ export default function ArticleDetailPage() {
   const { id } = useParams();
   const navigate = useNavigate();
   const [article, setArticle] = useState(null);
+  const [relatedArticles, setRelatedArticles] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
 
@@ -36,7 +37,17 @@ export default function ArticleDetailPage() {
         setLoading(false);
       }
     };
+    const fetchRelated = async () => {
+      try {
+        const res = await knowledgeBaseAPI.getRelatedArticles(id);
+        setRelatedArticles(res.data.results);
+      } catch (err) {
+        setRelatedArticles([]);
+        console.error(err);
+      }
+    };
     fetchArticle();
+    fetchRelated();
   }, [id]);
 
   if (loading) {
@@ -257,6 +268,55 @@ export default function ArticleDetailPage() {
             )}
           </CardContent>
         </Card>
+
+        {/* See Also */}
+        {relatedArticles.length > 0 && (
+          <Box sx={{ mt: 4 }}>
+            <Typography
+              variant="subtitle2"
+              sx={{
+                fontWeight: 700,
+                mb: 2,
+                color: 'white',
+                fontSize: '0.95rem',
+                textTransform: 'uppercase',
+                letterSpacing: 0.5
+              }}
+            >
+              See Also
+            </Typography>
+            <Box sx={{ display: 'flex', flexDirection: 'column', gap: 1.5 }}>
+              {relatedArticles.map((related) => (
+                <Paper
+                  key={related.id}
+                  onClick={() => navigate(`/knowledge-base/article/${related.id}`)}
+                  sx={{
+                    p: 2,
+                    cursor: 'pointer',
+                    background: 'rgba(255,255,255,0.04)',
+                    border: '1px solid rgba(255,255,255,0.12)',
+                    color: 'white',
+                    transition: '0.3s',
+                    '&:hover': {
+                      background: 'rgba(255,255,255,0.08)',
+                      borderColor: 'rgba(255,255,255,0.3)'
+                    }
+                  }}
+                >
+                  <Typography
+                    variant="caption"
+                    sx={{ color: 'rgba(255,255,255,0.6)', fontWeight: 600 }}
+                  >
+                    {related.article_number}
+                  </Typography>
+                  <Typography variant="body1" sx={{ fontWeight: 600 }}>
+                    {related.title}
+                  </Typography>
+                </Paper>
+              ))}
+            </Box>
+          </Box>
+        )}
       </Container>
     </Box>
   );
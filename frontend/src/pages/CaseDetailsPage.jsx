@@ -11,7 +11,7 @@ import {
     LocationOn, Description, Dashboard,
     Person, Schedule, Info
 } from '@mui/icons-material';
-import { caseRequestAPI, hearingAPI, caseUpdateAPI } from '../services/api';
+import { caseRequestAPI, hearingAPI, caseUpdateAPI, getPage } from '../services/api';
 import { useAuth } from '../contexts/AuthContext';
 
 function CaseDetailsPage() {
@@ -21,6 +21,9 @@ function CaseDetailsPage() {
     const [caseRequest, setCaseRequest] = useState(null);
     const [hearings, setHearings] = useState([]);
     const [updates, setUpdates] = useState([]);
+    // Cursor links to the next page of each list, null once all are loaded
+    const [hearingsNext, setHearingsNext] = useState(null);
+    const [updatesNext, setUpdatesNext] = useState(null);
     const [loading, setLoading] = useState(true);
     const [alert, setAlert] = useState({ show: false, message: '', severity: 'success' });
     
@@ -55,15 +58,15 @@ function CaseDetailsPage() {
             
             // If case exists, fetch hearings and updates
             if (response.data.case_id) {
-                // Fetch hearings
-                const hearingsResponse = await hearingAPI.getAll();
-                const caseHearings = hearingsResponse.data.filter(h => h.case === response.data.case_id);
-                setHearings(caseHearings);
+                // Fetch the first page of this case's hearings
+                const hearingsResponse = await hearingAPI.getAll({ case: response.data.case_id });
+                setHearings(hearingsResponse.data.results);
+                setHearingsNext(hearingsResponse.data.next);
                 
-                // Fetch updates
-                const updatesResponse = await caseUpdateAPI.getAll();
-                const caseUpdates = updatesResponse.data.filter(u => u.case === response.data.case_id);
-                setUpdates(caseUpdates);
+                // Fetch the first page of this case's updates
+                const updatesResponse = await caseUpdateAPI.getAll({ case: response.data.case_id });
+                setUpdates(updatesResponse.data.results);
+                setUpdatesNext(updatesResponse.data.next);
             }
             
             // Mark as viewed if citizen
@@ -83,6 +86,26 @@ function CaseDetailsPage() {
         }
     };
 
+    const handleLoadMoreHearings = async () => {
+        try {
+            const response = await getPage(hearingsNext);
+            setHearings((loaded) => [...loaded, ...response.data.results]);
+            setHearingsNext(response.data.next);
+        } catch (error) {
+            showAlert('Failed to load more hearings', 'error');
+        }
+    };
+
+    const handleLoadMoreUpdates = async () => {
+        try {
+            const response = await getPage(updatesNext);
+            setUpdates((loaded) => [...loaded, ...response.data.results]);
+            setUpdatesNext(response.data.next);
+        } catch (error) {
+            showAlert('Failed to load more updates', 'error');
+        }
+    };
+
     const showAlert = (message, severity) => {
         setAlert({ show: true, message, severity });
         setTimeout(() => setAlert({ show: false, message: '', severity: 'success' }), 3000);
@@ -391,6 +414,13 @@ function CaseDetailsPage() {
                                     ))}
                                 </List>
                             )}
+                            {hearingsNext && (
+                                <Box sx={{ textAlign: 'center', mt: 1 }}>
+                                    <Button size="small" onClick={handleLoadMoreHearings} sx={{ color: '#64b5f6' }}>
+                                        Load more hearings
+                                    </Button>
+                                </Box>
+                            )}
                         </Paper>
                     </Grid>
 
@@ -447,6 +477,13 @@ function CaseDetailsPage() {
                                     ))}
                                 </List>
                             )}
+                            {updatesNext && (
+                                <Box sx={{ textAlign: 'center', mt: 1 }}>
+                                    <Button size="small" onClick={handleLoadMoreUpdates} sx={{ color: '#64b5f6' }}>
+                                        Load more updates
+                                    </Button>
+                                </Box>
+                            )}
                         </Paper>
                     </Grid>
                 </Grid>
@@ -19,6 +19,30 @@ import SearchIcon from '@mui/icons-material/Search';
 import BookmarkIcon from '@mui/icons-material/Bookmark';
 import { knowledgeBaseAPI } from '../services/api';
 
+// Snippet text with the server-reported [start, end] match ranges marked
+function renderSnippet(article) {
+  const highlights = article.highlights || [];
+  if (!highlights.length) return article.snippet;
+
+  const parts = [];
+  let last = 0;
+  highlights.forEach(([start, end], index) => {
+    parts.push(article.snippet.slice(last, start));
+    parts.push(
+      <Box
+        component="mark"
+        key={index}
+        sx={{ bgcolor: 'rgba(255,214,0,0.3)', color: 'inherit', borderRadius: 0.5, px: 0.25 }}
+      >
+        {article.snippet.slice(start, end)}
+      </Box>
+    );
+    last = end;
+  });
+  parts.push(article.snippet.slice(last));
+  return parts;
+}
+
 export default function KnowledgeBasePage() {
   const navigate = useNavigate();
   const [searchTerm, setSearchTerm] = useState('');
@@ -338,7 +362,7 @@ export default function KnowledgeBasePage() {
                             color: 'rgba(255,255,255,0.7)'
                           }}
                         >
-                          {article.content.substring(0, 150)}...
+                          {renderSnippet(article)}
                         </Typography>
                         <Box sx={{ display: 'flex', gap: 1, alignItems: 'center', flexWrap: 'wrap' }}>
                           <Chip
@@ -6,12 +6,14 @@ import {
 } from '@mui/material';
 
 import { Email, Phone, LocationOn, School, AttachMoney } from '@mui/icons-material';
-import { lawyerAPI, specialtyAPI, caseRequestAPI } from '../services/api';
+import { lawyerAPI, specialtyAPI, caseRequestAPI, getPage } from '../services/api';
 import { useAuth } from '../contexts/AuthContext';
 
 function LawyersPage() {
     const { user, isCitizen } = useAuth();
     const [lawyers, setLawyers] = useState([]);
+    const [next, setNext] = useState(null);
+    const [loadingMore, setLoadingMore] = useState(false);
     const [specialties, setSpecialties] = useState([]);
     const [loading, setLoading] = useState(true);
     const [filters, setFilters] = useState({
@@ -40,7 +42,8 @@ function LawyersPage() {
         try {
             setLoading(true);
             const response = await lawyerAPI.getAll(filters);
-            setLawyers(response.data);
+            setLawyers(response.data.results);
+            setNext(response.data.next);
         } catch (error) {
             console.error('Error fetching lawyers:', error);
         } finally {
@@ -48,6 +51,19 @@ function LawyersPage() {
         }
     };
 
+    const handleLoadMore = async () => {
+        try {
+            setLoadingMore(true);
+            const response = await getPage(next);
+            setLawyers((loaded) => [...loaded, ...response.data.results]);
+            setNext(response.data.next);
+        } catch (error) {
+            console.error('Error loading more lawyers:', error);
+        } finally {
+            setLoadingMore(false);
+        }
+    };
+
     const fetchSpecialties = async () => {
         try {
             const response = await specialtyAPI.getAll();
@@ -332,6 +348,14 @@ function LawyersPage() {
                     )}
                 </Grid>
 
+                {next && (
+                    <Box sx={{ textAlign: 'center', mt: 4 }}>
+                        <Button variant="outlined" onClick={handleLoadMore} disabled={loadingMore} sx={{ color: 'white', borderColor: 'rgba(255,255,255,0.4)' }}>
+                            {loadingMore ? 'Loading...' : 'Load more lawyers'}
+                        </Button>
+                    </Box>
+                )}
+
                 {/* REQUEST DIALOG */}
                 <Dialog
                     open={requestDialog}
@@ -14,7 +14,7 @@ import {
     Dashboard, CaseIcon
 } from '@mui/icons-material';
 import { useAuth } from '../../contexts/AuthContext';
-import { adminAPI, lawyerAPI } from '../../services/api';
+import { adminAPI, lawyerAPI, getPage } from '../../services/api';
 
 function TabPanel({ children, value, index }) {
     return (
@@ -29,6 +29,8 @@ function AdminDashboard() {
     console.log('⚡ AdminDashboard - isAdmin:', isAdmin);
     const [stats, setStats] = useState(null);
     const [pendingLawyers, setPendingLawyers] = useState([]);
+    const [pendingNext, setPendingNext] = useState(null);
+    const [loadingMore, setLoadingMore] = useState(false);
     const [recentActivity, setRecentActivity] = useState(null);
     const [selectedLawyer, setSelectedLawyer] = useState(null);
     const [rejectDialogOpen, setRejectDialogOpen] = useState(false);
@@ -61,7 +63,8 @@ function AdminDashboard() {
             console.log('✅ Activity response:', activityRes.data);
             
             setStats(statsRes.data);
-            setPendingLawyers(lawyersRes.data);
+            setPendingLawyers(lawyersRes.data.results);
+            setPendingNext(lawyersRes.data.next);
             setRecentActivity(activityRes.data);
         } catch (error) {
             console.error('❌ Failed to fetch dashboard data:', error);
@@ -71,6 +74,19 @@ function AdminDashboard() {
         setDataLoading(false);
     };
 
+    const handleLoadMoreLawyers = async () => {
+        try {
+            setLoadingMore(true);
+            const response = await getPage(pendingNext);
+            setPendingLawyers((loaded) => [...loaded, ...response.data.results]);
+            setPendingNext(response.data.next);
+        } catch (error) {
+            console.error('Failed to load more lawyers:', error);
+        } finally {
+            setLoadingMore(false);
+        }
+    };
+
     const handleVerify = async (lawyerId) => {
         try {
             const response = await lawyerAPI.verify(lawyerId);
@@ -484,7 +500,7 @@ function AdminDashboard() {
                             }
                         }}
                     >
-                        <Tab label={`Pending Lawyers (${pendingLawyers.length})`} />
+                        <Tab label={`Pending Lawyers (${stats?.pending_verification || 0})`} />
                         <Tab label="Recent Activity" />
                     </Tabs>
                 </Paper>
@@ -599,6 +615,13 @@ function AdminDashboard() {
                                 </TableBody>
                             </Table>
                         </TableContainer>
+                        {pendingNext && (
+                            <Box sx={{ textAlign: 'center', py: 2 }}>
+                                <Button variant="outlined" onClick={handleLoadMoreLawyers} disabled={loadingMore} sx={{ color: 'white', borderColor: 'rgba(255,255,255,0.4)' }}>
+                                    {loadingMore ? 'Loading...' : 'Load more lawyers'}
+                                </Button>
+                            </Box>
+                        )}
                     </Paper>
                 </TabPanel>
 
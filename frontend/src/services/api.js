@@ -81,6 +81,10 @@ api.interceptors.response.use(
 
 export default api;
 
+// List endpoints return cursor pages ({ next, previous, results }): show
+// response.data.results and keep response.data.next to load the page after it
+export const getPage = (next) => api.get(next);
+
 // API functions
 export const authAPI = {
     login: (username, password) => api.post('/auth/login/', { username, password }),
@@ -120,8 +124,11 @@ export const specialtyAPI = {
 
 // Case Request API
 export const caseRequestAPI = {
-    // Get all case requests (for current user)
+    // First page of the current user's case requests, newest first
     getAll: () => api.get('/case-requests/'),
+
+    // The current user's case requests by status
+    getStats: () => api.get('/case-requests/stats/'),
     
     // Get single case request
     getById: (id) => api.get(`/case-requests/${id}/`),
@@ -140,8 +147,8 @@ export const caseRequestAPI = {
 
 // Messaging API
 export const messageAPI = {
-    // Get all messages for a case request
-    getByCaseRequest: (caseRequestId) => api.get(`/messages/by_case/?case_request_id=${caseRequestId}`),
+    // A page of a case request's messages, oldest first; pass a page's `next` URL for the one after it
+    getByCaseRequest: (caseRequestId, url) => api.get(url || `/messages/by_case/?case_request_id=${caseRequestId}`),
     
     // Send a new message with optional file
     send: (data) => {
@@ -162,7 +169,7 @@ export const messageAPI = {
         return api.post('/messages/', data);
     },
     
-    // Get all messages (for current user)
+    // First page of the current user's messages
     getAll: () => api.get('/messages/'),
 };
 
@@ -175,7 +182,7 @@ export const caseAPI = {
 
 // Hearing API
 export const hearingAPI = {
-    getAll: () => api.get('/hearings/'),
+    getAll: (params) => api.get('/hearings/', { params }),
     getById: (id) => api.get(`/hearings/${id}/`),
     create: (data) => api.post('/hearings/', data),
     update: (id, data) => api.put(`/hearings/${id}/`, data),
@@ -184,7 +191,7 @@ export const hearingAPI = {
 
 // Case Update API
 export const caseUpdateAPI = {
-    getAll: () => api.get('/case-updates/'),
+    getAll: (params) => api.get('/case-updates/', { params }),
     getById: (id) => api.get(`/case-updates/${id}/`),
     create: (data) => api.post('/case-updates/', data),
 };
@@ -193,13 +200,19 @@ export const knowledgeBaseAPI = {
   // Get all categories
   getCategories: () => api.get('/knowledge-base/categories/'),
 
-  // Get all articles
-  getAllArticles: () => api.get('/knowledge-base/articles/'),
+  // First page of articles by article number; the response is { next, previous, results }
+  getAllArticles: (params) => api.get('/knowledge-base/articles/', { params }),
 
   // Search articles with filters
   searchArticles: (params) => api.get('/knowledge-base/articles/search/', { params }),
 
   // Get single article detail
   getArticleDetail: (id) => api.get(`/knowledge-base/articles/${id}/`),
+
+  // First page of the precomputed "see also" articles, most similar first
+  getRelatedArticles: (id) => api.get(`/knowledge-base/articles/${id}/related/`),
+
+  // Resolve many free-form citations ("s.302 PPC", "Art 10-A") in one call
+  resolveCitations: (citations, code) => api.post('/knowledge-base/articles/resolve/', { citations, code }),
 };
 